@@ -0,0 +1,435 @@
+# app/agregador.py
+"""
+Coleta de vários hosts: o monitor de cada máquina roda como agente (sink
+"rede") e envia lotes de amostras para um agregador, que grava um
+historico.csv por host em <diretorio>/<host>/.
+
+Protocolo (cada lote é um JSON):
+
+    {"host": "web-1", "sessao": "1731000000.123-4242", "seq": 17,
+     "campos": ["timestamp", "cpu_percent", ...], "amostras": [[...], ...]}
+
+    TCP: quadro = tamanho (4 bytes, big-endian) + JSON; o agregador responde
+         a cada quadro com o seq recebido (8 bytes). O agente guarda os lotes
+         sem confirmação e os reenvia depois de reconectar.
+    UDP: um lote por datagrama, sem confirmação (perdas viram lacunas).
+
+Ordem: `seq` cresce de 1 em 1 dentro de uma `sessao` (uma execução do
+agente). O agregador grava os lotes de cada host na ordem do seq: lotes
+repetidos (reenvio após reconexão) são ignorados e lotes adiantados esperam
+os anteriores por até `espera_lacuna` segundos; depois disso a lacuna é
+considerada perdida. Uma sessão nova (agente reiniciado) recomeça a contagem.
+"""
+import heapq
+import json
+import os
+import re
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+from esquema import gravar_esquema, versao_dos_campos
+from sinks import SinkCSV
+
+
+PORTA_PADRAO = 9400
+TAMANHO_MAX_QUADRO = 64 << 20
+# Cabe em um datagrama UDP com folga para o JSON do envelope
+TAMANHO_MAX_DATAGRAMA = 60000
+_CABECALHO = struct.Struct("!I")
+_ACK = struct.Struct("!Q")
+
+
+def interpretar_url(url):
+    """'tcp://host:porta' ou 'udp://host:porta' -> (protocolo, host, porta)."""
+    m = re.fullmatch(r"(tcp|udp)://([^:/]+)(?::(\d+))?/?", url or "")
+    if not m:
+        raise ValueError(f"URL do agregador inválida: '{url}' (ex.: tcp://127.0.0.1:{PORTA_PADRAO})")
+    return m.group(1), m.group(2), int(m.group(3) or PORTA_PADRAO)
+
+
+def _receber_exato(conexao, n):
+    dados = bytearray()
+    while len(dados) < n:
+        parte = conexao.recv(n - len(dados))
+        if not parte:
+            raise ConnectionError("conexão fechada")
+        dados += parte
+    return bytes(dados)
+
+
+class SinkRede:
+    """
+    Lado do agente: envia cada lote do EscritorAssincrono ao agregador.
+
+    Roda na thread do escritor, então uma rede lenta ou um agregador fora do
+    ar só enchem a fila de pendentes, sem atrasar a coleta. Em TCP, lotes sem
+    confirmação ficam em `pendentes` (até `max_pendentes`; acima disso os
+    mais antigos são descartados) e são reenviados, em ordem, quando a
+    conexão volta; as tentativas de reconexão têm backoff exponencial, que só
+    volta ao mínimo depois de um lote confirmado. Lotes que o agregador nunca
+    aceitaria (confirmação 0 = lote inválido, ou maiores que
+    TAMANHO_MAX_QUADRO) são descartados em vez de reenviados.
+
+    Args:
+        url (str): tcp://host:porta ou udp://host:porta do agregador.
+        campos (list): colunas das amostras.
+        host_id (str): nome do host nos dados (padrão: hostname). Permite
+            simular vários agentes em uma máquina.
+        max_pendentes (int): lotes guardados enquanto o agregador não responde.
+        timeout (float): timeout de conexão e de confirmação, em segundos.
+    """
+
+    def __init__(self, url, campos, host_id=None, max_pendentes=1000, timeout=5.0):
+        self.protocolo, self.host, self.porta = interpretar_url(url)
+        self.campos = list(campos)
+        self.host_id = host_id or socket.gethostname()
+        self.sessao = f"{time.time():.3f}-{os.getpid()}"
+        self.timeout = timeout
+        self.pendentes = deque()
+        self.max_pendentes = max_pendentes
+        self.seq = 0
+        self.enviados = 0
+        self.descartados = 0
+        self.reconexoes = 0
+        self._socket = None
+        self._proxima_tentativa = 0.0
+        self._backoff = 0.5
+
+    def _quadros(self, amostras):
+        """Serializa o lote; em UDP, divide em partes que caibam em um datagrama."""
+        linhas = [[a.get(c) for c in self.campos] for a in amostras]
+        partes = [linhas]
+        if self.protocolo == "udp":
+            tamanho = len(json.dumps(linhas))
+            n = max(1, -(-tamanho // TAMANHO_MAX_DATAGRAMA))
+            passo = -(-len(linhas) // n)
+            partes = [linhas[i:i + passo] for i in range(0, len(linhas), passo)]
+        quadros = []
+        for parte in partes:
+            self.seq += 1
+            quadros.append((self.seq, json.dumps({
+                "host": self.host_id,
+                "sessao": self.sessao,
+                "seq": self.seq,
+                "campos": self.campos,
+                "amostras": parte,
+            }).encode("utf-8")))
+        return quadros
+
+    def escrever(self, amostras):
+        if not amostras:
+            return
+        self.pendentes.extend(self._quadros(amostras))
+        while len(self.pendentes) > self.max_pendentes:
+            self.pendentes.popleft()
+            self.descartados += 1
+
+    def _conectar(self):
+        if self._socket is not None:
+            return True
+        agora = time.monotonic()
+        if agora < self._proxima_tentativa:
+            return False
+        try:
+            if self.protocolo == "tcp":
+                s = socket.create_connection((self.host, self.porta), timeout=self.timeout)
+                s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            else:
+                s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                s.connect((self.host, self.porta))
+        except OSError as e:
+            self._proxima_tentativa = agora + self._backoff
+            self._backoff = min(self._backoff * 2, 30.0)
+            print(f"Aviso: agregador {self.host}:{self.porta} indisponível ({e}); "
+                  f"{len(self.pendentes)} lotes pendentes", file=sys.stderr)
+            return False
+        if self.enviados:
+            self.reconexoes += 1
+        self._socket = s
+        return True
+
+    def _descartar(self, motivo):
+        seq, _ = self.pendentes.popleft()
+        self.descartados += 1
+        print(f"Aviso: lote {seq} descartado ({motivo})", file=sys.stderr)
+
+    def flush(self):
+        """Envia os pendentes; em caso de erro, mantém-nos para a próxima tentativa."""
+        while self.pendentes and self._conectar():
+            seq, quadro = self.pendentes[0]
+            if self.protocolo == "tcp" and len(quadro) > TAMANHO_MAX_QUADRO:
+                # O agregador fecharia a conexão a cada reenvio
+                self._descartar(f"{len(quadro)} bytes, acima de {TAMANHO_MAX_QUADRO}")
+                continue
+            try:
+                if self.protocolo == "tcp":
+                    self._socket.sendall(_CABECALHO.pack(len(quadro)) + quadro)
+                    (confirmado,) = _ACK.unpack(_receber_exato(self._socket, _ACK.size))
+                    if confirmado == 0:
+                        self._descartar("recusado pelo agregador")
+                        continue
+                    if confirmado != seq:
+                        raise ConnectionError(f"confirmação inesperada ({confirmado} != {seq})")
+                else:
+                    self._socket.send(quadro)
+            except OSError as e:
+                print(f"Aviso: falha ao enviar ao agregador ({e}); reconectando", file=sys.stderr)
+                self._socket.close()
+                self._socket = None
+                # Sem isso, um erro repetido vira um laço de reconexão e reenvio
+                self._proxima_tentativa = time.monotonic() + self._backoff
+                self._backoff = min(self._backoff * 2, 30.0)
+                return
+            self.pendentes.popleft()
+            self.enviados += 1
+            self._backoff = 0.5
+
+    def fechar(self):
+        self.flush()
+        if self.pendentes:
+            print(f"Aviso: {len(self.pendentes)} lotes não entregues ao agregador", file=sys.stderr)
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class _Host:
+    """Estado de um host no agregador: reordenação por seq e o CSV de destino."""
+
+    def __init__(self, nome, caminho, indice_passo):
+        self.nome = nome
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        self.indice_passo = indice_passo
+        self.sessao = None
+        self.campos = None
+        self.sink = None
+        self.proximo = 1
+        self.adiantados = []  # heap de (seq, instante de chegada, lote)
+        self.lotes = 0
+        self.amostras = 0
+        self.duplicados = 0
+        self.lacunas = 0
+
+    def receber(self, lote, espera_lacuna):
+        if lote["sessao"] != self.sessao:
+            # Agente reiniciado: grava o que sobrou da sessão anterior e recomeça
+            self.drenar(forcar=True)
+            self.sessao = lote["sessao"]
+            self.proximo = 1
+        if lote["campos"] != self.campos:
+            if self.sink is not None:
+                self.sink.fechar()
+            self.campos = lote["campos"]
+            self.sink = SinkCSV(self.caminho, self.campos, indice_passo=self.indice_passo)
+            gravar_esquema(self.caminho, self.campos)
+
+        seq = lote["seq"]
+        if seq < self.proximo or any(s == seq for s, _, _ in self.adiantados):
+            self.duplicados += 1
+            return
+        heapq.heappush(self.adiantados, (seq, time.monotonic(), lote))
+        self.drenar(espera_lacuna=espera_lacuna)
+
+    def drenar(self, espera_lacuna=0.0, forcar=False):
+        """Grava, em ordem, os lotes prontos; pula lacunas vencidas (ou todas, com forcar)."""
+        gravou = False
+        while self.adiantados:
+            seq, chegada, lote = self.adiantados[0]
+            if seq != self.proximo:
+                if not forcar and time.monotonic() - chegada < espera_lacuna:
+                    break
+                self.lacunas += seq - self.proximo
+            heapq.heappop(self.adiantados)
+            self.sink.escrever([dict(zip(self.campos, linha)) for linha in lote["amostras"]])
+            self.proximo = seq + 1
+            self.lotes += 1
+            self.amostras += len(lote["amostras"])
+            gravou = True
+        if gravou:
+            self.sink.flush()
+
+    def fechar(self):
+        self.drenar(forcar=True)
+        if self.sink is not None:
+            self.sink.fechar()
+
+
+def _nome_host(bruto):
+    """
+    Nome do host usado como pasta: só letras, dígitos, '_', '-' e pontos
+    internos (nunca '.' ou '..'); o resto vira '_'.
+    """
+    nome = re.sub(r"[^A-Za-z0-9_.-]", "_", str(bruto))[:100].strip(".")
+    if not nome:
+        raise ValueError(f"nome de host inválido: {bruto!r}")
+    return nome
+
+
+def _validar_lote(lote):
+    """Confere as chaves e os tipos de um lote; ValueError se algo faltar."""
+    if not isinstance(lote, dict):
+        raise ValueError("o lote não é um objeto")
+    if not isinstance(lote.get("sessao"), (str, int, float)) or isinstance(lote["sessao"], bool):
+        raise ValueError("sessao ausente ou inválida")
+    campos = lote.get("campos")
+    if not isinstance(campos, list) or not campos or not all(isinstance(c, str) for c in campos):
+        raise ValueError("campos ausentes ou inválidos")
+    amostras = lote.get("amostras")
+    if not isinstance(amostras, list) or not all(isinstance(a, list) and len(a) == len(campos) for a in amostras):
+        raise ValueError("amostras ausentes ou inválidas")
+    if isinstance(lote.get("seq"), bool) or not isinstance(lote.get("seq"), int) or lote["seq"] < 1:
+        raise ValueError("seq ausente ou inválido")
+
+
+class Agregador:
+    """
+    Recebe lotes de vários agentes e grava <diretorio>/<host>/historico.csv
+    (com esquema e índice esparso, então 'query' e 'detector_anomalia'
+    funcionam com --historico apontando para o arquivo de um host).
+
+    Args:
+        diretorio (str): raiz dos dados por host.
+        espera_lacuna (float): segundos que um lote adiantado espera pelos
+            anteriores antes de a lacuna ser dada como perdida.
+        indice_passo (int): passo do índice esparso de cada CSV.
+    """
+
+    def __init__(self, diretorio="/data/hosts", espera_lacuna=5.0, indice_passo=1000):
+        self.diretorio = diretorio
+        self.espera_lacuna = espera_lacuna
+        self.indice_passo = indice_passo
+        self.hosts = {}
+        self.invalidos = 0
+        self._lock = threading.Lock()
+
+    def receber(self, dados):
+        """Processa um lote serializado e devolve o seq dele (0 se inválido)."""
+        try:
+            lote = json.loads(dados)
+            _validar_lote(lote)
+            nome = _nome_host(lote.get("host"))
+            # Colunas fora do esquema conhecido: recusa antes de abrir o CSV do host
+            versao_dos_campos(lote["campos"], f"lote de {nome}")
+            caminho = os.path.join(self.diretorio, nome, "historico.csv")
+            # Defesa extra: o arquivo do host tem de ficar dentro do diretório
+            raiz = os.path.realpath(self.diretorio)
+            if os.path.commonpath([raiz, os.path.realpath(caminho)]) != raiz:
+                raise ValueError(f"host fora de {self.diretorio}: {nome}")
+        except (ValueError, TypeError):
+            self.invalidos += 1
+            return 0
+        # Um lock global basta: gravar um lote custa bem menos que recebê-lo
+        with self._lock:
+            host = self.hosts.get(nome)
+            if host is None:
+                host = self.hosts[nome] = _Host(nome, caminho, self.indice_passo)
+                print(f"Novo host: {nome}")
+            host.receber(lote, self.espera_lacuna)
+        return lote["seq"]
+
+    def verificar_lacunas(self):
+        with self._lock:
+            for host in self.hosts.values():
+                host.drenar(espera_lacuna=self.espera_lacuna)
+
+    def fechar(self):
+        with self._lock:
+            for host in self.hosts.values():
+                host.fechar()
+
+    def resumo(self):
+        linhas = []
+        for nome, h in sorted(self.hosts.items()):
+            linhas.append(
+                f"  {nome}: {h.amostras} amostras em {h.lotes} lotes | duplicados: "
+                f"{h.duplicados} | lotes perdidos: {h.lacunas} | esperando: {len(h.adiantados)}"
+            )
+        if self.invalidos:
+            linhas.append(f"  lotes inválidos: {self.invalidos}")
+        return "\n".join(linhas) or "  nenhum host"
+
+
+class _HandlerTCP(socketserver.BaseRequestHandler):
+    agregador = None
+
+    def handle(self):
+        conexao = self.request
+        conexao.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                (tamanho,) = _CABECALHO.unpack(_receber_exato(conexao, _CABECALHO.size))
+                if tamanho > TAMANHO_MAX_QUADRO:
+                    return
+                dados = _receber_exato(conexao, tamanho)
+            except (ConnectionError, OSError):
+                return
+            seq = self.agregador.receber(dados)
+            try:
+                conexao.sendall(_ACK.pack(seq))
+            except OSError:
+                return
+
+
+class _HandlerUDP(socketserver.BaseRequestHandler):
+    agregador = None
+
+    def handle(self):
+        self.agregador.receber(self.request[0])
+
+
+class _ServidorTCP(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def executar_agregador(
+    porta=PORTA_PADRAO,
+    host="127.0.0.1",
+    protocolo="tcp,udp",
+    diretorio="/data/hosts",
+    espera_lacuna=5.0,
+):
+    """
+    Sobe o agregador (TCP e/ou UDP na mesma porta) até Ctrl+C.
+
+    Args:
+        porta (int): porta de escuta.
+        host (str): interface de escuta (0.0.0.0 para receber de outras máquinas).
+        protocolo (str): "tcp", "udp" ou "tcp,udp".
+        diretorio (str): raiz dos dados por host.
+        espera_lacuna (float): ver Agregador.
+    """
+    agregador = Agregador(diretorio, espera_lacuna=espera_lacuna)
+    protocolos = [p.strip() for p in protocolo.split(",") if p.strip()]
+    servidores = []
+    if "tcp" in protocolos:
+        handler = type("HandlerTCP", (_HandlerTCP,), {"agregador": agregador})
+        servidores.append(_ServidorTCP((host, porta), handler))
+    if "udp" in protocolos:
+        handler = type("HandlerUDP", (_HandlerUDP,), {"agregador": agregador})
+        servidores.append(socketserver.UDPServer((host, porta), handler))
+    if not servidores:
+        raise ValueError(f"Protocolo desconhecido: '{protocolo}'. Opções: tcp, udp")
+
+    for servidor in servidores:
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    print(f"Agregador em {host}:{porta} ({', '.join(protocolos)}), gravando em {diretorio}/<host>/")
+
+    try:
+        while True:
+            time.sleep(1)
+            agregador.verificar_lacunas()
+    except KeyboardInterrupt:
+        print("\nAgregador encerrado pelo usuário.")
+    finally:
+        for servidor in servidores:
+            servidor.shutdown()
+            servidor.server_close()
+        agregador.fechar()
+        print(agregador.resumo())
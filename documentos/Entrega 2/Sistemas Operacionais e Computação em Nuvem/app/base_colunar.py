@@ -0,0 +1,371 @@
+# app/base_colunar.py
+"""
+Armazenamento colunar da base_unificada.csv, compartilhado pela regressão,
+t-SNE, PCA e pipeline.
+
+O CSV (';', cp1250) é convertido uma vez, em blocos, para uma pasta ao lado
+dele (base_unificada.csv -> base_unificada.colunas/):
+
+    manifesto.json          versão, origem (caminho, tamanho, mtime, sha256),
+                            linhas e, para cada coluna, arquivo, tipo e dtype
+    <coluna>.bin            valores da coluna, binário puro (little-endian),
+                            lido com np.memmap
+    <coluna>.categorias.json  só nas colunas de texto: os valores distintos
+                            em ordem; o .bin guarda o índice de cada linha
+                            (o mesmo código do LabelEncoder; -1 = vazio)
+
+Tipos das colunas:
+    numero      float64 (o que os modelos usam)
+    categoria   int32, código do valor em <coluna>.categorias.json
+    data        datetime64[ns] (COLUNAS_DATA, lidas com dia primeiro)
+    booleano    bool
+
+Invalidação: a conversão é refeita quando o tamanho do CSV muda. Se só o
+mtime muda (arquivo copiado ou tocado), o sha256 é recalculado e, se for o
+mesmo, a conversão é mantida (só o manifesto é atualizado).
+
+Concorrência: as ações do docker-compose sobem juntas sobre o mesmo /data.
+Uma trava (fcntl.flock em base_unificada.colunas.lock) é exclusiva durante a
+conferência + conversão e compartilhada enquanto um leitor lê o manifesto e
+mapeia as colunas; cada conversão usa uma pasta temporária própria. Quem
+esperou a trava relê o manifesto e não converte de novo.
+
+O tipo de cada coluna sai do primeiro bloco do CSV. Se um bloco seguinte
+não couber nele (ex.: texto numa coluna que começou numérica), a conversão
+recomeça com a coluna lida como texto (categoria), sem virar NaN.
+
+Cada leitor mapeia só as colunas de que precisa (sem parse nem cópia até o
+uso), e os workers do pipeline compartilham as mesmas páginas do cache de
+disco.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+
+VERSAO = 1
+BLOCO = 500_000
+COLUNAS_DATA = ("createdAt", "updatedAt")
+DTYPES = {
+    "numero": np.dtype("<f8"),
+    "categoria": np.dtype("<i4"),
+    "data": np.dtype("<M8[ns]"),
+    "booleano": np.dtype("?"),
+}
+
+
+def diretorio_colunar(csv_path):
+    """base_unificada.csv -> base_unificada.colunas"""
+    return os.path.splitext(csv_path)[0] + ".colunas"
+
+
+def _sha256(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _origem(csv_path):
+    estado = os.stat(csv_path)
+    return {
+        "caminho": os.path.abspath(csv_path),
+        "tamanho": estado.st_size,
+        "mtime_ns": estado.st_mtime_ns,
+        "sha256": _sha256(csv_path),
+    }
+
+
+def _ler_manifesto(diretorio):
+    try:
+        with open(os.path.join(diretorio, "manifesto.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_manifesto(diretorio, manifesto):
+    caminho = os.path.join(diretorio, "manifesto.json")
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=2, ensure_ascii=False)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def _tipo(nome, serie):
+    if nome in COLUNAS_DATA:
+        return "data"
+    if pd.api.types.is_bool_dtype(serie):
+        return "booleano"
+    if pd.api.types.is_numeric_dtype(serie):
+        return "numero"
+    return "categoria"
+
+
+def _cabe(tipo, serie):
+    """Se um bloco seguinte ainda cabe no tipo decidido pelo primeiro bloco."""
+    if tipo == "data":
+        return True
+    if tipo == "numero":
+        return pd.api.types.is_numeric_dtype(serie)
+    if tipo == "booleano":
+        # Com vazios o pandas lê a coluna booleana como object
+        return pd.api.types.is_bool_dtype(serie) or serie.dropna().isin([True, False]).all()
+    # Um bloco só de números numa coluna de texto mudaria a grafia ("7" -> "7.0");
+    # True/False continuam com a mesma grafia
+    return not pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie) or serie.isna().all()
+
+
+class _TipoMudou(Exception):
+    def __init__(self, nome):
+        super().__init__(nome)
+        self.nome = nome
+
+
+@contextmanager
+def _trava(diretorio, exclusiva):
+    """flock em <diretorio>.lock (sem trava se o arquivo não puder ser criado)."""
+    try:
+        arquivo = open(diretorio + ".lock", "a+") if fcntl is not None else None
+    except OSError:
+        arquivo = None
+    if arquivo is None:
+        yield
+        return
+    with arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX if exclusiva else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def _converter(csv_path, diretorio):
+    """Converte o CSV; se um bloco não couber no tipo de uma coluna, recomeça com ela como texto."""
+    texto = set()
+    while True:
+        # Pasta temporária própria: outro processo pode estar convertendo também
+        temporario = tempfile.mkdtemp(
+            dir=os.path.dirname(os.path.abspath(diretorio)), prefix=os.path.basename(diretorio) + ".tmp-"
+        )
+        os.chmod(temporario, 0o755)
+        try:
+            _converter_em(csv_path, temporario, texto)
+            break
+        except _TipoMudou as e:
+            print(f"Coluna '{e.nome}' muda de tipo depois do primeiro bloco; convertendo de novo como texto.")
+            texto.add(e.nome)
+            shutil.rmtree(temporario, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(temporario, ignore_errors=True)
+            raise
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.replace(temporario, diretorio)
+
+
+def _converter_em(csv_path, temporario, texto):
+    """Converte o CSV em blocos; os códigos das categorias são renumerados em ordem no fim."""
+    # sha256 antes da leitura: se o CSV mudar durante a conversão, o
+    # manifesto não bate com o arquivo e a próxima leitura converte de novo
+    origem = _origem(csv_path)
+
+    tipos, arquivos, vistos = {}, {}, {}
+    linhas = 0
+    leitor = pd.read_csv(
+        csv_path, sep=";", encoding="cp1250", chunksize=BLOCO, dtype={nome: str for nome in texto} or None
+    )
+    try:
+        for df in leitor:
+            if not tipos:
+                tipos = {nome: _tipo(nome, df[nome]) for nome in df.columns}
+                arquivos = {nome: open(os.path.join(temporario, f"{nome}.bin"), "wb") for nome in df.columns}
+                vistos = {nome: {} for nome, tipo in tipos.items() if tipo == "categoria"}
+            else:
+                for nome, tipo in tipos.items():
+                    if not _cabe(tipo, df[nome]):
+                        raise _TipoMudou(nome)
+            for nome, tipo in tipos.items():
+                serie = df[nome]
+                if tipo == "categoria":
+                    # Código provisório (ordem de aparição), renumerado no fim
+                    codigos, valores = pd.factorize(serie.astype("string"), use_na_sentinel=True)
+                    mapa = vistos[nome]
+                    provisorio = np.array([mapa.setdefault(v, len(mapa)) for v in valores] + [-1], dtype=np.int64)
+                    # -1 (vazio) indexa o último elemento, que vale -1
+                    valores = provisorio[codigos]
+                elif tipo == "data":
+                    valores = pd.to_datetime(serie, dayfirst=True, errors="coerce").to_numpy("datetime64[ns]")
+                elif tipo == "booleano":
+                    valores = serie.fillna(False).to_numpy(bool)
+                else:
+                    valores = pd.to_numeric(serie, errors="coerce").to_numpy(np.float64)
+                arquivos[nome].write(np.ascontiguousarray(valores, dtype=DTYPES[tipo]).tobytes())
+            linhas += len(df)
+    finally:
+        leitor.close()
+        for arquivo in arquivos.values():
+            arquivo.close()
+
+    colunas = {}
+    for nome, tipo in tipos.items():
+        colunas[nome] = {"arquivo": f"{nome}.bin", "tipo": tipo, "dtype": DTYPES[tipo].str}
+        if tipo != "categoria":
+            continue
+        # Mesma ordem do LabelEncoder (valores ordenados)
+        categorias = sorted(vistos[nome])
+        novo = np.empty(len(categorias) + 1, dtype=np.int32)
+        novo[-1] = -1
+        for codigo, valor in enumerate(categorias):
+            novo[vistos[nome][valor]] = codigo
+        if linhas:
+            codigos = np.memmap(os.path.join(temporario, f"{nome}.bin"), dtype=DTYPES[tipo], mode="r+", shape=(linhas,))
+            for inicio in range(0, linhas, BLOCO):
+                # -1 (vazio) indexa a última posição de `novo`, que vale -1
+                codigos[inicio:inicio + BLOCO] = novo[codigos[inicio:inicio + BLOCO]]
+            codigos.flush()
+            del codigos
+        colunas[nome]["categorias"] = f"{nome}.categorias.json"
+        with open(os.path.join(temporario, colunas[nome]["categorias"]), "w", encoding="utf-8") as f:
+            json.dump(categorias, f, ensure_ascii=False)
+
+    _gravar_manifesto(temporario, {"versao": VERSAO, "origem": origem, "linhas": linhas, "colunas": colunas})
+
+
+def _manifesto_atual(diretorio, csv_path):
+    """O manifesto, se a conversão tem o tamanho e o mtime do CSV; senão None."""
+    manifesto = _ler_manifesto(diretorio)
+    estado = os.stat(csv_path)
+    if manifesto is not None and manifesto.get("versao") == VERSAO:
+        origem = manifesto["origem"]
+        if origem["tamanho"] == estado.st_size and origem["mtime_ns"] == estado.st_mtime_ns:
+            return manifesto
+    return None
+
+
+def _atualizar(csv_path, diretorio):
+    """Confere de novo com a trava exclusiva e converte só se ainda for preciso."""
+    with _trava(diretorio, exclusiva=True):
+        # Outro processo pode ter convertido enquanto esperávamos a trava
+        manifesto = _ler_manifesto(diretorio)
+        estado = os.stat(csv_path)
+        if manifesto is not None and manifesto.get("versao") == VERSAO:
+            origem = manifesto["origem"]
+            if origem["tamanho"] == estado.st_size:
+                if origem["mtime_ns"] == estado.st_mtime_ns:
+                    return
+                # Mesmo tamanho, mtime diferente: o conteúdo decide
+                if _sha256(csv_path) == origem["sha256"]:
+                    origem["mtime_ns"] = estado.st_mtime_ns
+                    _gravar_manifesto(diretorio, manifesto)
+                    return
+
+        print(f"Convertendo {csv_path} para o formato colunar em {diretorio}...")
+        _converter(csv_path, diretorio)
+
+
+@contextmanager
+def _base_pronta(csv_path):
+    """
+    Manifesto atualizado, com a trava compartilhada mantida até o fim do
+    bloco (ninguém troca a pasta enquanto as colunas são mapeadas).
+    """
+    diretorio = diretorio_colunar(csv_path)
+    with _trava(diretorio, exclusiva=False):
+        manifesto = _manifesto_atual(diretorio, csv_path)
+        if manifesto is not None:
+            yield manifesto
+            return
+    _atualizar(csv_path, diretorio)
+    with _trava(diretorio, exclusiva=False):
+        # Sem nova conferência: um CSV que não para de crescer não prende o leitor
+        yield _ler_manifesto(diretorio)
+
+
+def preparar_base(csv_path="/data/base_unificada.csv"):
+    """
+    Garante que a conversão colunar do CSV existe e está atualizada.
+
+    Returns:
+        dict: o manifesto (ver o docstring do módulo).
+    """
+    with _base_pronta(csv_path) as manifesto:
+        return manifesto
+
+
+def ler_colunas(csv_path, colunas, colunar=True):
+    """
+    Lê só as colunas pedidas da base, com as categorias já codificadas.
+
+    Args:
+        csv_path (str): base_unificada.csv.
+        colunas (list): colunas desejadas.
+        colunar (bool): mapeia a conversão colunar (criada/atualizada se
+            preciso); False lê o CSV direto (só as colunas pedidas) e
+            codifica as categorias na hora.
+
+    Returns:
+        dict: coluna -> array NumPy (np.memmap somente leitura no modo colunar).
+    """
+    if not colunar:
+        df = pd.read_csv(csv_path, sep=";", encoding="cp1250", usecols=list(colunas))
+        resultado = {}
+        for nome in colunas:
+            if _tipo(nome, df[nome]) == "categoria":
+                _, codigos = np.unique(df[nome].astype(str).to_numpy(), return_inverse=True)
+                resultado[nome] = codigos.astype(np.int32)
+            else:
+                resultado[nome] = df[nome].to_numpy()
+        return resultado
+
+    diretorio = diretorio_colunar(csv_path)
+    resultado = {}
+    with _base_pronta(csv_path) as manifesto:
+        ausentes = [nome for nome in colunas if nome not in manifesto["colunas"]]
+        if ausentes:
+            raise KeyError(f"Colunas ausentes em {csv_path}: {', '.join(ausentes)}")
+        for nome in colunas:
+            info = manifesto["colunas"][nome]
+            caminho = os.path.join(diretorio, info["arquivo"])
+            if manifesto["linhas"] == 0:
+                # np.memmap não mapeia arquivos vazios
+                resultado[nome] = np.empty(0, dtype=info["dtype"])
+            else:
+                # Mapeado continua válido mesmo se a pasta for trocada depois
+                resultado[nome] = np.memmap(caminho, dtype=info["dtype"], mode="r", shape=(manifesto["linhas"],))
+    return resultado
+
+
+def colunas_da_base(csv_path, colunar=True):
+    """Nomes das colunas da base (do manifesto ou do cabeçalho do CSV)."""
+    if colunar:
+        return list(preparar_base(csv_path)["colunas"])
+    return list(pd.read_csv(csv_path, sep=";", encoding="cp1250", nrows=0).columns)
+
+
+def ler_categorias(csv_path, coluna, colunar=True):
+    """Valores de uma coluna de texto, na ordem dos códigos (de ler_colunas com o mesmo `colunar`)."""
+    if not colunar:
+        # Mesma codificação do ler_colunas(colunar=False): valores únicos ordenados
+        serie = pd.read_csv(csv_path, sep=";", encoding="cp1250", usecols=[coluna])[coluna]
+        return np.unique(serie.astype(str).to_numpy()).tolist()
+    diretorio = diretorio_colunar(csv_path)
+    with _base_pronta(csv_path) as manifesto:
+        info = manifesto["colunas"][coluna]
+        with open(os.path.join(diretorio, info["categorias"]), encoding="utf-8") as f:
+            return json.load(f)
+
+
+def matriz(colunas, nomes):
+    """Empilha as colunas pedidas em uma matriz float64 (linhas x colunas)."""
+    return np.column_stack([np.asarray(colunas[nome], dtype=np.float64) for nome in nomes])
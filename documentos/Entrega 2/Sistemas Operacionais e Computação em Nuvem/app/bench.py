@@ -0,0 +1,230 @@
+# app/bench.py
+"""
+Benchmark das ações sobre dados sintéticos (gerador_dados.py) em tamanhos
+crescentes, ex.: 10k, 1M e 10M linhas.
+
+Cada medição roda em um interpretador novo (como a ação 'startup'), para que
+o pico de RSS de uma ação não contamine o da seguinte. O processo filho
+informa o tempo da própria ação e o pico de RSS; o pai mede o tempo de
+parede total (interpretador + imports + ação) e aplica o timeout.
+
+Os dados gerados ficam em cache em `diretorio` (base_<linhas>_<seed>.csv e
+historico_<linhas>_<seed>.csv) e são reaproveitados entre execuções; a
+geração também entra nos resultados ("gerar_base", "gerar_historico").
+A conversão da base para o formato colunar (base_colunar.py) é medida à
+parte ("preparar_base", uma vez por tamanho, antes das ações), para não
+pesar só na primeira ação que lê a base.
+
+Resultados: uma linha por (ação, tamanho) acrescentada a
+`<diretorio>/resultados.csv` e uma tabela no fim.
+"""
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from esquema import caminho_esquema
+from gerador_dados import interpretar_quantidade
+
+
+# ação -> (dados de entrada, módulo, função, argumentos(entrada, pasta de saída))
+ACOES_BENCH = {
+    "regressao_linear": ("base", "regressao_linear", "treinar_modelo", lambda entrada, pasta: {
+        "input_path": entrada, "modelo_path": os.path.join(pasta, "modelo_regressao.pkl"),
+    }),
+    "tsne": ("base", "tsne", "gerar_visualizacao", lambda entrada, pasta: {
+        "input_path": entrada, "output_path": os.path.join(pasta, "tsne_visualizacao.png"),
+    }),
+    "pca": ("base", "pca", "gerar_visualizacao_pca", lambda entrada, pasta: {
+        "input_path": entrada, "output_path": os.path.join(pasta, "pca_visualizacao.png"),
+    }),
+    # Sem t-SNE: ele já é medido sozinho e limitaria o pipeline ao seu tamanho máximo
+    "pipeline": ("base", "pipeline", "executar_pipeline", lambda entrada, pasta: {
+        "etapas": ["regressao_linear", "pca"], "input_path": entrada,
+        "modelo_path": os.path.join(pasta, "modelo_regressao.pkl"),
+        "pca_path": os.path.join(pasta, "pca_visualizacao.png"),
+    }),
+    "detector_anomalia": ("historico", "detector_anomalia", "analisar_anomalias", lambda entrada, pasta: {
+        "input_path": entrada,
+        "output_graph_cpu": os.path.join(pasta, "grafico_cpu_anomalias.png"),
+        "output_graph_mem": os.path.join(pasta, "grafico_memoria_anomalias.png"),
+    }),
+    "query": ("historico", "consulta", "consultar", lambda entrada, pasta: {
+        "csv_path": entrada, "passo": 3600,
+    }),
+}
+# Ações que não escalam até os tamanhos maiores: acima do limite são puladas
+# (o t-SNE leva ~15 min com 50k pontos em 1 CPU e cresce mais que linear)
+LIMITES = {"tsne": 50_000}
+CAMPOS_RESULTADO = [
+    "data", "acao", "linhas", "status", "wall_s", "acao_s", "rss_pico_mb",
+    "linhas_por_s", "seed", "cpus", "python",
+]
+
+# Roda no processo filho: importa a ação, executa com o stdout descartado e
+# imprime o tempo e o pico de RSS (do processo e de workers com fork)
+_SCRIPT_ACAO = """
+import contextlib, importlib, json, os, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+funcao = getattr(importlib.import_module(sys.argv[2]), sys.argv[3])
+argumentos = json.loads(sys.argv[4])
+t0 = time.perf_counter()
+with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+    funcao(**argumentos)
+segundos = time.perf_counter() - t0
+rss = max(
+    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+) / 1024
+print(json.dumps({"segundos": segundos, "rss_mb": rss}))
+"""
+
+
+def _medir(modulo, funcao, argumentos, timeout):
+    """Executa modulo.funcao(**argumentos) em um interpretador novo."""
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    t0 = time.perf_counter()
+    try:
+        resultado = subprocess.run(
+            [sys.executable, "-c", _SCRIPT_ACAO, pasta, modulo, funcao, json.dumps(argumentos)],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return {"status": "timeout", "wall_s": round(time.perf_counter() - t0, 2)}
+    wall = time.perf_counter() - t0
+    if resultado.returncode != 0:
+        erro = (resultado.stderr.strip().splitlines() or ["?"])[-1]
+        return {"status": f"erro: {erro[:120]}", "wall_s": round(wall, 2)}
+    medicao = json.loads(resultado.stdout.strip().splitlines()[-1])
+    return {
+        "status": "ok",
+        "wall_s": round(wall, 2),
+        "acao_s": round(medicao["segundos"], 2),
+        "rss_pico_mb": round(medicao["rss_mb"], 1),
+    }
+
+
+def _dados(tipo, linhas, diretorio, seed, timeout, registrar, preparadas):
+    """
+    Caminho do arquivo sintético; gera (e registra a geração) se não estiver
+    em cache. A base também passa pela conversão colunar, medida uma vez por
+    arquivo (`preparadas`).
+    """
+    caminho = os.path.join(diretorio, f"{tipo}_{linhas}_{seed}.csv")
+    if not os.path.exists(caminho):
+        caminho = _gerar(tipo, linhas, diretorio, seed, timeout, registrar)
+    if caminho is not None and tipo == "base" and caminho not in preparadas:
+        preparadas.add(caminho)
+        registrar("preparar_base", linhas, _medir("base_colunar", "preparar_base", {"csv_path": caminho}, timeout))
+    return caminho
+
+
+def _gerar(tipo, linhas, diretorio, seed, timeout, registrar):
+    """Gera o arquivo sintético (e registra a geração); None se falhar."""
+    caminho = os.path.join(diretorio, f"{tipo}_{linhas}_{seed}.csv")
+    # Gera com outro nome: uma geração interrompida não vira cache
+    temporario = os.path.join(diretorio, f"{tipo}_{linhas}_{seed}.tmp.csv")
+    funcao = "gerar_base" if tipo == "base" else "gerar_historico"
+    medicao = _medir("gerador_dados", funcao, {"n": linhas, "caminho": temporario, "seed": seed}, timeout)
+    registrar(funcao, linhas, medicao)
+    if medicao["status"] != "ok":
+        return None
+    if tipo == "historico":
+        os.replace(caminho_esquema(temporario), caminho_esquema(caminho))
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def executar_bench(
+    tamanhos="10k,1m,10m",
+    acoes=None,
+    diretorio="/data/bench",
+    seed=42,
+    timeout=3600,
+):
+    """
+    Mede cada ação em cada tamanho e grava os resultados.
+
+    Args:
+        tamanhos (str | list): linhas por execução, ex.: "10k,1m,10m".
+        acoes (list): ações medidas (padrão: todas as de ACOES_BENCH).
+        diretorio (str): dados sintéticos, saídas das ações e resultados.csv.
+        seed (int): semente do gerador.
+        timeout (float): segundos máximos por medição.
+
+    Returns:
+        list: um dict por medição.
+    """
+    if isinstance(tamanhos, str):
+        tamanhos = tamanhos.split(",")
+    tamanhos = sorted(interpretar_quantidade(t) for t in tamanhos)
+    acoes = acoes or list(ACOES_BENCH)
+    for acao in acoes:
+        if acao not in ACOES_BENCH:
+            raise ValueError(f"Ação '{acao}' sem benchmark. Opções: {', '.join(ACOES_BENCH)}")
+    os.makedirs(diretorio, exist_ok=True)
+    saidas = os.path.join(diretorio, "saidas")
+    os.makedirs(saidas, exist_ok=True)
+
+    resultados = []
+    preparadas = set()
+    comum = {
+        "seed": seed,
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+    def registrar(acao, linhas, medicao):
+        linhas_por_s = None
+        if medicao.get("acao_s"):
+            linhas_por_s = round(linhas / medicao["acao_s"])
+        resultado = {
+            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "acao": acao,
+            "linhas": linhas,
+            "linhas_por_s": linhas_por_s,
+            **medicao,
+            **comum,
+        }
+        resultados.append(resultado)
+        print(
+            f"  {acao:<18} {linhas:>10} linhas: {resultado['status']:<8} "
+            f"{resultado.get('acao_s', '-')}s | RSS {resultado.get('rss_pico_mb', '-')} MB"
+        )
+
+    for linhas in tamanhos:
+        print(f"\n== {linhas} linhas ==")
+        for acao in acoes:
+            tipo, modulo, funcao, argumentos = ACOES_BENCH[acao]
+            if linhas > LIMITES.get(acao, linhas):
+                registrar(acao, linhas, {"status": "pulado"})
+                continue
+            entrada = _dados(tipo, linhas, diretorio, seed, timeout, registrar, preparadas)
+            if entrada is None:
+                registrar(acao, linhas, {"status": "sem dados"})
+                continue
+            registrar(acao, linhas, _medir(modulo, funcao, argumentos(entrada, saidas), timeout))
+
+    caminho = os.path.join(diretorio, "resultados.csv")
+    novo = not os.path.exists(caminho)
+    with open(caminho, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CAMPOS_RESULTADO)
+        if novo:
+            writer.writeheader()
+        for resultado in resultados:
+            writer.writerow({campo: resultado.get(campo) for campo in CAMPOS_RESULTADO})
+
+    print(f"\n{'ação':<18} {'linhas':>10} {'status':<8} {'parede (s)':>10} {'ação (s)':>9} {'RSS (MB)':>9} {'linhas/s':>11}")
+    for r in resultados:
+        print(
+            f"{r['acao']:<18} {r['linhas']:>10} {r['status'][:8]:<8} {r.get('wall_s') or '-':>10} "
+            f"{r.get('acao_s') or '-':>9} {r.get('rss_pico_mb') or '-':>9} {r['linhas_por_s'] or '-':>11}"
+        )
+    print(f"Resultados acrescentados a {caminho}")
+    return resultados
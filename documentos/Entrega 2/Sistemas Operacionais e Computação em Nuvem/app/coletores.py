@@ -0,0 +1,415 @@
+# app/coletores.py
+import heapq
+import os
+import time
+
+import psutil
+
+
+class ColetorPsutil:
+    """Lê CPU e memória do host via psutil (modo padrão)."""
+
+    def __init__(self):
+        # A primeira chamada de cpu_percent(None) sempre retorna 0.0; descarta
+        psutil.cpu_percent(interval=None)
+
+    def campos_extras(self):
+        return []
+
+    def ler(self):
+        return {
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "mem_percent": psutil.virtual_memory().percent,
+        }
+
+    def fechar(self):
+        pass
+
+
+class ColetorProcfs:
+    """
+    Lê /proc/stat e /proc/meminfo diretamente, mantendo os arquivos abertos
+    entre as leituras. Evita o custo de abrir arquivos e criar objetos do
+    psutil a cada tick, o que permite intervalos de 10-50 ms.
+
+    Args:
+        proc (str): raiz do procfs (útil para apontar para o /proc do host).
+    """
+
+    def __init__(self, proc="/proc"):
+        self._stat = open(f"{proc}/stat", "rb", buffering=0)
+        self._meminfo = open(f"{proc}/meminfo", "rb", buffering=0)
+        self._ultimo_ocupado, self._ultimo_total = self._ler_cpu()
+
+    def campos_extras(self):
+        return []
+
+    def _ler_cpu(self):
+        self._stat.seek(0)
+        linha = self._stat.read(512).split(b"\n", 1)[0]
+        # cpu user nice system idle iowait irq softirq steal guest guest_nice
+        valores = [int(v) for v in linha.split()[1:9]]
+        total = sum(valores)
+        ocioso = valores[3] + valores[4]
+        return total - ocioso, total
+
+    def _ler_memoria(self):
+        self._meminfo.seek(0)
+        total = disponivel = None
+        for linha in self._meminfo.read(4096).split(b"\n"):
+            if linha.startswith(b"MemTotal:"):
+                total = int(linha.split()[1])
+            elif linha.startswith(b"MemAvailable:"):
+                disponivel = int(linha.split()[1])
+                break
+        if not total or disponivel is None:
+            return 0.0
+        # Mesma fórmula do psutil.virtual_memory().percent
+        return round((total - disponivel) / total * 100, 1)
+
+    def ler(self):
+        ocupado, total = self._ler_cpu()
+        delta_total = total - self._ultimo_total
+        delta_ocupado = ocupado - self._ultimo_ocupado
+        self._ultimo_ocupado, self._ultimo_total = ocupado, total
+        # Com intervalos menores que um jiffy o contador pode não ter avançado
+        cpu_percent = round(delta_ocupado / delta_total * 100, 1) if delta_total > 0 else 0.0
+        return {
+            "cpu_percent": cpu_percent,
+            "mem_percent": self._ler_memoria(),
+        }
+
+    def fechar(self):
+        self._stat.close()
+        self._meminfo.close()
+
+
+class ColetorCgroup:
+    """
+    Lê as métricas do cgroup v2 do próprio container, em vez das do host.
+
+    - cpu_percent: uso de CPU relativo à cota (cpu.max); sem cota, relativo
+      ao número de CPUs disponíveis.
+    - mem_percent: memory.current relativo a memory.max; sem limite,
+      relativo à memória total do host.
+    - throttling (cpu.stat), bytes de I/O (io.stat) e tempo de stall do PSI
+      (cpu/memory/io.pressure do cgroup, ou /proc/pressure como fallback),
+      convertidos em taxas entre ticks.
+
+    Os arquivos ficam abertos entre as leituras, como no ColetorProcfs.
+
+    Args:
+        raiz (str): diretório do cgroup (no container, /sys/fs/cgroup).
+    """
+
+    RECURSOS_PSI = ["cpu", "memory", "io"]
+
+    def __init__(self, raiz="/sys/fs/cgroup"):
+        if not os.path.isfile(os.path.join(raiz, "cgroup.controllers")):
+            raise RuntimeError(f"cgroup v2 não encontrado em {raiz}")
+        self.raiz = raiz
+        self._cpu_stat = self._abrir("cpu.stat")
+        self._mem_atual = self._abrir("memory.current")
+        self._io_stat = self._abrir("io.stat")
+        self._psi = {}
+        for recurso in self.RECURSOS_PSI:
+            arquivo = self._abrir(f"{recurso}.pressure")
+            if arquivo is None:
+                arquivo = self._abrir_caminho(f"/proc/pressure/{recurso}")
+            self._psi[recurso] = arquivo
+
+        # Limites mudam raramente; são lidos uma vez
+        self.cpu_limite = self._ler_cota_cpu()
+        self.mem_limite = self._ler_limite_memoria()
+        self._anterior = None
+
+    def campos_extras(self):
+        campos = [
+            "cpu_limite_cores", "mem_limite_mb",
+            "cpu_throttled_percent", "cpu_throttled_ms",
+            "io_leitura_bps", "io_escrita_bps",
+        ]
+        for recurso in self.RECURSOS_PSI:
+            campos += [f"psi_{recurso}_some_percent", f"psi_{recurso}_full_percent"]
+        return campos
+
+    def _abrir(self, nome):
+        return self._abrir_caminho(os.path.join(self.raiz, nome))
+
+    @staticmethod
+    def _abrir_caminho(caminho):
+        try:
+            return open(caminho, "rb", buffering=0)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _ler(arquivo):
+        arquivo.seek(0)
+        return arquivo.read(65536)
+
+    def _ler_cota_cpu(self):
+        try:
+            with open(os.path.join(self.raiz, "cpu.max")) as f:
+                cota, periodo = f.read().split()
+            if cota != "max":
+                return int(cota) / int(periodo)
+        except (OSError, ValueError):
+            pass
+        return len(os.sched_getaffinity(0))
+
+    def _ler_limite_memoria(self):
+        try:
+            with open(os.path.join(self.raiz, "memory.max")) as f:
+                valor = f.read().strip()
+            if valor != "max":
+                return int(valor)
+        except (OSError, ValueError):
+            pass
+        return psutil.virtual_memory().total
+
+    def _contadores(self):
+        contadores = {}
+        if self._cpu_stat is not None:
+            for linha in self._ler(self._cpu_stat).splitlines():
+                chave, valor = linha.split()
+                contadores[chave.decode()] = int(valor)
+        if self._io_stat is not None:
+            rbytes = wbytes = 0
+            # "8:0 rbytes=... wbytes=... rios=... wios=..." por dispositivo
+            for linha in self._ler(self._io_stat).splitlines():
+                for campo in linha.split()[1:]:
+                    chave, _, valor = campo.partition(b"=")
+                    if chave == b"rbytes":
+                        rbytes += int(valor)
+                    elif chave == b"wbytes":
+                        wbytes += int(valor)
+            contadores["io_rbytes"] = rbytes
+            contadores["io_wbytes"] = wbytes
+        for recurso, arquivo in self._psi.items():
+            if arquivo is None:
+                continue
+            # "some avg10=0.00 avg60=0.00 avg300=0.00 total=123" (total em µs)
+            for linha in self._ler(arquivo).splitlines():
+                partes = linha.split()
+                contadores[f"psi_{recurso}_{partes[0].decode()}"] = int(partes[-1].split(b"=")[1])
+        return time.monotonic(), contadores
+
+    def ler(self):
+        mem_atual = int(self._ler(self._mem_atual)) if self._mem_atual is not None else 0
+        leitura = {
+            "mem_percent": round(mem_atual / self.mem_limite * 100, 1),
+            "cpu_limite_cores": round(self.cpu_limite, 2),
+            "mem_limite_mb": round(self.mem_limite / (1024 * 1024), 1),
+        }
+
+        instante, atual = self._contadores()
+        anterior = self._anterior
+        self._anterior = (instante, atual)
+        if anterior is None:
+            leitura["cpu_percent"] = 0.0
+            for campo in self.campos_extras()[2:]:
+                leitura[campo] = 0.0
+            return leitura
+
+        dt = instante - anterior[0]
+        delta = {chave: valor - anterior[1].get(chave, valor) for chave, valor in atual.items()}
+        dt_us = dt * 1_000_000
+
+        leitura["cpu_percent"] = round(delta.get("usage_usec", 0) / (dt_us * self.cpu_limite) * 100, 1)
+        periodos = delta.get("nr_periods", 0)
+        leitura["cpu_throttled_percent"] = (
+            round(delta.get("nr_throttled", 0) / periodos * 100, 1) if periodos else 0.0
+        )
+        leitura["cpu_throttled_ms"] = round(delta.get("throttled_usec", 0) / 1000, 1)
+        leitura["io_leitura_bps"] = round(delta.get("io_rbytes", 0) / dt, 1)
+        leitura["io_escrita_bps"] = round(delta.get("io_wbytes", 0) / dt, 1)
+        for recurso in self.RECURSOS_PSI:
+            for tipo in ("some", "full"):
+                chave = f"psi_{recurso}_{tipo}"
+                # Fração do intervalo em que tarefas ficaram paradas esperando o recurso
+                leitura[f"{chave}_percent"] = (
+                    round(delta[chave] / dt_us * 100, 2) if chave in delta else None
+                )
+        return leitura
+
+    def fechar(self):
+        arquivos = [self._cpu_stat, self._mem_atual, self._io_stat, *self._psi.values()]
+        for arquivo in arquivos:
+            if arquivo is not None:
+                arquivo.close()
+
+
+class ColetorContadores:
+    """
+    Métricas complementares: CPU por núcleo, load average, swap, disco e rede.
+
+    Contadores cumulativos (bytes e operações de disco, bytes de rede) são
+    convertidos em taxas por segundo usando a leitura anterior e o relógio
+    monotônico. No primeiro tick as taxas são 0.
+
+    As interfaces de rede são fixadas na criação, para que as colunas não
+    mudem durante a coleta (a interface "lo" é ignorada).
+    """
+
+    def __init__(self):
+        self.num_cpus = psutil.cpu_count() or 1
+        self.interfaces = sorted(
+            nome for nome in psutil.net_io_counters(pernic=True) if nome != "lo"
+        )
+        psutil.cpu_percent(interval=None, percpu=True)
+        self._anterior = None
+
+    def campos(self):
+        campos = [f"cpu{i}_percent" for i in range(self.num_cpus)]
+        campos += ["load_1", "load_5", "load_15", "swap_percent"]
+        campos += [
+            "disco_leitura_bps", "disco_escrita_bps",
+            "disco_leitura_iops", "disco_escrita_iops",
+        ]
+        for nome in self.interfaces:
+            campos += [f"rede_{nome}_rx_bps", f"rede_{nome}_tx_bps"]
+        return campos
+
+    def _contadores(self):
+        valores = {}
+        disco = psutil.disk_io_counters()
+        if disco is not None:
+            valores["disco_leitura_bps"] = disco.read_bytes
+            valores["disco_escrita_bps"] = disco.write_bytes
+            valores["disco_leitura_iops"] = disco.read_count
+            valores["disco_escrita_iops"] = disco.write_count
+        rede = psutil.net_io_counters(pernic=True)
+        for nome in self.interfaces:
+            if nome in rede:
+                valores[f"rede_{nome}_rx_bps"] = rede[nome].bytes_recv
+                valores[f"rede_{nome}_tx_bps"] = rede[nome].bytes_sent
+        return time.monotonic(), valores
+
+    def ler(self):
+        leitura = {}
+        por_cpu = psutil.cpu_percent(interval=None, percpu=True)
+        for i in range(self.num_cpus):
+            leitura[f"cpu{i}_percent"] = por_cpu[i] if i < len(por_cpu) else None
+
+        leitura["load_1"], leitura["load_5"], leitura["load_15"] = (
+            round(v, 2) for v in psutil.getloadavg()
+        )
+        leitura["swap_percent"] = psutil.swap_memory().percent
+
+        instante, contadores = self._contadores()
+        if self._anterior is None:
+            taxas = {chave: 0.0 for chave in contadores}
+        else:
+            instante_ant, anteriores = self._anterior
+            dt = instante - instante_ant
+            taxas = {}
+            for chave, valor in contadores.items():
+                if chave in anteriores and dt > 0:
+                    # Contador zerado (ex.: interface recriada) vira taxa 0
+                    taxas[chave] = round(max(0, valor - anteriores[chave]) / dt, 1)
+                else:
+                    taxas[chave] = 0.0
+        self._anterior = (instante, contadores)
+        leitura.update(taxas)
+        return leitura
+
+    def fechar(self):
+        pass
+
+
+class RastreadorProcessos:
+    """
+    Amostra CPU e RSS por processo e mantém apenas os N maiores de cada tick.
+
+    Os objetos psutil.Process ficam em cache entre os ticks (o cpu_percent de
+    um processo depende da leitura anterior do mesmo objeto) e cada processo é
+    lido dentro de oneshot(), que agrupa as leituras de /proc/<pid>.
+
+    Args:
+        top_n (int): quantidade de processos mantidos por CPU e por RSS.
+    """
+
+    def __init__(self, top_n=5):
+        self.top_n = top_n
+        self._cache = {}
+        # Estatísticas do custo do próprio rastreador
+        self.ticks = 0
+        self.custo_total_ms = 0.0
+        self.custo_max_ms = 0.0
+        self.cpu_total_ms = 0.0
+        self.ultimo_custo_ms = 0.0
+
+    def ler(self):
+        inicio = time.perf_counter()
+        cpu_inicio = time.process_time()
+
+        pids = set(psutil.pids())
+        for pid in list(self._cache):
+            if pid not in pids:
+                del self._cache[pid]
+
+        registros = []
+        for pid in pids:
+            proc = self._cache.get(pid)
+            try:
+                if proc is None:
+                    proc = psutil.Process(pid)
+                    self._cache[pid] = proc
+                with proc.oneshot():
+                    registros.append((
+                        pid,
+                        proc.name(),
+                        proc.cpu_percent(interval=None),
+                        proc.memory_info().rss,
+                    ))
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                self._cache.pop(pid, None)
+            except psutil.AccessDenied:
+                pass
+
+        por_cpu = heapq.nlargest(self.top_n, registros, key=lambda r: r[2])
+        por_rss = heapq.nlargest(self.top_n, registros, key=lambda r: r[3])
+        top = {r[0]: r for r in por_cpu + por_rss}
+
+        custo_ms = (time.perf_counter() - inicio) * 1000
+        self.ticks += 1
+        self.ultimo_custo_ms = custo_ms
+        self.custo_total_ms += custo_ms
+        self.custo_max_ms = max(self.custo_max_ms, custo_ms)
+        self.cpu_total_ms += (time.process_time() - cpu_inicio) * 1000
+
+        return [
+            {
+                "pid": pid,
+                "nome": nome,
+                "cpu_percent": cpu,
+                "rss_mb": round(rss / (1024 * 1024), 1),
+            }
+            for pid, nome, cpu, rss in top.values()
+        ]
+
+    def estatisticas(self):
+        media = self.custo_total_ms / self.ticks if self.ticks else 0.0
+        return {
+            "ticks": self.ticks,
+            "processos_em_cache": len(self._cache),
+            "custo_medio_ms": round(media, 2),
+            "custo_max_ms": round(self.custo_max_ms, 2),
+            "cpu_total_ms": round(self.cpu_total_ms, 1),
+        }
+
+
+COLETORES_DISPONIVEIS = ["psutil", "procfs", "cgroup"]
+
+
+def criar_coletor(nome):
+    if nome == "psutil":
+        return ColetorPsutil()
+    if nome == "procfs":
+        return ColetorProcfs()
+    if nome == "cgroup":
+        return ColetorCgroup()
+    raise ValueError(
+        f"Coletor desconhecido: '{nome}'. Opções: {', '.join(COLETORES_DISPONIVEIS)}"
+    )
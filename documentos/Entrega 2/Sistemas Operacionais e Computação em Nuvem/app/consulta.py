@@ -0,0 +1,273 @@
+# app/consulta.py
+import bisect
+import csv
+import json
+import os
+import sys
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+
+def caminho_indice(csv_path):
+    return os.path.splitext(csv_path)[0] + ".idx"
+
+
+class IndiceEsparso:
+    """
+    Índice esparso timestamp -> offset em bytes de uma linha do CSV.
+
+    O monitor acrescenta uma entrada a cada `passo` linhas gravadas, então o
+    índice é ~1000x menor que o CSV. Para achar o início de um período basta
+    uma busca binária no índice e um seek no CSV; daí em diante a leitura é
+    sequencial.
+
+    Formato do arquivo .idx: uma linha "timestamp,offset" por entrada.
+
+    Args:
+        csv_path (str): CSV indexado.
+        passo (int): linhas do CSV entre duas entradas do índice.
+    """
+
+    def __init__(self, csv_path, passo=1000):
+        self.csv_path = csv_path
+        self.caminho = caminho_indice(csv_path)
+        self.passo = passo
+        self.timestamps = []
+        self.offsets = []
+        self._arquivo = None
+
+    def carregar(self):
+        self.timestamps, self.offsets = [], []
+        if os.path.isfile(self.caminho):
+            with open(self.caminho, encoding="utf-8") as f:
+                for linha in f:
+                    timestamp, _, offset = linha.rstrip("\n").rpartition(",")
+                    if timestamp:
+                        self.timestamps.append(timestamp)
+                        self.offsets.append(int(offset))
+        return self
+
+    def registrar(self, timestamp, offset):
+        """Acrescenta uma entrada (usado pelo SinkCSV durante a gravação)."""
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._arquivo.write(f"{timestamp},{offset}\n")
+        self.timestamps.append(timestamp)
+        self.offsets.append(offset)
+
+    def flush(self):
+        if self._arquivo is not None:
+            self._arquivo.flush()
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+    def reconstruir(self, gravar=True):
+        """
+        Refaz o índice varrendo o CSV (após retenção, rotação ou índice ausente).
+
+        Args:
+            gravar (bool): substitui o .idx. Só quem grava o CSV (SinkCSV)
+                deve usar True: o escritor mantém o .idx aberto para
+                acréscimo, e trocar o arquivo por baixo dele faria as
+                entradas seguintes irem para o arquivo antigo (já apagado).
+                Leitores usam False e ficam com o índice só na memória.
+        """
+        self.fechar()
+        self.timestamps, self.offsets = [], []
+        temporario = self.caminho + ".tmp"
+        with open(self.csv_path, "rb") as f, (
+            open(temporario, "w", encoding="utf-8") if gravar else nullcontext()
+        ) as saida:
+            f.readline()
+            contador = 0
+            while True:
+                offset = f.tell()
+                linha = f.readline()
+                if not linha:
+                    break
+                if contador % self.passo == 0:
+                    timestamp = linha.split(b",", 1)[0].decode("utf-8")
+                    if saida is not None:
+                        saida.write(f"{timestamp},{offset}\n")
+                    self.timestamps.append(timestamp)
+                    self.offsets.append(offset)
+                contador += 1
+        if gravar:
+            os.replace(temporario, self.caminho)
+        return self
+
+    def valido(self):
+        """Confere, por amostragem, se os offsets ainda apontam para as linhas certas."""
+        if not self.offsets:
+            return os.path.getsize(self.csv_path) < 1 << 20
+        with open(self.csv_path, "rb") as f:
+            for i in {0, len(self.offsets) // 2, len(self.offsets) - 1}:
+                f.seek(self.offsets[i])
+                if not f.readline().startswith(self.timestamps[i].encode("utf-8") + b","):
+                    return False
+        return True
+
+    def buscar(self, inicio):
+        """Offset de uma linha com timestamp <= inicio (ou do começo dos dados)."""
+        i = bisect.bisect_left(self.timestamps, inicio) - 1
+        return self.offsets[i] if i >= 0 else None
+
+
+AGREGACOES = ["mean", "min", "max", "sum", "count", "first", "last"]
+
+
+class _Bucket:
+    __slots__ = ("soma", "minimo", "maximo", "contagem", "primeiro", "ultimo")
+
+    def __init__(self):
+        self.soma = 0.0
+        self.minimo = None
+        self.maximo = None
+        self.contagem = 0
+        self.primeiro = None
+        self.ultimo = None
+
+    def adicionar(self, valor):
+        self.soma += valor
+        self.contagem += 1
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if self.maximo is None or valor > self.maximo:
+            self.maximo = valor
+        if self.primeiro is None:
+            self.primeiro = valor
+        self.ultimo = valor
+
+    def valor(self, agregacao):
+        if agregacao == "mean":
+            return round(self.soma / self.contagem, 3) if self.contagem else None
+        if agregacao == "sum":
+            return round(self.soma, 3)
+        if agregacao == "count":
+            return self.contagem
+        return {"min": self.minimo, "max": self.maximo, "first": self.primeiro, "last": self.ultimo}[agregacao]
+
+
+def _normalizar(timestamp):
+    if not timestamp:
+        return None
+    instante = datetime.fromisoformat(timestamp)
+    texto = instante.strftime("%Y-%m-%d %H:%M:%S")
+    if instante.microsecond:
+        texto += instante.strftime(".%f")[:4]
+    return texto
+
+
+def _linhas_no_periodo(csv_path, inicio, fim, indice):
+    """Gera as linhas (já divididas) do CSV com inicio <= timestamp <= fim."""
+    with open(csv_path, "rb") as f:
+        cabecalho = f.readline().decode("utf-8").rstrip("\r\n").split(",")
+        yield cabecalho
+        offset = indice.buscar(inicio) if inicio else None
+        if offset is not None:
+            f.seek(offset)
+        for bruta in f:
+            linha = bruta.decode("utf-8").rstrip("\r\n")
+            # Timestamps ISO ordenam igual como texto: sem parse para filtrar
+            timestamp = linha[:linha.find(",")]
+            if inicio and timestamp < inicio:
+                continue
+            if fim and timestamp > fim:
+                break
+            yield linha.split(",")
+
+
+def consultar(
+    csv_path="/data/historico.csv",
+    inicio=None,
+    fim=None,
+    colunas=("cpu_percent", "mem_percent"),
+    passo=60,
+    agregacoes=("mean",),
+    formato="csv",
+    saida=None,
+):
+    """
+    Agrega as colunas pedidas em buckets de `passo` segundos dentro de
+    [inicio, fim] e escreve o resultado em streaming (cada bucket sai assim
+    que fecha), em CSV ou JSON.
+
+    O custo depende do tamanho do período e não do tamanho do arquivo: o
+    índice esparso (.idx) leva direto à região do início.
+
+    Args:
+        csv_path (str): historico.csv.
+        inicio, fim (str): limites no formato do CSV, ex.: "2025-11-07 02:00".
+        colunas (list): métricas a agregar.
+        passo (float): tamanho do bucket em segundos.
+        agregacoes (list): mean, min, max, sum, count, first, last.
+        formato (str): "csv" ou "json".
+        saida: stream de saída (padrão: stdout).
+    """
+    saida = saida or sys.stdout
+    # Normaliza para o formato do CSV, para comparar timestamps como texto
+    inicio = _normalizar(inicio)
+    fim = _normalizar(fim)
+    for agregacao in agregacoes:
+        if agregacao not in AGREGACOES:
+            raise ValueError(f"Agregação desconhecida: '{agregacao}'. Opções: {', '.join(AGREGACOES)}")
+
+    if not os.path.isfile(csv_path):
+        # stderr: o stdout é só do resultado
+        print(f"Erro: Arquivo não encontrado em {csv_path}", file=sys.stderr)
+        print("Por favor, rode a ação 'monitor' primeiro para gerar o arquivo.", file=sys.stderr)
+        return 0
+
+    indice = IndiceEsparso(csv_path).carregar()
+    if not indice.valido():
+        # Só na memória: o .idx é do monitor, que o mantém aberto (ver reconstruir)
+        indice.reconstruir(gravar=False)
+
+    linhas = _linhas_no_periodo(csv_path, inicio, fim, indice)
+    cabecalho = next(linhas)
+    colunas = [c for c in colunas if c in cabecalho]
+    posicoes = [cabecalho.index(c) for c in colunas]
+    nomes = ["timestamp"] + [f"{c}_{a}" for c in colunas for a in agregacoes]
+
+    if formato == "csv":
+        writer = csv.writer(saida, lineterminator="\n")
+        writer.writerow(nomes)
+    else:
+        saida.write("[")
+    emitidos = 0
+
+    def emitir(chave, buckets):
+        nonlocal emitidos
+        valores = [chave.strftime("%Y-%m-%d %H:%M:%S")]
+        valores += [b.valor(a) for b in buckets for a in agregacoes]
+        if formato == "csv":
+            writer.writerow(valores)
+        else:
+            saida.write(("," if emitidos else "") + "\n" + json.dumps(dict(zip(nomes, valores))))
+        emitidos += 1
+
+    passo_td = timedelta(seconds=passo)
+    chave_atual = None
+    buckets = None
+    for linha in linhas:
+        instante = datetime.fromisoformat(linha[0])
+        meia_noite = instante.replace(hour=0, minute=0, second=0, microsecond=0)
+        chave = meia_noite + (instante - meia_noite) // passo_td * passo_td
+        if chave != chave_atual:
+            if chave_atual is not None:
+                emitir(chave_atual, buckets)
+            chave_atual = chave
+            buckets = [_Bucket() for _ in colunas]
+        for bucket, posicao in zip(buckets, posicoes):
+            if posicao < len(linha) and linha[posicao] != "":
+                bucket.adicionar(float(linha[posicao]))
+    if chave_atual is not None:
+        emitir(chave_atual, buckets)
+
+    if formato == "json":
+        saida.write("\n]\n")
+    saida.flush()
+    return emitidos
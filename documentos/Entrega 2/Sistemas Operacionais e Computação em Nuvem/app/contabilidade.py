@@ -0,0 +1,131 @@
+# app/contabilidade.py
+import json
+import os
+import resource
+import socket
+import sys
+import time
+from datetime import datetime
+
+
+def _ler_io():
+    """Bytes lidos/gravados em disco pelo processo (/proc/self/io), se disponível."""
+    try:
+        with open("/proc/self/io") as f:
+            valores = dict(linha.split(": ") for linha in f.read().splitlines())
+        return int(valores["read_bytes"]), int(valores["write_bytes"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _zerar_pico_rss():
+    """Zera o VmHWM do processo (Linux >= 4.0); False se não for possível."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _ler_pico_rss():
+    """VmHWM de /proc/self/status em MB, se disponível."""
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return round(int(linha.split()[1]) / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _cpu(uso):
+    return uso.ru_utime, uso.ru_stime
+
+
+def contabilizar(acao, funcao, ledger_path="/data/jobs.jsonl", argumentos=None):
+    """
+    Executa `funcao()` e acrescenta ao ledger um registro JSON com o custo da
+    execução: tempo de parede, CPU de usuário e de sistema (do processo e dos
+    filhos, ex.: workers do joblib), pico de RSS e bytes de I/O em disco.
+
+    CPU e I/O são diferenças do rusage e do /proc/self/io, então valem
+    também para várias execuções no mesmo processo (daemon). O pico de RSS
+    do rusage é o do processo inteiro; por isso o VmHWM é zerado no início
+    de cada execução. Sem isso (fora do Linux), o pico só é atribuído ao
+    job se subiu durante ele; senão o registro traz rss_pico_processo_mb.
+
+    Args:
+        acao (str): nome da ação (ex.: "tsne").
+        funcao (callable): ação a executar, sem argumentos.
+        ledger_path (str): arquivo JSON Lines (um registro por execução).
+            Vazio ou None desativa a gravação.
+        argumentos (dict): argumentos da linha de comando, guardados no registro.
+
+    Returns:
+        o retorno de `funcao()`.
+    """
+    inicio = datetime.now()
+    t0 = time.perf_counter()
+    proprio0 = resource.getrusage(resource.RUSAGE_SELF)
+    filhos0 = resource.getrusage(resource.RUSAGE_CHILDREN)
+    leitura0, escrita0 = _ler_io()
+    pico_zerado = _zerar_pico_rss()
+
+    status = "ok"
+    try:
+        return funcao()
+    except KeyboardInterrupt:
+        status = "interrompido"
+        raise
+    except BaseException as e:
+        status = f"erro: {type(e).__name__}"
+        raise
+    finally:
+        wall = time.perf_counter() - t0
+        proprio = resource.getrusage(resource.RUSAGE_SELF)
+        filhos = resource.getrusage(resource.RUSAGE_CHILDREN)
+        leitura, escrita = _ler_io()
+        pico = _ler_pico_rss() if pico_zerado else None
+        # ru_maxrss é o high-water mark do processo, em KiB no Linux
+        pico_processo = round(proprio.ru_maxrss / 1024, 1)
+        if pico is None and proprio.ru_maxrss > proprio0.ru_maxrss:
+            pico = pico_processo
+
+        usuario0, sistema0 = _cpu(proprio0)
+        usuario, sistema = _cpu(proprio)
+        filhos_usuario0, filhos_sistema0 = _cpu(filhos0)
+        filhos_usuario, filhos_sistema = _cpu(filhos)
+        registro = {
+            "acao": acao,
+            "inicio": inicio.strftime("%Y-%m-%d %H:%M:%S"),
+            "status": status,
+            "wall_s": round(wall, 3),
+            "cpu_usuario_s": round(usuario - usuario0, 3),
+            "cpu_sistema_s": round(sistema - sistema0, 3),
+            "cpu_filhos_s": round(
+                (filhos_usuario - filhos_usuario0) + (filhos_sistema - filhos_sistema0), 3
+            ),
+            "rss_pico_mb": pico,
+            "rss_pico_filhos_mb": round(filhos.ru_maxrss / 1024, 1),
+            "leitura_bytes": None if leitura is None else leitura - leitura0,
+            "escrita_bytes": None if escrita is None else escrita - escrita0,
+            **({} if pico is not None else {"rss_pico_processo_mb": pico_processo}),
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "argumentos": argumentos or {},
+        }
+        # stderr: não mistura com a saída de ações como a 'query'
+        print(
+            f"[job] {acao}: {registro['wall_s']}s de parede, "
+            f"{registro['cpu_usuario_s'] + registro['cpu_sistema_s']:.2f}s de CPU, "
+            f"pico de RSS {pico if pico is not None else f'<= {pico_processo}'} MB ({status})",
+            file=sys.stderr,
+        )
+        if ledger_path:
+            try:
+                with open(ledger_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Aviso: não foi possível gravar o ledger em {ledger_path}: {e}", file=sys.stderr)
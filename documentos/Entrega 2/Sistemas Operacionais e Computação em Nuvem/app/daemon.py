@@ -0,0 +1,159 @@
+# app/daemon.py
+"""
+Mantém um processo vivo executando ações em agendas periódicas, em vez de
+recriar um container (e pagar interpretador + imports) a cada execução.
+
+- Imports quentes: cada módulo é importado na primeira execução e fica em
+  sys.modules para as seguintes.
+- Dados em cache: as ações sobre a base_unificada.csv passam pelo pipeline
+  com um cache das etapas de leitura/normalização, refeito só
+  quando o arquivo muda.
+- Sem sobreposição: as execuções são sequenciais na thread principal (o
+  pyplot não é thread-safe). Se uma execução passa do horário da próxima da
+  mesma ação, os horários vencidos são pulados e contados, como os ticks
+  perdidos do AgendadorDeadline do monitor.
+- Cada execução entra no ledger de jobs (ver contabilidade.py).
+"""
+import re
+import time
+import traceback
+from datetime import datetime
+
+from contabilidade import contabilizar
+
+
+UNIDADES = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+ACOES_DAEMON = ["regressao_linear", "tsne", "pca", "pipeline", "detector_anomalia"]
+
+
+def interpretar_periodo(texto):
+    """'90', '90s', '5m', '1h', '1d' -> segundos."""
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd]?)", texto.strip())
+    # Período zero faria o reagendamento dividir por zero após a primeira execução
+    if not m or float(m.group(1)) <= 0:
+        raise ValueError(f"Período inválido: '{texto}' (ex.: 30s, 5m, 1h, 1d)")
+    return float(m.group(1)) * UNIDADES[m.group(2) or "s"]
+
+
+def interpretar_agenda(texto):
+    """'regressao_linear=1h,detector_anomalia=5m' -> {acao: segundos}."""
+    agenda = {}
+    for item in texto.split(","):
+        if not item.strip():
+            continue
+        acao, _, periodo = item.partition("=")
+        acao = acao.strip()
+        if acao not in ACOES_DAEMON:
+            raise ValueError(f"Ação '{acao}' não pode ser agendada. Opções: {', '.join(ACOES_DAEMON)}")
+        agenda[acao] = interpretar_periodo(periodo or "1h")
+    if not agenda:
+        raise ValueError("Agenda vazia (ex.: --agenda regressao_linear=1h,detector_anomalia=5m)")
+    return agenda
+
+
+class Tarefa:
+    """Uma ação agendada: período, próximo horário e contadores."""
+
+    def __init__(self, acao, periodo, inicio):
+        self.acao = acao
+        self.periodo = periodo
+        self.proxima = inicio
+        self.execucoes = 0
+        self.falhas = 0
+        self.puladas = 0
+        self.segundos = 0.0
+        self.ultima_duracao = None
+
+    def reagendar(self, agora):
+        """Avança para o próximo horário futuro; horários já vencidos são pulados."""
+        vencidos = int((agora - self.proxima) // self.periodo)
+        self.puladas += vencidos
+        self.proxima += (vencidos + 1) * self.periodo
+        return vencidos
+
+
+def _executar_acao(acao, cache, base_path, historico_path):
+    if acao == "detector_anomalia":
+        from detector_anomalia import analisar_anomalias
+
+        analisar_anomalias(input_path=historico_path)
+        return
+    from pipeline import executar_pipeline
+
+    etapas = ["regressao_linear", "tsne", "pca"] if acao == "pipeline" else [acao]
+    executar_pipeline(etapas=etapas, input_path=base_path, cache=cache)
+
+
+def executar_daemon(
+    agenda,
+    base_path="/data/base_unificada.csv",
+    historico_path="/data/historico.csv",
+    ledger_path="/data/jobs.jsonl",
+    executar_ao_iniciar=True,
+):
+    """
+    Executa as ações da agenda até Ctrl+C.
+
+    Args:
+        agenda (dict | str): {acao: período em segundos} ou o texto
+            "acao=período,..." (ex.: "regressao_linear=1h,detector_anomalia=5m").
+        base_path (str): base_unificada.csv (regressao_linear, tsne, pca, pipeline).
+        historico_path (str): historico.csv (detector_anomalia).
+        ledger_path (str): ledger de jobs (vazio desativa).
+        executar_ao_iniciar (bool): roda cada ação logo ao iniciar; senão,
+            a primeira execução é após um período.
+    """
+    if isinstance(agenda, str):
+        agenda = interpretar_agenda(agenda)
+    inicio = time.monotonic()
+    tarefas = [
+        Tarefa(acao, periodo, inicio if executar_ao_iniciar else inicio + periodo)
+        for acao, periodo in agenda.items()
+    ]
+    cache = {}
+    print("Agenda: " + ", ".join(f"{t.acao} a cada {t.periodo:g}s" for t in tarefas))
+
+    try:
+        while True:
+            tarefa = min(tarefas, key=lambda t: t.proxima)
+            espera = tarefa.proxima - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+
+            horario = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            print(f"\n[daemon] {horario} executando {tarefa.acao} (execução {tarefa.execucoes + 1})")
+            t0 = time.perf_counter()
+            try:
+                contabilizar(
+                    tarefa.acao,
+                    lambda: _executar_acao(tarefa.acao, cache, base_path, historico_path),
+                    ledger_path=ledger_path,
+                    argumentos={"acao": tarefa.acao, "daemon": True, "execucao": tarefa.execucoes + 1},
+                )
+            except Exception:
+                # Uma falha não derruba o daemon: registra e segue a agenda
+                tarefa.falhas += 1
+                traceback.print_exc()
+            tarefa.ultima_duracao = time.perf_counter() - t0
+            tarefa.segundos += tarefa.ultima_duracao
+            tarefa.execucoes += 1
+
+            vencidos = tarefa.reagendar(time.monotonic())
+            if vencidos:
+                print(
+                    f"[daemon] {tarefa.acao} levou {tarefa.ultima_duracao:.1f}s, mais que o período "
+                    f"({tarefa.periodo:g}s): {vencidos} execução(ões) pulada(s)"
+                )
+            print(
+                f"[daemon] {tarefa.acao} em {tarefa.ultima_duracao:.2f}s; próxima em "
+                f"{max(0.0, tarefa.proxima - time.monotonic()):.0f}s"
+            )
+    except KeyboardInterrupt:
+        print("\nDaemon encerrado pelo usuário.")
+    finally:
+        for t in tarefas:
+            media = t.segundos / t.execucoes if t.execucoes else 0.0
+            print(
+                f"  {t.acao}: {t.execucoes} execuções (média {media:.2f}s) | "
+                f"falhas: {t.falhas} | puladas por sobreposição: {t.puladas}"
+            )
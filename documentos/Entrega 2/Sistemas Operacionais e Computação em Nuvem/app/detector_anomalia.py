@@ -4,16 +4,33 @@ from sklearn.ensemble import IsolationForest
 import matplotlib.pyplot as plt
 import os
 
+from esquema import selecionar_colunas
+from perfil import etapa
+
 def analisar_anomalias(
     input_path="/data/historico.csv",
     output_graph_cpu="/data/grafico_cpu_anomalias.png",
-    output_graph_mem="/data/grafico_memoria_anomalias.png"
+    output_graph_mem="/data/grafico_memoria_anomalias.png",
+    features=("cpu_percent", "mem_percent"),
+    inicio=None,
+    fim=None,
+    max_pontos=2000
 ):
     print("Iniciando detecção de anomalias com IsolationForest...")
 
     # --- 1. Carregar os Dados de Monitoramento ---
     try:
-        df = pd.read_csv(input_path)
+        # Lê só as colunas necessárias, conforme o esquema do arquivo
+        with etapa("carregar"):
+            if input_path.endswith(".hts"):
+                df, features = _carregar_serie(input_path, list(features), inicio, fim)
+            elif inicio or fim:
+                df, features = _carregar_periodo(input_path, list(features), inicio, fim, max_pontos)
+            else:
+                df, features = _carregar_csv(input_path, list(features))
+        if not features:
+            print("Erro: nenhuma das colunas pedidas existe no histórico.")
+            return
         if df.empty:
             print(f"Aviso: O arquivo {input_path} está vazio. Rode o 'monitor' primeiro.")
             return
@@ -21,25 +38,27 @@ def analisar_anomalias(
         print(f"Erro: Arquivo não encontrado em {input_path}")
         print("Por favor, rode a ação 'monitor' primeiro para gerar o arquivo.")
         return
-    
-    # Converter timestamp para datetime para usar no gráfico
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    except ValueError as e:
+        # Cabeçalho fora de qualquer versão do esquema (ver esquema.py)
+        print(f"Erro: {e}")
+        return
 
     # --- 2. Preparar os Dados para a IA ---
-    # CPU e Memória para encontrar anomalias
-    features = ['cpu_percent', 'mem_percent']
-    X = df[features]
+    # Por padrão CPU e Memória; com --contadores podem entrar disco, rede, swap...
+    X = df[features].fillna(0)
 
     # --- 3. Aplicar o IsolationForest ---
     # contamination='auto' ou um valor (ex: 0.05 = 5%)
     model = IsolationForest(contamination='auto', random_state=42)
     
     # Treinar o modelo
-    model.fit(X)
+    with etapa("ajustar"):
+        model.fit(X)
 
     # Obter as predições
     # O modelo retorna 1 para "normal" (inlier) e -1 para "anomalia" (outlier)
-    df['anomalia'] = model.predict(X)
+    with etapa("prever"):
+        df['anomalia'] = model.predict(X)
 
     # Criar um dataframe separado apenas com as anomalias para plotar
     anomalias = df[df['anomalia'] == -1]
@@ -52,33 +71,68 @@ def analisar_anomalias(
 
     # --- 4. Gerar Gráficos de Monitoramento (Entregável) ---
     
-    # Gráfico 1: Anomalias de CPU
-    plt.figure(figsize=(15, 6))
-    plt.plot(df['timestamp'], df['cpu_percent'], label='Uso de CPU', color='blue')
-    # Destacar as anomalias em vermelho
-    plt.scatter(anomalias['timestamp'], anomalias['cpu_percent'], color='red', label='Anomalia Detectada', zorder=5)
-    plt.title('Monitoramento de CPU com Detecção de Anomalias')
-    plt.ylabel('CPU (%)')
-    plt.xlabel('Tempo')
-    plt.legend()
-    plt.grid(True)
-    plt.savefig(output_graph_cpu)
-    plt.close()
-    print(f"Gráfico de anomalias de CPU salvo em {output_graph_cpu}")
-
-    # Gráfico 2: Anomalias de Memória
-    plt.figure(figsize=(15, 6))
-    plt.plot(df['timestamp'], df['mem_percent'], label='Uso de Memória', color='green')
-    # Destacar as anomalias em vermelho
-    plt.scatter(anomalias['timestamp'], anomalias['mem_percent'], color='red', label='Anomalia Detectada', zorder=5)
-    plt.title('Monitoramento de Memória com Detecção de Anomalias')
-    plt.ylabel('Memória (%)')
-    plt.xlabel('Tempo')
-    plt.legend()
-    plt.grid(True)
-    plt.savefig(output_graph_mem)
-    plt.close()
-    print(f"Gráfico de anomalias de memória salvo em {output_graph_mem}")
+    with etapa("plotar"):
+        # Gráfico 1: Anomalias de CPU
+        plt.figure(figsize=(15, 6))
+        plt.plot(df['timestamp'], df['cpu_percent'], label='Uso de CPU', color='blue')
+        # Destacar as anomalias em vermelho
+        plt.scatter(anomalias['timestamp'], anomalias['cpu_percent'], color='red', label='Anomalia Detectada', zorder=5)
+        plt.title('Monitoramento de CPU com Detecção de Anomalias')
+        plt.ylabel('CPU (%)')
+        plt.xlabel('Tempo')
+        plt.legend()
+        plt.grid(True)
+        plt.savefig(output_graph_cpu)
+        plt.close()
+        print(f"Gráfico de anomalias de CPU salvo em {output_graph_cpu}")
+
+        # Gráfico 2: Anomalias de Memória
+        plt.figure(figsize=(15, 6))
+        plt.plot(df['timestamp'], df['mem_percent'], label='Uso de Memória', color='green')
+        # Destacar as anomalias em vermelho
+        plt.scatter(anomalias['timestamp'], anomalias['mem_percent'], color='red', label='Anomalia Detectada', zorder=5)
+        plt.title('Monitoramento de Memória com Detecção de Anomalias')
+        plt.ylabel('Memória (%)')
+        plt.xlabel('Tempo')
+        plt.legend()
+        plt.grid(True)
+        plt.savefig(output_graph_mem)
+        plt.close()
+        print(f"Gráfico de anomalias de memória salvo em {output_graph_mem}")
+
+def _carregar_csv(input_path, features):
+    features = selecionar_colunas(input_path, features)
+    # CPU e memória são sempre lidas, pois são as séries dos gráficos
+    graficos = selecionar_colunas(input_path, ['cpu_percent', 'mem_percent'])
+    df = pd.read_csv(input_path, usecols=['timestamp'] + list(dict.fromkeys(features + graficos)))
+    # Converter timestamp para datetime para usar no gráfico
+    # (ISO8601 aceita tanto segundos quanto milissegundos do modo de alta frequência)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    return df, features
+
+
+def _carregar_periodo(input_path, features, inicio, fim, max_pontos):
+    # Com período definido, usa a resolução mais adequada (bruto ou rollups 1m/5m/1h)
+    from retencao import carregar_historico
+
+    inicio = pd.Timestamp(inicio).to_pydatetime() if inicio else None
+    fim = pd.Timestamp(fim).to_pydatetime() if fim else None
+    df, resolucao = carregar_historico(input_path, inicio, fim, max_pontos)
+    print(f"Resolução usada: {resolucao} ({len(df)} pontos)")
+    return df, [c for c in features if c in df.columns]
+
+
+def _carregar_serie(input_path, features, inicio=None, fim=None):
+    # Formato colunar (serie_temporal.py): arrays NumPy direto, sem parsear texto
+    from serie_temporal import ler_cabecalho, ler_tudo
+
+    disponiveis = ler_cabecalho(input_path)["campos"]
+    features = [c for c in features if c in disponiveis]
+    graficos = [c for c in ['cpu_percent', 'mem_percent'] if c in disponiveis]
+    timestamps, valores = ler_tudo(input_path, list(dict.fromkeys(features + graficos)), inicio, fim)
+    df = pd.DataFrame(valores)
+    df.insert(0, 'timestamp', timestamps)
+    return df, features
 
 if __name__ == "__main__":
     analisar_anomalias()
\ No newline at end of file
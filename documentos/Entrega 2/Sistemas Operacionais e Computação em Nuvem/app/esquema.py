@@ -0,0 +1,114 @@
+# app/esquema.py
+import csv
+import json
+import os
+import re
+
+# Versões do esquema do historico.csv:
+#   1: timestamp, cpu_percent, mem_percent
+#   2: + ticks_perdidos
+#   3: + colunas opcionais de ColetorContadores (--contadores): CPU por
+#      núcleo, load average, swap, taxas de disco e de rede por interface
+#   4: + colunas do ColetorCgroup (--coletor cgroup): limites, throttling,
+#      I/O do cgroup e stall do PSI
+#   5: + intervalo_s na amostragem adaptativa (--rajada-intervalo)
+VERSAO_ESQUEMA = 5
+
+CAMPOS_V1 = ["timestamp", "cpu_percent", "mem_percent"]
+CAMPOS_V2 = CAMPOS_V1 + ["ticks_perdidos"]
+
+# Colunas opcionais (após CAMPOS_V2) introduzidas em cada versão; núcleos,
+# interfaces de rede e recursos do PSI variam por máquina, daí os padrões
+COLUNAS_POR_VERSAO = {
+    3: [
+        r"cpu\d+_percent", r"load_(1|5|15)", "swap_percent",
+        r"disco_(leitura|escrita)_(bps|iops)", r"rede_.+_(rx|tx)_bps",
+    ],
+    4: [
+        "cpu_limite_cores", "mem_limite_mb", "cpu_throttled_percent", "cpu_throttled_ms",
+        r"io_(leitura|escrita)_bps", r"psi_[a-z]+_(some|full)_percent",
+    ],
+    5: ["intervalo_s"],
+}
+
+
+def caminho_esquema(csv_path):
+    """O esquema fica ao lado do CSV: historico.csv -> historico.schema.json"""
+    return os.path.splitext(csv_path)[0] + ".schema.json"
+
+
+def gravar_esquema(csv_path, campos):
+    """Grava o .schema.json com a versão que as colunas de fato usam (ver versao_dos_campos)."""
+    campos = list(campos)
+    with open(caminho_esquema(csv_path), "w", encoding="utf-8") as f:
+        json.dump({"versao": versao_dos_campos(campos, csv_path), "campos": campos}, f, indent=2)
+
+
+def ler_esquema(csv_path):
+    """
+    Retorna {"versao": int, "campos": [...]} do CSV informado.
+
+    Arquivos gravados antes do esquema existir não têm o .schema.json; nesse
+    caso as colunas vêm do cabeçalho e a versão é deduzida delas (ver
+    versao_dos_campos).
+    """
+    caminho = caminho_esquema(csv_path)
+    if os.path.isfile(caminho):
+        with open(caminho, encoding="utf-8") as f:
+            esquema = json.load(f)
+        # Garante que o esquema descreve o arquivo atual (o CSV pode ter sido rotacionado)
+        if esquema.get("campos") == _ler_cabecalho(csv_path):
+            return esquema
+
+    campos = _ler_cabecalho(csv_path)
+    return {"versao": versao_dos_campos(campos, csv_path), "campos": campos}
+
+
+def versao_dos_campos(campos, origem="CSV"):
+    """
+    Menor versão do esquema que descreve as colunas `campos`.
+
+    Args:
+        campos (list): colunas do cabeçalho, na ordem do arquivo.
+        origem (str): nome do arquivo, só para a mensagem de erro.
+
+    Raises:
+        ValueError: se o layout não corresponde a nenhuma versão conhecida.
+    """
+    if campos == CAMPOS_V1:
+        return 1
+    if campos[:len(CAMPOS_V2)] == CAMPOS_V2:
+        versao = 2
+        desconhecidas = []
+        for coluna in campos[len(CAMPOS_V2):]:
+            introduzida = next(
+                (v for v, padroes in COLUNAS_POR_VERSAO.items() if any(re.fullmatch(p, coluna) for p in padroes)),
+                None,
+            )
+            if introduzida is None:
+                desconhecidas.append(coluna)
+            else:
+                versao = max(versao, introduzida)
+        if not desconhecidas:
+            return versao
+        motivo = f"colunas desconhecidas: {', '.join(desconhecidas)}"
+    else:
+        motivo = f"o cabeçalho deve começar com {', '.join(CAMPOS_V2)} (ou ser só {', '.join(CAMPOS_V1)})"
+    raise ValueError(
+        f"Layout de {origem} não corresponde a nenhuma versão do esquema (1 a {VERSAO_ESQUEMA}): {motivo}"
+    )
+
+
+def selecionar_colunas(csv_path, desejadas):
+    """Filtra `desejadas` para as colunas que existem no CSV, avisando as ausentes."""
+    disponiveis = ler_esquema(csv_path)["campos"]
+    presentes = [c for c in desejadas if c in disponiveis]
+    ausentes = [c for c in desejadas if c not in disponiveis]
+    if ausentes:
+        print(f"Aviso: colunas ausentes em {csv_path}: {', '.join(ausentes)}")
+    return presentes
+
+
+def _ler_cabecalho(csv_path):
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
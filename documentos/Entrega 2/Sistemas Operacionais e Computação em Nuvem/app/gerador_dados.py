@@ -0,0 +1,187 @@
+# app/gerador_dados.py
+"""
+Gerador sintético, determinístico e vetorizado (NumPy) de dados no formato
+da base_unificada.csv (pedidos) e do historico.csv (monitor), em qualquer
+quantidade de linhas.
+
+Os dados são gerados e gravados em blocos de BLOCO linhas, com memória
+constante. Cada bloco usa o próprio gerador aleatório, derivado de
+(seed, bloco), então a mesma seed e o mesmo número de linhas produzem
+sempre o mesmo arquivo, byte a byte.
+
+Uso direto:
+    python gerador_dados.py base 1m /tmp/base_unificada.csv
+    python gerador_dados.py historico 10m /tmp/historico.csv
+"""
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from esquema import gravar_esquema
+
+
+BLOCO = 500_000
+# Nomes representáveis em cp1250, a codificação da base original
+SEGMENTOS = ["Pizzaria", "Hamburgueria", "Japonesa", "Brasileira", "Açaí", "Padaria", "Árabe", "Sorveteria"]
+# Tempo de preparo base (min) de cada segmento, na ordem de SEGMENTOS
+PREPARO_SEGMENTO = np.array([25, 15, 30, 20, 8, 10, 22, 5])
+CAMPOS_BASE = [
+    "id", "createdAt", "segmento", "empresa", "produto", "customer",
+    "quantidade", "totalAmount", "preparationTime", "takeOutTimeInSeconds", "isTest",
+]
+CAMPOS_HISTORICO = ["timestamp", "cpu_percent", "mem_percent", "ticks_perdidos"]
+
+
+def interpretar_quantidade(texto):
+    """'10k', '1m', '2.5m', '10000' -> número de linhas."""
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([kKmM]?)", str(texto).strip())
+    if not m:
+        raise ValueError(f"Quantidade inválida: '{texto}' (ex.: 10k, 1m, 10m)")
+    return int(float(m.group(1)) * {"": 1, "k": 10**3, "m": 10**6}[m.group(2).lower()])
+
+
+def _blocos(n, bloco):
+    for i, inicio in enumerate(range(0, n, bloco)):
+        yield i, inicio, min(bloco, n - inicio)
+
+
+def gerar_base(
+    n,
+    caminho,
+    seed=42,
+    empresas=200,
+    produtos=2000,
+    clientes=None,
+    inicio="2023-01-01",
+    dias=730,
+    bloco=BLOCO,
+):
+    """
+    Gera uma base de pedidos com as colunas usadas pela regressão, t-SNE,
+    PCA e pelo dashboard (CAMPOS_BASE), separada por ';' e em cp1250.
+
+    Relações embutidas (para os modelos terem o que aprender): cada produto
+    pertence a uma empresa e cada empresa a um segmento; totalAmount ~
+    quantidade x preço do produto; o tempo de preparo depende do segmento e
+    da quantidade. createdAt cresce com o número da linha.
+
+    Args:
+        n (int): número de pedidos.
+        caminho (str): CSV de saída.
+        seed (int): semente; mesma seed e mesmo n geram o mesmo arquivo.
+        empresas, produtos (int): tamanho dos catálogos.
+        clientes (int): número de clientes distintos (padrão: n / 5).
+        inicio (str): data do primeiro pedido.
+        dias (int): período coberto pelos pedidos.
+        bloco (int): linhas geradas e gravadas por vez.
+    """
+    catalogo = np.random.default_rng([seed, 0])
+    segmento_empresa = catalogo.integers(0, len(SEGMENTOS), empresas)
+    empresa_produto = catalogo.integers(0, empresas, produtos)
+    preco_produto = np.round(catalogo.lognormal(3.2, 0.5, produtos), 2)
+    nomes_segmento = np.array(SEGMENTOS, dtype=object)
+    nomes_empresa = np.array([f"Restaurante {i:04d}" for i in range(empresas)], dtype=object)
+    nomes_produto = np.array([f"Produto {i:05d}" for i in range(produtos)], dtype=object)
+    clientes = clientes or max(100, n // 5)
+
+    inicio_ns = pd.Timestamp(inicio).value
+    passo_ns = dias * 86400 * 10**9 / max(n, 1)
+
+    with open(caminho, "w", newline="", encoding="cp1250") as f:
+        for i, primeiro, m in _blocos(n, bloco):
+            rng = np.random.default_rng([seed, 1, i])
+            indices = np.arange(primeiro, primeiro + m)
+            produto = rng.integers(0, produtos, m)
+            empresa = empresa_produto[produto]
+            segmento = segmento_empresa[empresa]
+            quantidade = 1 + rng.poisson(0.8, m)
+            total = quantidade * preco_produto[produto] * rng.normal(1.0, 0.05, m) + rng.choice([0, 5, 8], m)
+            preparo = PREPARO_SEGMENTO[segmento] + 2 * quantidade + rng.gamma(2.0, 2.5, m)
+            criado = inicio_ns + ((indices + rng.random(m)) * passo_ns).astype(np.int64)
+
+            df = pd.DataFrame({
+                "id": indices + 1,
+                "createdAt": pd.to_datetime(criado),
+                "segmento": nomes_segmento[segmento],
+                "empresa": nomes_empresa[empresa],
+                "produto": nomes_produto[produto],
+                "customer": rng.integers(0, clientes, m),
+                "quantidade": quantidade,
+                "totalAmount": np.round(total, 2),
+                "preparationTime": np.round(preparo).astype(np.int64),
+                "takeOutTimeInSeconds": rng.integers(60, 3600, m),
+                "isTest": rng.random(m) < 0.01,
+            }, columns=CAMPOS_BASE)
+            df["customer"] = "Cliente " + df["customer"].astype(str)
+            # Mesmo formato de data do export original (o dashboard lê com dayfirst)
+            df.to_csv(f, sep=";", index=False, header=i == 0, date_format="%d/%m/%Y %H:%M:%S")
+    return n
+
+
+def gerar_historico(
+    n,
+    caminho,
+    seed=42,
+    intervalo=5.0,
+    inicio="2025-01-01 00:00:00",
+    taxa_anomalias=0.002,
+    bloco=BLOCO,
+):
+    """
+    Gera um historico.csv no formato do monitor (CAMPOS_HISTORICO) e o
+    .schema.json correspondente.
+
+    CPU e memória seguem um ciclo diário com ruído; uma fração
+    `taxa_anomalias` das amostras recebe picos, para o detector ter o que
+    encontrar.
+
+    Args:
+        n (int): número de amostras.
+        caminho (str): CSV de saída.
+        seed (int): semente.
+        intervalo (float): segundos entre amostras (< 1 grava milissegundos,
+            como o monitor).
+        inicio (str): timestamp da primeira amostra.
+        taxa_anomalias (float): fração de amostras com pico.
+        bloco (int): linhas geradas e gravadas por vez.
+    """
+    inicio_ns = pd.Timestamp(inicio).value
+    formato = "%Y-%m-%d %H:%M:%S.%f" if intervalo < 1 else "%Y-%m-%d %H:%M:%S"
+
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        for i, primeiro, m in _blocos(n, bloco):
+            rng = np.random.default_rng([seed, 2, i])
+            segundos = np.arange(primeiro, primeiro + m) * intervalo
+            dia = np.sin(2 * np.pi * (segundos % 86400) / 86400 - np.pi / 2)
+            cpu = 35 + 20 * dia + rng.normal(0, 6, m)
+            mem = 50 + 8 * dia + rng.normal(0, 2, m)
+            picos = rng.random(m) < taxa_anomalias
+            cpu[picos] = rng.uniform(90, 100, picos.sum())
+            picos = rng.random(m) < taxa_anomalias / 2
+            mem[picos] = rng.uniform(85, 98, picos.sum())
+
+            timestamps = pd.to_datetime(inicio_ns + (segundos * 1e9).astype(np.int64)).strftime(formato)
+            if intervalo < 1:
+                timestamps = timestamps.str[:-3]
+            pd.DataFrame({
+                "timestamp": timestamps,
+                "cpu_percent": np.round(np.clip(cpu, 0, 100), 1),
+                "mem_percent": np.round(np.clip(mem, 0, 100), 1),
+                "ticks_perdidos": 0,
+            }, columns=CAMPOS_HISTORICO).to_csv(f, index=False, header=i == 0)
+    gravar_esquema(caminho, CAMPOS_HISTORICO)
+    return n
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in ("base", "historico"):
+        print("Uso: python gerador_dados.py base|historico <linhas, ex.: 1m> <saida.csv>")
+        sys.exit(1)
+    linhas = interpretar_quantidade(sys.argv[2])
+    t0 = time.perf_counter()
+    (gerar_base if sys.argv[1] == "base" else gerar_historico)(linhas, sys.argv[3])
+    segundos = time.perf_counter() - t0
+    print(f"{linhas} linhas em {segundos:.1f}s ({linhas / segundos:,.0f} linhas/s) -> {sys.argv[3]}")
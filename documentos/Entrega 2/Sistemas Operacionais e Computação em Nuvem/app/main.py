@@ -1,17 +1,116 @@
 import argparse
+import importlib
+import json
+import os
+import subprocess
 import sys
 
-# --- 1. Importar TODAS as suas funções ---
-try:
-    from monitor import coletar_dados
-    from regressao_linear import treinar_modelo 
-    from tsne import gerar_visualizacao 
-    from pca import gerar_visualizacao_pca   
-    from detector_anomalia import analisar_anomalias 
-except ImportError as e:
-    print(f"Erro de importação: {e}")
-    print("Verifique se todos os arquivos .py (monitor, tsne_visualizacao, pca, anomaly_detector) estão na pasta /app.")
-    sys.exit(1)
+from contabilidade import contabilizar
+
+# Módulos de cada ação: importados só quando a ação roda, para que o
+# 'monitor' (só psutil) não pague o import de pandas, scikit-learn e matplotlib
+MODULOS_POR_ACAO = {
+    "monitor": ["monitor"],
+    "regressao_linear": ["regressao_linear"],
+    "tsne": ["tsne"],
+    "pca": ["pca"],
+    "detector_anomalia": ["detector_anomalia"],
+    "query": ["consulta"],
+    "agregador": ["agregador"],
+    "pipeline": ["pipeline"],
+    "daemon": ["daemon"],
+    "bench": ["bench"],
+    "servir": ["servidor_predicao"],
+    "startup": [],
+}
+# Modos da regressão (opção da linha de comando -> módulos): só o modo escolhido é importado
+MODULOS_POR_MODO_REGRESSAO = {
+    "selecao": ["selecao_modelos"],
+    "por_grupo": ["regressao_grupos"],
+    "incremental": ["regressao_incremental"],
+}
+
+
+def importar_acao(acao, args=None):
+    """Importa os módulos da ação (e do modo escolhido em `args`); em caso de falha, explica e encerra."""
+    modulos = list(MODULOS_POR_ACAO[acao])
+    if acao == "regressao_linear" and args is not None:
+        modulos += next((m for opcao, m in MODULOS_POR_MODO_REGRESSAO.items() if getattr(args, opcao)), [])
+    try:
+        for modulo in modulos:
+            importlib.import_module(modulo)
+    except ImportError as e:
+        print(f"Erro de importação: {e}")
+        print(f"Verifique se os módulos da ação '{acao}' ({', '.join(modulos)}) e suas dependências estão na pasta /app.")
+        sys.exit(1)
+
+
+# Roda em um interpretador novo: mede o import da ação sem cache de módulos
+_SCRIPT_MEDICAO = """
+import importlib, json, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+t0 = time.perf_counter()
+for modulo in sys.argv[2:]:
+    importlib.import_module(modulo)
+ms = (time.perf_counter() - t0) * 1000
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({"import_ms": round(ms, 1), "rss_mb": round(rss, 1), "modulos": len(sys.modules)}))
+"""
+
+
+def medir_startup(acoes=None, repeticoes=3, top=5):
+    """
+    Mede, para cada ação, o custo de importar os seus módulos em um
+    interpretador novo (mediana de `repeticoes` execuções): tempo, RSS após
+    os imports, número de módulos carregados e os pacotes mais caros
+    (segundo `python -X importtime`).
+
+    Args:
+        acoes (list): ações medidas (padrão: todas).
+        repeticoes (int): execuções por ação.
+        top (int): pacotes mais caros listados por ação.
+    """
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    opcoes = [a for a in MODULOS_POR_ACAO if a != "startup"]
+    acoes = acoes or opcoes
+    for acao in acoes:
+        if acao not in opcoes:
+            raise ValueError(f"Ação '{acao}' desconhecida. Opções: {', '.join(opcoes)}")
+    print(f"{'ação':<18} {'import (ms)':>12} {'RSS (MB)':>9} {'módulos':>8}  mais caros")
+    # "startup" não importa nada: é a linha de base do interpretador, cujos
+    # módulos (site, json...) ficam fora da lista dos mais caros
+    base = set()
+    for acao in ["startup"] + list(acoes):
+        medicoes = []
+        custos = {}
+        for _ in range(repeticoes):
+            resultado = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", _SCRIPT_MEDICAO, pasta, *MODULOS_POR_ACAO[acao]],
+                capture_output=True,
+                text=True,
+            )
+            if resultado.returncode != 0:
+                print(f"{acao:<18} falhou: {resultado.stderr.strip().splitlines()[-1]}")
+                break
+            medicoes.append(json.loads(resultado.stdout.strip().splitlines()[-1]))
+            # "import time: self [us] | cumulative | pacote"; só os de nível 0
+            for linha in resultado.stderr.splitlines():
+                partes = linha.split("|")
+                if len(partes) == 3 and not partes[2].startswith("  ") and partes[1].strip().isdigit():
+                    nome = partes[2].strip()
+                    if acao == "startup":
+                        base.add(nome)
+                    elif nome not in base:
+                        custos[nome] = custos.get(nome, 0) + int(partes[1]) / 1000 / repeticoes
+        if not medicoes:
+            continue
+        medicoes.sort(key=lambda m: m["import_ms"])
+        mediana = medicoes[len(medicoes) // 2]
+        caros = sorted(custos.items(), key=lambda item: item[1], reverse=True)[:top]
+        print(
+            f"{'(interpretador)' if acao == 'startup' else acao:<18} {mediana['import_ms']:>12} {mediana['rss_mb']:>9} {mediana['modulos']:>8}  "
+            + ", ".join(f"{nome} {ms:.0f} ms" for nome, ms in caros)
+        )
 
 
 def main():
@@ -28,46 +127,621 @@ def main():
             "regressao_linear",  # <- Corresponde ao seu docker-compose
             "tsne", 
             "pca",                 # <- Corresponde ao seu docker-compose
-            "detector_anomalia"  # <- Corresponde ao seu docker-compose
+            "detector_anomalia",  # <- Corresponde ao seu docker-compose
+            "query",             # consulta por período sobre o historico.csv
+            "agregador",         # recebe amostras dos agentes (monitor --sink rede)
+            "pipeline",          # regressão, t-SNE e PCA com uma única leitura da base
+            "daemon",            # executa ações periodicamente em um processo só
+            "bench",             # mede as ações com dados sintéticos de 10k a 10M linhas
+            "servir",            # serve predições do modelo da regressão por HTTP
+            "startup"            # mede o custo de import de cada ação
         ],
         help="Escolha a ação a ser executada."
     )
 
     parser.add_argument(
         "--intervalo",
+        type=float,
+        default=5,
+        help="Intervalo em segundos para coleta; aceita frações, ex.: 0.02 (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--coletor",
+        type=str,
+        choices=["psutil", "procfs", "cgroup"],
+        default="psutil",
+        help="Fonte das métricas: psutil, procfs (leitura direta de /proc, para intervalos de 10-50 ms) ou cgroup (cgroup v2 do container, relativo aos limites)."
+    )
+
+    parser.add_argument(
+        "--sink",
+        type=str,
+        default="csv,stdout",
+        help="Destinos das amostras, separados por vírgula: csv, sqlite, serie (formato colunar .hts), rede (envia ao agregador), stdout, none (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--lote",
+        type=int,
+        default=100,
+        help="Número de amostras por flush da thread escritora (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--flush-segundos",
+        type=float,
+        default=2.0,
+        help="Tempo máximo em segundos entre flushes, maior que zero (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--tamanho-fila",
+        type=int,
+        default=10000,
+        help="Capacidade da fila entre coleta e gravação; amostras excedentes são descartadas (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--top-processos",
+        type=int,
+        default=0,
+        help="Se > 0, grava os N processos com maior CPU e RSS de cada tick em historico_processos.csv (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--contadores",
+        action="store_true",
+        help="Acrescenta CPU por núcleo, load average, swap e taxas de disco e rede ao historico.csv (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--features",
+        type=str,
+        default="cpu_percent,mem_percent",
+        help="Colunas do historico.csv usadas pelo IsolationForest, separadas por vírgula (usado apenas em 'detector_anomalia')."
+    )
+
+    parser.add_argument(
+        "--retencao-horas",
+        type=float,
+        default=0,
+        help="Se > 0, o historico.csv bruto mantém só as últimas N horas (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--rollups",
+        action="store_true",
+        help="Mantém historico_1m/5m/1h.csv com min/max/mean/p95/count (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--http-porta",
+        type=int,
+        default=0,
+        help="Se > 0, expõe as amostras recentes em HTTP: /metrics (Prometheus), /ultima e /amostras (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--http-host",
+        type=str,
+        default="127.0.0.1",
+        help="Interface do servidor HTTP de métricas; use 0.0.0.0 para acesso de fora do container."
+    )
+
+    parser.add_argument(
+        "--shm",
+        type=str,
+        default=None,
+        help="Nome do ring buffer em memória compartilhada onde o monitor publica as amostras, ex.: monitor_amostras (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--shm-capacidade",
+        type=int,
+        default=4096,
+        help="Número de amostras no ring buffer compartilhado."
+    )
+
+    parser.add_argument(
+        "--rajada-intervalo",
+        type=float,
+        default=0,
+        help="Se > 0, ativa a amostragem adaptativa: intervalo (s) usado durante as rajadas (usado apenas em 'monitor')."
+    )
+
+    parser.add_argument(
+        "--rajada-janela",
+        type=float,
+        default=30,
+        help="Duração (s) da rajada após o último disparo."
+    )
+
+    parser.add_argument(
+        "--rajada-cpu",
+        type=float,
+        default=80,
+        help="CPU (%%) que dispara uma rajada."
+    )
+
+    parser.add_argument(
+        "--rajada-mem",
+        type=float,
+        default=90,
+        help="Memória (%%) que dispara uma rajada."
+    )
+
+    parser.add_argument(
+        "--rajada-variacao",
+        type=float,
+        default=20,
+        help="Desvio (pontos percentuais) em relação à média recente que dispara uma rajada."
+    )
+
+    parser.add_argument(
+        "--instrumentacao-segundos",
+        type=float,
+        default=0,
+        help="Grava a cada N segundos o overhead do próprio monitor em historico_overhead.csv (0 = desativado)."
+    )
+
+    parser.add_argument(
+        "--agregador-url",
+        type=str,
+        default="tcp://127.0.0.1:9400",
+        help="Endereço do agregador para o sink 'rede': tcp://host:porta ou udp://host:porta."
+    )
+
+    parser.add_argument(
+        "--host-id",
+        type=str,
+        default=None,
+        help="Nome deste host nos dados do agregador (padrão: hostname); permite vários agentes na mesma máquina."
+    )
+
+    parser.add_argument(
+        "--porta",
+        type=int,
+        default=9400,
+        help="Porta de escuta do 'agregador'."
+    )
+
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Interface de escuta do 'agregador' e do 'servir' (0.0.0.0 para receber de outras máquinas)."
+    )
+
+    parser.add_argument(
+        "--protocolo",
+        type=str,
+        default="tcp,udp",
+        help="Protocolos do 'agregador': tcp, udp ou tcp,udp."
+    )
+
+    parser.add_argument(
+        "--diretorio-hosts",
+        type=str,
+        default="/data/hosts",
+        help="Onde o 'agregador' grava <host>/historico.csv."
+    )
+
+    parser.add_argument(
+        "--inicio",
+        type=str,
+        default=None,
+        help="Início do período analisado, ex.: '2025-11-07 02:00' (usado em 'detector_anomalia' e 'query')."
+    )
+
+    parser.add_argument(
+        "--fim",
+        type=str,
+        default=None,
+        help="Fim do período analisado (usado em 'detector_anomalia' e 'query')."
+    )
+
+    parser.add_argument(
+        "--historico",
+        type=str,
+        default="/data/historico.csv",
+        help="Histórico lido pelo 'detector_anomalia' (CSV ou formato colunar .hts) e pela 'query' (CSV)."
+    )
+
+    parser.add_argument(
+        "--colunas",
+        type=str,
+        default="cpu_percent,mem_percent",
+        help="Colunas agregadas pela 'query', separadas por vírgula."
+    )
+
+    parser.add_argument(
+        "--passo",
+        type=float,
+        default=60,
+        help="Tamanho dos buckets da 'query', em segundos."
+    )
+
+    parser.add_argument(
+        "--agregacao",
+        type=str,
+        default="mean",
+        help="Agregações da 'query', separadas por vírgula: mean, min, max, sum, count, first, last."
+    )
+
+    parser.add_argument(
+        "--formato",
+        type=str,
+        choices=["csv", "json"],
+        default="csv",
+        help="Formato de saída da 'query'."
+    )
+
+    parser.add_argument(
+        "--base",
+        type=str,
+        default="/data/base_unificada.csv",
+        help="Base de pedidos lida por 'regressao_linear' (todos os modos), 'tsne', 'pca', 'pipeline' e 'daemon'."
+    )
+
+    parser.add_argument(
+        "--sem-colunar",
+        action="store_true",
+        help="Regressão (inclusive --por-grupo e --selecao), t-SNE, PCA e pipeline leem a base direto do CSV, sem o formato colunar (base_unificada.colunas/)."
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="'regressao_linear' lê só as linhas novas da base e atualiza o modelo a partir das estatísticas salvas em --estado-regressao (mesmo resultado de um ajuste com todas as linhas)."
+    )
+
+    parser.add_argument(
+        "--estado-regressao",
+        type=str,
+        default="/data/regressao_estado.json",
+        help="Estatísticas acumuladas pelo 'regressao_linear --incremental'."
+    )
+
+    parser.add_argument(
+        "--recomecar",
+        action="store_true",
+        help="Com --incremental, ignora o estado salvo e lê a base inteira."
+    )
+
+    parser.add_argument(
+        "--por-grupo",
+        choices=["empresa", "segmento"],
+        default=None,
+        help="'regressao_linear' ajusta um modelo por empresa ou segmento, todos de uma vez, e grava em /data/modelo_regressao_<grupo>.npz."
+    )
+
+    parser.add_argument(
+        "--min-linhas-grupo",
+        type=int,
+        default=20,
+        help="Com --por-grupo, linhas de treino mínimas para um grupo ter modelo próprio (os demais usam o modelo global)."
+    )
+
+    parser.add_argument(
+        "--selecao",
+        action="store_true",
+        help="'regressao_linear' compara regressores com backtest em origem móvel sobre createdAt (dobras em paralelo) e salva as métricas em --selecao-saida."
+    )
+
+    parser.add_argument(
+        "--candidatos",
+        type=str,
+        default="media,linear,ridge,huber,arvore,floresta,boosting",
+        help="Regressores comparados pelo --selecao, separados por vírgula: media, linear, ridge, huber, arvore, floresta, boosting."
+    )
+
+    parser.add_argument(
+        "--dobras",
         type=int,
         default=5,
-        help="Intervalo em segundos para coleta (usado apenas em 'monitor')."
+        help="Dobras do backtest do --selecao."
+    )
+
+    parser.add_argument(
+        "--selecao-saida",
+        type=str,
+        default="/data/selecao_modelos.csv",
+        help="CSV com as métricas e o tempo de cada (candidato, dobra) do --selecao."
+    )
+
+    parser.add_argument(
+        "--etapas",
+        type=str,
+        default="regressao_linear,tsne,pca",
+        help="Etapas do 'pipeline', separadas por vírgula: regressao_linear, tsne, pca."
+    )
+
+    parser.add_argument(
+        "--trabalhadores",
+        type=int,
+        default=None,
+        help="Processos do 'pipeline' para as etapas independentes (padrão: uma por etapa, até o número de CPUs) e do 'regressao_linear --selecao' para as dobras (padrão: todas as CPUs)."
+    )
+
+    parser.add_argument(
+        "--agenda",
+        type=str,
+        default="pipeline=1d,detector_anomalia=1h",
+        help="Agenda do 'daemon': acao=período separados por vírgula, ex.: regressao_linear=1h,detector_anomalia=5m."
+    )
+
+    parser.add_argument(
+        "--acoes",
+        type=str,
+        default=None,
+        help="Ações medidas pelo 'startup' ou pelo 'bench', separadas por vírgula (padrão: todas)."
+    )
+
+    parser.add_argument(
+        "--tamanhos",
+        type=str,
+        default="10k,1m,10m",
+        help="Linhas dos dados sintéticos do 'bench', separadas por vírgula, ex.: 10k,1m,10m."
+    )
+
+    parser.add_argument(
+        "--dir-bench",
+        type=str,
+        default="/data/bench",
+        help="Pasta do 'bench': dados sintéticos (reaproveitados), saídas das ações e resultados.csv."
+    )
+
+    parser.add_argument(
+        "--bench-timeout",
+        type=float,
+        default=3600,
+        help="Segundos máximos de cada medição do 'bench'."
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Semente do gerador de dados sintéticos do 'bench'."
+    )
+
+    parser.add_argument(
+        "--modelo",
+        type=str,
+        default="/data/modelo_regressao.npz",
+        help="Modelo servido pelo 'servir': o .npz compacto (só NumPy) ou o .pkl (sklearn); recarregado quando o arquivo muda."
+    )
+
+    parser.add_argument(
+        "--porta-servir",
+        type=int,
+        default=9500,
+        help="Porta HTTP do 'servir' (use --host 0.0.0.0 para acessar de fora do container)."
+    )
+
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Serve o 'servir' em um socket Unix neste caminho, em vez de TCP."
+    )
+
+    parser.add_argument(
+        "--lote-max",
+        type=int,
+        default=256,
+        help="Linhas máximas por lote de predição do 'servir'."
+    )
+
+    parser.add_argument(
+        "--espera-lote-ms",
+        type=float,
+        default=1.0,
+        help="Quanto o 'servir' espera por mais requisições antes de fechar um lote (0 = só junta as que já chegaram)."
+    )
+
+    parser.add_argument(
+        "--jobs-ledger",
+        type=str,
+        default="/data/jobs.jsonl",
+        help="Ledger (JSON Lines) com o custo de cada execução: tempo, CPU, pico de RSS e I/O. Vazio desativa."
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Executa a ação sob cProfile e grava os hotspots e o tempo de cada etapa em --dir-perfil."
+    )
+
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Executa a ação sob tracemalloc e grava o pico de memória por etapa e por linha em --dir-perfil."
+    )
+
+    parser.add_argument(
+        "--dir-perfil",
+        type=str,
+        default="/data",
+        help="Pasta dos relatórios de --profile/--trace-memory."
     )
 
     args = parser.parse_args()
+    importar_acao(args.acao, args)
 
+    # Toda ação passa pela contabilidade de recursos (ver contabilidade.py)
+    # Só o que difere do padrão, para o ledger e o perfil ficarem legíveis
+    argumentos = {
+        chave: valor for chave, valor in vars(args).items()
+        if chave == "acao" or valor != parser.get_default(chave)
+    }
+    acao = lambda: executar(args)
+    if args.profile or args.trace_memory:
+        from perfil import perfilar
+
+        acao = lambda: perfilar(
+            args.acao,
+            lambda: executar(args),
+            profile=args.profile,
+            trace_memory=args.trace_memory,
+            diretorio=args.dir_perfil,
+            argumentos=argumentos,
+        )
+    contabilizar(args.acao, acao, ledger_path=args.jobs_ledger, argumentos=argumentos)
+
+
+def executar(args):
     # --- 3. Criar a lógica para chamar cada script ---
     if args.acao == "monitor":
         print("Iniciando modo: Monitoramento de Recursos")
-        coletar_dados(intervalo=args.intervalo)
+        from monitor import coletar_dados
+        coletar_dados(
+            intervalo=args.intervalo,
+            coletor=args.coletor,
+            sink=args.sink,
+            lote=args.lote,
+            flush_segundos=args.flush_segundos,
+            tamanho_fila=args.tamanho_fila,
+            top_processos=args.top_processos,
+            contadores=args.contadores,
+            retencao_horas=args.retencao_horas,
+            rollups=args.rollups,
+            http_porta=args.http_porta,
+            http_host=args.http_host,
+            shm_nome=args.shm,
+            shm_capacidade=args.shm_capacidade,
+            rajada_intervalo=args.rajada_intervalo,
+            rajada_janela=args.rajada_janela,
+            rajada_cpu=args.rajada_cpu,
+            rajada_mem=args.rajada_mem,
+            rajada_variacao=args.rajada_variacao,
+            instrumentacao_segundos=args.instrumentacao_segundos,
+            agregador_url=args.agregador_url,
+            host_id=args.host_id,
+        )
 
     elif args.acao == "regressao_linear":
         print("Iniciando modo: Treinamento - Regressão Linear")
         # Chama a função do regressao_linear.py
-        treinar_modelo() 
+        if args.selecao:
+            from selecao_modelos import selecionar_modelo
+            selecionar_modelo(
+                input_path=args.base,
+                candidatos=args.candidatos.split(","),
+                dobras=args.dobras,
+                trabalhadores=args.trabalhadores,
+                saida_path=args.selecao_saida,
+                colunar=not args.sem_colunar,
+            )
+        elif args.por_grupo:
+            from regressao_grupos import treinar_por_grupo
+            treinar_por_grupo(
+                input_path=args.base,
+                grupo=args.por_grupo,
+                min_linhas=args.min_linhas_grupo,
+                colunar=not args.sem_colunar,
+            )
+        elif args.incremental:
+            from regressao_incremental import treinar_incremental
+            treinar_incremental(input_path=args.base, estado_path=args.estado_regressao, recomecar=args.recomecar)
+        else:
+            from regressao_linear import treinar_modelo
+            treinar_modelo(input_path=args.base, colunar=not args.sem_colunar)
 
     elif args.acao == "tsne":
         print("Iniciando modo: Visualização - t-SNE")
         # Chama a função do tsne_visualizacao.py
-        gerar_visualizacao() 
+        from tsne import gerar_visualizacao
+        gerar_visualizacao(input_path=args.base, colunar=not args.sem_colunar)
 
     elif args.acao == "pca":
         print("Iniciando modo: Visualização - PCA")
         # Chama a função do pca.py
-        gerar_visualizacao_pca() 
+        from pca import gerar_visualizacao_pca
+        gerar_visualizacao_pca(input_path=args.base, colunar=not args.sem_colunar)
 
     elif args.acao == "detector_anomalia":
         print("Iniciando modo: Análise - Detecção de Anomalias")
         # Chama a função do anomaly_detector.py
-        analisar_anomalias() 
+        from detector_anomalia import analisar_anomalias
+        analisar_anomalias(
+            input_path=args.historico,
+            features=args.features.split(","),
+            inicio=args.inicio,
+            fim=args.fim,
+        )
+
+    elif args.acao == "query":
+        # Sem print de início: a saída (CSV/JSON) vai para o stdout
+        from consulta import consultar
+        consultar(
+            csv_path=args.historico,
+            inicio=args.inicio,
+            fim=args.fim,
+            colunas=args.colunas.split(","),
+            passo=args.passo,
+            agregacoes=args.agregacao.split(","),
+            formato=args.formato,
+        )
+
+    elif args.acao == "agregador":
+        print("Iniciando modo: Agregador de Métricas")
+        from agregador import executar_agregador
+        executar_agregador(
+            porta=args.porta,
+            host=args.host,
+            protocolo=args.protocolo,
+            diretorio=args.diretorio_hosts,
+        )
+
+    elif args.acao == "pipeline":
+        print("Iniciando modo: Pipeline - Regressão, t-SNE e PCA com leitura única")
+        from pipeline import executar_pipeline
+        executar_pipeline(
+            etapas=args.etapas.split(","),
+            input_path=args.base,
+            trabalhadores=args.trabalhadores,
+            colunar=not args.sem_colunar,
+        )
+
+    elif args.acao == "daemon":
+        print("Iniciando modo: Daemon - Execuções Periódicas")
+        from daemon import executar_daemon
+        executar_daemon(
+            args.agenda,
+            base_path=args.base,
+            historico_path=args.historico,
+            ledger_path=args.jobs_ledger,
+        )
+
+    elif args.acao == "bench":
+        print("Iniciando modo: Benchmark com dados sintéticos")
+        from bench import executar_bench
+        executar_bench(
+            tamanhos=args.tamanhos,
+            acoes=args.acoes.split(",") if args.acoes else None,
+            diretorio=args.dir_bench,
+            seed=args.seed,
+            timeout=args.bench_timeout,
+        )
+
+    elif args.acao == "servir":
+        print("Iniciando modo: Servidor de Predições - Regressão Linear")
+        from servidor_predicao import executar_servidor
+        executar_servidor(
+            modelo_path=args.modelo,
+            porta=args.porta_servir,
+            host=args.host,
+            socket_path=args.socket,
+            lote_max=args.lote_max,
+            espera_lote_ms=args.espera_lote_ms,
+        )
+
+    elif args.acao == "startup":
+        print("Iniciando modo: Medição do custo de import por ação")
+        medir_startup(args.acoes.split(",") if args.acoes else None)
 
 
 if __name__ == "__main__":
     main()
-
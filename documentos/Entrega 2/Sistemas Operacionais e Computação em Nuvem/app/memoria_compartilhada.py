@@ -0,0 +1,241 @@
+# app/memoria_compartilhada.py
+"""
+Ring buffer das últimas amostras do monitor em memória compartilhada
+(multiprocessing.shared_memory), para consumidores no mesmo host lerem sem
+parsear o historico.csv.
+
+Layout do segmento:
+
+    cabeçalho (CABECALHO_DTYPE): magico, versao, capacidade, tamanho do
+        registro, sequência global (total de amostras publicadas) e tamanho
+        em bytes dos nomes dos campos
+    nomes: os nomes dos campos em JSON (UTF-8), do tamanho que a lista de
+        campos precisar, completados com zeros até múltiplo de 8
+    slots: array estruturado NumPy com `capacidade` registros
+        ("seq", uint64), ("timestamp_ms", int64), (<campo>, float64)...
+
+Protocolo sem lock (seqlock por slot), com um único escritor:
+
+    escritor, amostra número n (n >= 1), slot = (n - 1) % capacidade:
+        1. slot.seq = 0            (slot em escrita)
+        2. grava timestamp e campos
+        3. slot.seq = n            (slot consistente)
+        4. cabecalho.seq = n       (publica)
+
+    leitor, para cada n entre a última lida + 1 e cabecalho.seq:
+        - se n <= cabecalho.seq - capacidade, a amostra já foi sobrescrita
+          (leitor atrasado): conta como perdida;
+        - lê s1 = slot.seq, copia o registro, lê s2 = slot.seq;
+          o registro é válido se s1 == s2 == n.
+
+O timestamp é gravado como ms desde a época no horário local (o mesmo
+relógio do texto no CSV).
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+MAGICO = 0x48535442  # "HSTB"
+VERSAO = 2
+NOME_PADRAO = "monitor_amostras"
+IGNORADOS = {"timestamp"}
+
+CABECALHO_DTYPE = np.dtype([
+    ("magico", np.uint32),
+    ("versao", np.uint32),
+    ("capacidade", np.uint32),
+    ("tamanho_registro", np.uint32),
+    ("seq", np.uint64),
+    ("tamanho_nomes", np.uint32),
+    ("reservado", np.uint32),
+])
+
+_EPOCA = datetime(1970, 1, 1)
+
+
+def _inicio_slots(tamanho_nomes):
+    """Offset dos slots: cabeçalho + nomes, alinhado em 8 bytes."""
+    return CABECALHO_DTYPE.itemsize + -(-tamanho_nomes // 8) * 8
+
+
+def dtype_registro(campos):
+    return np.dtype(
+        [("seq", np.uint64), ("timestamp_ms", np.int64)] + [(c, np.float64) for c in campos]
+    )
+
+
+class PublicadorAmostras:
+    """
+    Lado do escritor (o monitor). Cria o segmento e publica cada amostra.
+
+    Args:
+        campos (list): colunas das amostras; "timestamp" vira timestamp_ms.
+        nome (str): nome do segmento (em /dev/shm).
+        capacidade (int): número de amostras no ring buffer.
+    """
+
+    def __init__(self, campos, nome=NOME_PADRAO, capacidade=4096):
+        self.campos = [c for c in campos if c not in IGNORADOS]
+        self.dtype = dtype_registro(self.campos)
+        # Os nomes ocupam o que precisarem (contadores, cgroup e processos
+        # passam fácil de alguns KB)
+        nomes = json.dumps(self.campos).encode("utf-8")
+        inicio = _inicio_slots(len(nomes))
+        tamanho = inicio + self.dtype.itemsize * capacidade
+        try:
+            self._shm = shared_memory.SharedMemory(name=nome, create=True, size=tamanho)
+        except FileExistsError:
+            # Sobra de uma execução interrompida: recria
+            antigo = shared_memory.SharedMemory(name=nome)
+            antigo.close()
+            antigo.unlink()
+            self._shm = shared_memory.SharedMemory(name=nome, create=True, size=tamanho)
+
+        self._cabecalho = np.ndarray((), dtype=CABECALHO_DTYPE, buffer=self._shm.buf)
+        self._shm.buf[CABECALHO_DTYPE.itemsize:CABECALHO_DTYPE.itemsize + len(nomes)] = nomes
+        self._slots = np.ndarray(
+            (capacidade,), dtype=self.dtype, buffer=self._shm.buf, offset=inicio
+        )
+        self._slots["seq"] = 0
+        self._cabecalho["seq"] = 0
+        self._cabecalho["capacidade"] = capacidade
+        self._cabecalho["tamanho_registro"] = self.dtype.itemsize
+        self._cabecalho["versao"] = VERSAO
+        self._cabecalho["tamanho_nomes"] = len(nomes)
+        # Por último: o leitor só aceita o segmento depois do número mágico
+        self._cabecalho["magico"] = MAGICO
+        self.capacidade = capacidade
+        self.seq = 0
+
+    def publicar(self, amostra):
+        n = self.seq + 1
+        slot = self._slots[(n - 1) % self.capacidade]
+        slot["seq"] = 0
+        slot["timestamp_ms"] = (
+            datetime.fromisoformat(amostra["timestamp"]) - _EPOCA
+        ) // timedelta(milliseconds=1)
+        for campo in self.campos:
+            valor = amostra.get(campo)
+            slot[campo] = np.nan if valor is None or valor == "" else valor
+        slot["seq"] = n
+        self._cabecalho["seq"] = n
+        self.seq = n
+
+    def fechar(self):
+        # As views NumPy precisam sair antes do close (senão BufferError)
+        del self._cabecalho, self._slots
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _anexar(nome):
+    """Abre um segmento existente sem registrá-lo no resource_tracker do leitor."""
+    try:
+        return shared_memory.SharedMemory(name=nome, track=False)
+    except TypeError:
+        # Python < 3.13: sem o parâmetro track, o resource_tracker apagaria o
+        # segmento quando o leitor terminasse
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(name=nome)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class LeitorAmostras:
+    """
+    Lado do consumidor (detector, dashboard...), em outro processo.
+
+    Exemplo:
+        leitor = LeitorAmostras()
+        novas = leitor.ler_novas()      # array estruturado só com as novas
+        novas["cpu_percent"].mean()
+
+    Args:
+        nome (str): nome do segmento publicado pelo monitor.
+    """
+
+    def __init__(self, nome=NOME_PADRAO):
+        self._shm = _anexar(nome)
+        self._cabecalho = np.ndarray((), dtype=CABECALHO_DTYPE, buffer=self._shm.buf)
+        if int(self._cabecalho["magico"]) != MAGICO or int(self._cabecalho["versao"]) != VERSAO:
+            raise RuntimeError(f"Segmento '{nome}' não é um ring buffer do monitor (ou versão diferente)")
+        tamanho_nomes = int(self._cabecalho["tamanho_nomes"])
+        nomes = bytes(self._shm.buf[CABECALHO_DTYPE.itemsize:CABECALHO_DTYPE.itemsize + tamanho_nomes])
+        self.campos = json.loads(nomes)
+        self.dtype = dtype_registro(self.campos)
+        self.capacidade = int(self._cabecalho["capacidade"])
+        self._slots = np.ndarray(
+            (self.capacidade,), dtype=self.dtype, buffer=self._shm.buf, offset=_inicio_slots(tamanho_nomes)
+        )
+        # Começa do que já está publicado: a primeira leitura traz o buffer inteiro
+        self.ultima_lida = max(0, int(self._cabecalho["seq"]) - self.capacidade)
+        self.perdidas = 0
+
+    def visao(self):
+        """
+        O ring buffer inteiro, sem cópia (ordem dos slots, não cronológica).
+
+        Um slot pode ser sobrescrito enquanto é lido; para registros
+        garantidamente consistentes use ler_novas().
+        """
+        return self._slots
+
+    def ler_novas(self):
+        """Registros publicados desde a última chamada, em ordem, validados pelo seqlock."""
+        seq = int(self._cabecalho["seq"])
+        inicio = self.ultima_lida + 1
+        if seq - inicio + 1 > self.capacidade:
+            self.perdidas += seq - self.capacidade - self.ultima_lida
+            inicio = seq - self.capacidade + 1
+        if seq < inicio:
+            return np.empty(0, dtype=self.dtype)
+
+        numeros = np.arange(inicio, seq + 1, dtype=np.uint64)
+        indices = (numeros - 1) % self.capacidade
+        antes = self._slots["seq"][indices].copy()
+        copia = self._slots[indices]  # indexação avançada: já é uma cópia
+        depois = self._slots["seq"][indices]
+        validos = (antes == numeros) & (depois == numeros) & (copia["seq"] == numeros)
+
+        self.perdidas += int((~validos).sum())
+        self.ultima_lida = seq
+        return copia[validos]
+
+    def ultima(self):
+        """Última amostra consistente como dict, ou None."""
+        for _ in range(3):
+            seq = int(self._cabecalho["seq"])
+            if seq == 0:
+                return None
+            slot = self._slots[(seq - 1) % self.capacidade]
+            registro = slot.copy()
+            if int(registro["seq"]) == seq and int(slot["seq"]) == seq:
+                amostra = {c: float(registro[c]) for c in self.campos}
+                amostra["timestamp"] = np.datetime64(int(registro["timestamp_ms"]), "ms")
+                return amostra
+        return None
+
+    def fechar(self):
+        del self._cabecalho, self._slots
+        self._shm.close()
+
+
+if __name__ == "__main__":
+    # Acompanha o ring buffer do monitor: python memoria_compartilhada.py [nome]
+    leitor = LeitorAmostras(sys.argv[1] if len(sys.argv) > 1 else NOME_PADRAO)
+    try:
+        while True:
+            for registro in leitor.ler_novas():
+                instante = np.datetime64(int(registro["timestamp_ms"]), "ms")
+                print(f"{instante} | CPU: {registro['cpu_percent']:.1f}% | MEM: {registro['mem_percent']:.1f}%")
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        print(f"\nLeitura encerrada ({leitor.perdidas} amostras perdidas).")
+    finally:
+        leitor.fechar()
@@ -0,0 +1,209 @@
+# app/modelo_compacto.py
+"""
+Artefato compacto da regressão linear e um preditor só com NumPy.
+
+O modelo_regressao.pkl guarda objetos do scikit-learn: carregá-lo exige a
+mesma versão do sklearn e importar o pacote inteiro só para um produto
+escalar. O artefato compacto (modelo_regressao.npz, gravado ao lado do .pkl
+a cada treino) guarda apenas os números:
+
+    media, escala   StandardScaler (float64, uma por feature)
+    coef            coeficientes no espaço normalizado
+    intercepto      termo independente
+    meta            JSON: versao do formato, features (na ordem), linhas de
+                    treino, data e versões que gravaram
+
+Na carga, scaler e regressão viram um único produto escalar:
+
+    y = ((X - media) / escala) @ coef + intercepto = X @ pesos + vies
+
+Modelos por grupo (regressao_grupos.py) ficam em um único .npz indexado
+(ex.: modelo_regressao_empresa.npz), já com pesos e viés por grupo:
+
+    grupos          nomes dos grupos, ordenados (o índice de cada linha)
+    pesos, vies     (grupos x features) e (grupos,)
+    linhas          linhas de treino de cada grupo
+    proprio         False quando o grupo tinha poucas linhas e usa o global
+    global_pesos, global_vies   modelo de todas as linhas (grupos sem modelo
+                    próprio ou desconhecidos)
+    meta            JSON: versao, tipo "por_grupo", grupo (coluna), features...
+
+Uso direto (uma predição; nos modelos por grupo, o grupo vem antes):
+    python modelo_compacto.py /data/modelo_regressao.npz 2 25 900
+    python modelo_compacto.py /data/modelo_regressao_empresa.npz "Restaurante 0001" 2 25 900
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+
+VERSAO = 1
+
+
+def caminho_compacto(modelo_path):
+    """modelo_regressao.pkl -> modelo_regressao.npz"""
+    return os.path.splitext(modelo_path)[0] + ".npz"
+
+
+def exportar(modelo, scaler, caminho, features, linhas=None):
+    """
+    Grava o artefato compacto a partir do LinearRegression e do StandardScaler
+    já ajustados (sem importar o sklearn aqui).
+
+    Args:
+        modelo: LinearRegression ajustado (coef_, intercept_).
+        scaler: StandardScaler ajustado (mean_, scale_).
+        caminho (str): arquivo .npz de saída (substituído de forma atômica).
+        features (list): nomes das features, na ordem das colunas de X.
+        linhas (int): linhas usadas no treino (informativo).
+    """
+    meta = {
+        "versao": VERSAO,
+        "features": list(features),
+        "linhas": None if linhas is None else int(linhas),
+        "criado": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "numpy": np.__version__,
+    }
+    try:
+        meta["sklearn"] = sys.modules["sklearn"].__version__
+    except KeyError:
+        pass
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    # Grava em outro arquivo e troca: quem recarrega nunca lê um .npz pela metade
+    with open(caminho + ".tmp", "wb") as f:
+        np.savez(
+            f,
+            media=np.asarray(scaler.mean_, dtype=np.float64),
+            escala=np.asarray(scaler.scale_, dtype=np.float64),
+            coef=np.asarray(modelo.coef_, dtype=np.float64).ravel(),
+            intercepto=np.float64(modelo.intercept_),
+            meta=np.array(json.dumps(meta)),
+        )
+    os.replace(caminho + ".tmp", caminho)
+
+
+def exportar_grupos(caminho, grupo, features, grupos, pesos, vies, linhas, proprio, global_pesos, global_vies):
+    """
+    Grava os modelos por grupo em um único .npz indexado (ver o docstring do
+    módulo). `grupos` deve estar ordenado.
+    """
+    meta = {
+        "versao": VERSAO,
+        "tipo": "por_grupo",
+        "grupo": grupo,
+        "features": list(features),
+        "criado": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "numpy": np.__version__,
+    }
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho + ".tmp", "wb") as f:
+        np.savez(
+            f,
+            grupos=np.asarray(grupos, dtype=str),
+            pesos=np.asarray(pesos, dtype=np.float64),
+            vies=np.asarray(vies, dtype=np.float64),
+            linhas=np.asarray(linhas, dtype=np.int64),
+            proprio=np.asarray(proprio, dtype=bool),
+            global_pesos=np.asarray(global_pesos, dtype=np.float64),
+            global_vies=np.float64(global_vies),
+            meta=np.array(json.dumps(meta)),
+        )
+    os.replace(caminho + ".tmp", caminho)
+
+
+class ModeloCompacto:
+    """
+    Preditor do artefato compacto.
+
+    Args:
+        caminho (str): arquivo .npz gravado por exportar().
+    """
+
+    def __init__(self, caminho):
+        with np.load(caminho, allow_pickle=False) as dados:
+            self.meta = json.loads(str(dados["meta"]))
+            if self.meta.get("versao") != VERSAO:
+                raise ValueError(f"{caminho}: versão {self.meta.get('versao')} do artefato não suportada (esperada {VERSAO})")
+            if self.meta.get("tipo") == "por_grupo":
+                raise ValueError(f"{caminho}: artefato por grupo, use ModeloPorGrupo")
+            media = dados["media"]
+            escala = dados["escala"]
+            coef = dados["coef"]
+            intercepto = float(dados["intercepto"])
+        self.features = self.meta["features"]
+        self.pesos = coef / escala
+        self.vies = intercepto - float(media @ self.pesos)
+
+    def prever(self, X):
+        """X: (linhas x features) na ordem de self.features -> array de predições."""
+        return np.asarray(X, dtype=np.float64) @ self.pesos + self.vies
+
+
+class ModeloPorGrupo:
+    """
+    Preditor dos modelos por grupo: cada linha usa os pesos do seu grupo
+    (busca binária nos nomes ordenados); grupos sem modelo próprio ou
+    desconhecidos usam o modelo global.
+
+    Args:
+        caminho (str): arquivo .npz gravado por exportar_grupos().
+    """
+
+    def __init__(self, caminho):
+        with np.load(caminho, allow_pickle=False) as dados:
+            self.meta = json.loads(str(dados["meta"]))
+            if self.meta.get("versao") != VERSAO or self.meta.get("tipo") != "por_grupo":
+                raise ValueError(f"{caminho}: não é um artefato por grupo na versão {VERSAO}")
+            self.grupos = dados["grupos"]
+            proprio = dados["proprio"]
+            # Linha extra no fim: o modelo global, para grupos sem modelo
+            self.pesos = np.vstack([np.where(proprio[:, None], dados["pesos"], dados["global_pesos"]), dados["global_pesos"]])
+            self.vies = np.append(np.where(proprio, dados["vies"], dados["global_vies"]), dados["global_vies"])
+            self.linhas = dados["linhas"]
+        self.features = self.meta["features"]
+        self.grupo = self.meta["grupo"]
+
+    def indices(self, grupos):
+        """Nomes dos grupos -> índice da linha de pesos (o global se desconhecido)."""
+        grupos = np.asarray(grupos, dtype=str)
+        if not len(self.grupos):
+            return np.zeros(len(grupos), dtype=np.intp)
+        posicao = np.minimum(np.searchsorted(self.grupos, grupos), len(self.grupos) - 1)
+        return np.where(self.grupos[posicao] == grupos, posicao, len(self.grupos))
+
+    def prever(self, X, grupos):
+        """X: (linhas x features); grupos: nome do grupo de cada linha."""
+        indice = self.indices(grupos)
+        X = np.asarray(X, dtype=np.float64)
+        return np.einsum("ij,ij->i", X, self.pesos[indice]) + self.vies[indice]
+
+
+def carregar_modelo(caminho):
+    """ModeloCompacto ou ModeloPorGrupo, conforme o tipo gravado no .npz."""
+    with np.load(caminho, allow_pickle=False) as dados:
+        tipo = json.loads(str(dados["meta"])).get("tipo")
+    return ModeloPorGrupo(caminho) if tipo == "por_grupo" else ModeloCompacto(caminho)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Uso: python modelo_compacto.py <modelo.npz> [grupo] <valor de cada feature...>")
+        sys.exit(1)
+    t0 = time.perf_counter()
+    modelo = carregar_modelo(sys.argv[1])
+    carga_ms = (time.perf_counter() - t0) * 1000
+    argumentos = sys.argv[2:]
+    grupo = argumentos.pop(0) if isinstance(modelo, ModeloPorGrupo) and argumentos else None
+    valores = [float(v) for v in argumentos]
+    if len(valores) != len(modelo.features):
+        print(f"Esperados {len(modelo.features)} valores: {', '.join(modelo.features)}")
+        sys.exit(1)
+    if grupo is None:
+        print(f"{modelo.prever([valores])[0]:.4f}")
+    else:
+        print(f"{modelo.prever([valores], [grupo])[0]:.4f}")
+    print(f"(carga do modelo: {carga_ms:.2f} ms)", file=sys.stderr)
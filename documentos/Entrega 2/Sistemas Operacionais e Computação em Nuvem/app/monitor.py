@@ -1,50 +1,596 @@
 # app/monitor.py
-import psutil
-import time
-import csv
+import bisect
 import os
+import sys
+import time
+import queue
+import threading
 from datetime import datetime
 
-def coletar_dados(intervalo=5, output_path="/data/historico.csv"):
+from coletores import ColetorContadores, RastreadorProcessos, criar_coletor
+from esquema import gravar_esquema
+from retencao import AgregadorRollups
+from sinks import SinkMultiplo, criar_sink
+
+
+CAMPOS = ["timestamp", "cpu_percent", "mem_percent", "ticks_perdidos"]
+# Linhas do CSV entre duas entradas do índice esparso usado pela ação 'query'
+PASSO_INDICE = 1000
+# custo_rastreador_ms: tempo do RastreadorProcessos.ler() no tick (igual nas linhas do tick)
+CAMPOS_PROCESSOS = ["timestamp", "pid", "nome", "cpu_percent", "rss_mb", "custo_rastreador_ms"]
+CAMPOS_OVERHEAD = [
+    "timestamp", "ticks", "latencia_p50_ms", "latencia_p99_ms", "latencia_max_ms",
+    "cpu_coleta_percent", "cpu_processo_percent", "escrita_ms", "flush_ms",
+    "profundidade_fila", "descartadas",
+]
+
+
+class AgendadorDeadline:
+    """
+    Agenda os ticks em instantes fixos (inicio + n * intervalo) usando o
+    relógio monotônico, em vez de dormir `intervalo` depois de cada coleta.
+    Assim o custo da coleta não se acumula como deriva.
+
+    Args:
+        intervalo (float): período entre ticks, em segundos.
+    """
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self.proximo = time.monotonic()
+        self.perdidos_total = 0
+
+    def esperar(self):
+        """Dorme até o próximo deadline e retorna quantos ticks foram perdidos."""
+        self.proximo += self.intervalo
+        agora = time.monotonic()
+        perdidos = 0
+        if agora >= self.proximo + self.intervalo:
+            # Atrasou mais de um período inteiro: pula os ticks que já passaram
+            perdidos = int((agora - self.proximo) // self.intervalo)
+            self.proximo += perdidos * self.intervalo
+            self.perdidos_total += perdidos
+        espera = self.proximo - agora
+        if espera > 0:
+            time.sleep(espera)
+        return perdidos
+
+    def ajustar(self, intervalo):
+        """Troca o período a partir do próximo tick, sem perder a base de tempo."""
+        self.intervalo = intervalo
+
+
+class ControladorRajada:
+    """
+    Amostragem adaptativa: o monitor roda no intervalo base e entra em
+    rajada (intervalo curto) por `janela` segundos quando CPU ou memória
+    passam do limite, ou quando se afastam mais de `limite_variacao` pontos
+    percentuais da média recente (média móvel exponencial com constante de
+    tempo igual ao intervalo base). Cada novo disparo durante a rajada
+    estende a janela; sem disparos, volta ao intervalo base.
+
+    Args:
+        intervalo_base (float): intervalo normal, em segundos.
+        intervalo_rajada (float): intervalo durante a rajada.
+        janela (float): duração da rajada após o último disparo, em segundos.
+        limite_cpu (float): CPU (%) que dispara a rajada.
+        limite_mem (float): memória (%) que dispara a rajada.
+        limite_variacao (float): desvio (pontos %) em relação à média recente.
+    """
+
+    def __init__(
+        self,
+        intervalo_base,
+        intervalo_rajada,
+        janela=30.0,
+        limite_cpu=80.0,
+        limite_mem=90.0,
+        limite_variacao=20.0,
+    ):
+        self.intervalo_base = intervalo_base
+        self.intervalo_rajada = intervalo_rajada
+        self.janela = janela
+        self.limite_cpu = limite_cpu
+        self.limite_mem = limite_mem
+        self.limite_variacao = limite_variacao
+        self._ate = 0.0
+        self._media = None
+        self._ultimo = None
+        self.rajadas = 0
+        self.segundos_em_rajada = 0.0
+
+    def avaliar(self, leitura):
+        """Recebe a leitura do tick e retorna o intervalo até o próximo."""
+        agora = time.monotonic()
+        cpu = leitura.get("cpu_percent") or 0.0
+        mem = leitura.get("mem_percent") or 0.0
+
+        disparou = cpu >= self.limite_cpu or mem >= self.limite_mem
+        if self._media is None:
+            self._media = [cpu, mem]
+        else:
+            dt = agora - self._ultimo
+            if self.em_rajada(self._ultimo):
+                self.segundos_em_rajada += dt
+            desvio = max(abs(cpu - self._media[0]), abs(mem - self._media[1]))
+            disparou = disparou or desvio >= self.limite_variacao
+            alfa = min(1.0, dt / self.intervalo_base)
+            self._media[0] += alfa * (cpu - self._media[0])
+            self._media[1] += alfa * (mem - self._media[1])
+        self._ultimo = agora
+
+        if disparou:
+            if not self.em_rajada(agora):
+                self.rajadas += 1
+            self._ate = agora + self.janela
+        return self.intervalo_rajada if self.em_rajada(agora) else self.intervalo_base
+
+    def em_rajada(self, instante):
+        return instante < self._ate
+
+
+class EscritorAssincrono:
+    """
+    Thread que drena uma fila limitada de amostras e as grava em lotes no sink.
+
+    O laço de coleta só faz `enviar()`, que nunca bloqueia: se a fila estiver
+    cheia a amostra é descartada e contabilizada em `descartadas`.
+
+    Uma falha do sink (disco cheio, SQLite travado, agregador fora do ar) não
+    derruba a thread: o lote é perdido, contado em `perdidas_erro`, e o erro
+    vai para o stderr; a gravação continua com os lotes seguintes.
+
+    Args:
+        sink: objeto com os métodos escrever(lista), flush() e fechar().
+        tamanho_fila (int): capacidade máxima da fila.
+        lote (int): número de linhas que dispara um flush.
+        flush_segundos (float): tempo máximo entre dois flushes (> 0).
+    """
+
+    def __init__(self, sink, tamanho_fila=10000, lote=100, flush_segundos=2.0):
+        if not flush_segundos > 0:
+            # Com 0 o laço da thread nunca espera na fila e ocupa uma CPU inteira
+            raise ValueError(f"flush_segundos deve ser maior que zero (recebido: {flush_segundos})")
+        self.sink = sink
+        self.lote = max(1, lote)
+        self.flush_segundos = flush_segundos
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.enviadas = 0
+        self.gravadas = 0
+        self.descartadas = 0
+        self.erros_escrita = 0
+        self.perdidas_erro = 0
+        self.profundidade_max = 0
+        self.flushes = 0
+        self.tempo_escrita = 0.0
+        self.tempo_flush = 0.0
+        self.flush_max = 0.0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="escritor", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def enviar(self, amostra):
+        try:
+            self.fila.put_nowait(amostra)
+            self.enviadas += 1
+        except queue.Full:
+            self.descartadas += 1
+            return False
+        profundidade = self.fila.qsize()
+        if profundidade > self.profundidade_max:
+            self.profundidade_max = profundidade
+        return True
+
+    def _executar(self):
+        pendentes = []
+        ultimo_flush = time.monotonic()
+        while True:
+            limite = ultimo_flush + self.flush_segundos
+            timeout = max(0.0, limite - time.monotonic())
+            try:
+                pendentes.append(self.fila.get(timeout=timeout))
+                # Drena o que já estiver na fila sem esperar de novo
+                while len(pendentes) < self.lote:
+                    pendentes.append(self.fila.get_nowait())
+            except queue.Empty:
+                pass
+
+            agora = time.monotonic()
+            if pendentes and (len(pendentes) >= self.lote or agora >= limite):
+                self._gravar(pendentes)
+                pendentes = []
+                ultimo_flush = agora
+            elif agora >= limite:
+                ultimo_flush = agora
+
+            if self._parar.is_set() and self.fila.empty():
+                break
+
+        if pendentes:
+            self._gravar(pendentes)
+
+    def _gravar(self, pendentes):
+        t0 = time.perf_counter()
+        try:
+            self.sink.escrever(pendentes)
+            t1 = time.perf_counter()
+            self.sink.flush()
+        except Exception as e:
+            self.erros_escrita += 1
+            self.perdidas_erro += len(pendentes)
+            print(
+                f"Erro ao gravar {len(pendentes)} amostras ({type(e).__name__}: {e}); "
+                f"{self.perdidas_erro} perdidas até agora",
+                file=sys.stderr,
+            )
+            return
+        t2 = time.perf_counter()
+        self.tempo_escrita += t1 - t0
+        self.tempo_flush += t2 - t1
+        self.flush_max = max(self.flush_max, t2 - t0)
+        self.gravadas += len(pendentes)
+        self.flushes += 1
+
+    def encerrar(self, timeout=10.0):
+        """Sinaliza o fim, espera a fila ser drenada e fecha o sink."""
+        self._parar.set()
+        self._thread.join(timeout)
+        self.sink.fechar()
+
+    def estatisticas(self):
+        return {
+            "enviadas": self.enviadas,
+            "gravadas": self.gravadas,
+            "descartadas": self.descartadas,
+            "erros_escrita": self.erros_escrita,
+            "perdidas_erro": self.perdidas_erro,
+            "profundidade_fila": self.fila.qsize(),
+            "profundidade_max": self.profundidade_max,
+            "flushes": self.flushes,
+            "escrita_ms": round(self.tempo_escrita * 1000, 1),
+            "flush_ms": round(self.tempo_flush * 1000, 1),
+            "flush_max_ms": round(self.flush_max * 1000, 2),
+        }
+
+
+class Histograma:
+    """Histograma de latências com buckets fixos (em ms), barato de atualizar."""
+
+    LIMITES_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000]
+
+    def __init__(self):
+        self.contagens = [0] * (len(self.LIMITES_MS) + 1)
+        self.total = 0
+        self.maximo = 0.0
+
+    def registrar(self, ms):
+        self.contagens[bisect.bisect_left(self.LIMITES_MS, ms)] += 1
+        self.total += 1
+        if ms > self.maximo:
+            self.maximo = ms
+
+    def percentil(self, p):
+        """Limite superior do bucket que contém o percentil p (aproximado)."""
+        if not self.total:
+            return 0.0
+        alvo = self.total * p / 100
+        acumulado = 0
+        for i, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                # O limite do bucket nunca passa do máximo observado
+                return min(self.LIMITES_MS[i], round(self.maximo, 3)) if i < len(self.LIMITES_MS) else round(self.maximo, 3)
+        return self.maximo
+
+    def formatar(self):
+        linhas = []
+        for i, contagem in enumerate(self.contagens):
+            if not contagem:
+                continue
+            limite = f"<= {self.LIMITES_MS[i]} ms" if i < len(self.LIMITES_MS) else f"> {self.LIMITES_MS[-1]} ms"
+            barra = "#" * max(1, round(40 * contagem / self.total))
+            linhas.append(f"  {limite:>12} {contagem:>8} {barra}")
+        return "\n".join(linhas)
+
+
+class AutoInstrumentacao:
+    """
+    Mede o custo do próprio monitor: latência de cada tick de coleta
+    (histograma), fração de CPU gasta pela thread de coleta e pelo processo
+    inteiro (inclui escritor, HTTP...) e o tempo de escrita/flush do escritor.
+
+    Com `intervalo_relatorio`, grava a cada N segundos uma linha na tabela
+    lateral <output_path>_overhead.csv (colunas em CAMPOS_OVERHEAD). As linhas
+    passam por um EscritorAssincrono próprio: o tick de coleta só enfileira,
+    sem I/O de disco.
+
+    Args:
+        escritor (EscritorAssincrono): fonte dos tempos de escrita e da fila.
+        intervalo_relatorio (float): período da tabela lateral (0 = sem tabela).
+        escritor_tabela (EscritorAssincrono): destino das linhas da tabela lateral.
+    """
+
+    def __init__(self, escritor, intervalo_relatorio=0, escritor_tabela=None):
+        self.escritor = escritor
+        self.intervalo_relatorio = intervalo_relatorio
+        self.escritor_tabela = escritor_tabela
+        self.histograma = Histograma()
+        self._janela = Histograma()
+        self._inicio = self._marco()
+        self._ultimo_relatorio = self._inicio
+
+    @staticmethod
+    def _marco(estatisticas=None):
+        # (relógio, CPU da thread de coleta, CPU do processo, estatísticas do escritor)
+        return (time.monotonic(), time.thread_time(), time.process_time(), estatisticas or {})
+
+    def registrar_tick(self, segundos):
+        ms = segundos * 1000
+        self.histograma.registrar(ms)
+        self._janela.registrar(ms)
+        if self.escritor_tabela is not None and time.monotonic() - self._ultimo_relatorio[0] >= self.intervalo_relatorio:
+            self._relatar()
+
+    def _cpu(self, desde):
+        wall, thread, processo, _ = desde
+        decorrido = time.monotonic() - wall
+        if decorrido <= 0:
+            return 0.0, 0.0
+        return (
+            round((time.thread_time() - thread) / decorrido * 100, 2),
+            round((time.process_time() - processo) / decorrido * 100, 2),
+        )
+
+    def _relatar(self):
+        est = self.escritor.estatisticas()
+        anterior = self._ultimo_relatorio[3]
+        cpu_coleta, cpu_processo = self._cpu(self._ultimo_relatorio)
+        self.escritor_tabela.enviar({
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ticks": self._janela.total,
+            "latencia_p50_ms": self._janela.percentil(50),
+            "latencia_p99_ms": self._janela.percentil(99),
+            "latencia_max_ms": round(self._janela.maximo, 3),
+            "cpu_coleta_percent": cpu_coleta,
+            "cpu_processo_percent": cpu_processo,
+            "escrita_ms": round(est["escrita_ms"] - anterior.get("escrita_ms", 0), 1),
+            "flush_ms": round(est["flush_ms"] - anterior.get("flush_ms", 0), 1),
+            "profundidade_fila": est["profundidade_fila"],
+            "descartadas": est["descartadas"],
+        })
+        self._janela = Histograma()
+        self._ultimo_relatorio = self._marco(est)
+
+    def resumo(self):
+        cpu_coleta, cpu_processo = self._cpu(self._inicio)
+        est = self.escritor.estatisticas()
+        h = self.histograma
+        return (
+            f"Overhead do monitor: latência por tick p50 {h.percentil(50)} ms, "
+            f"p99 {h.percentil(99)} ms, máx {h.maximo:.3f} ms\n"
+            f"CPU: coleta {cpu_coleta}% | processo inteiro {cpu_processo}% | "
+            f"escrita {est['escrita_ms']} ms, flush {est['flush_ms']} ms "
+            f"(máx por lote {est['flush_max_ms']} ms)\n"
+            f"Histograma de latência da coleta:\n{h.formatar()}"
+        )
+
+    def fechar(self):
+        if self.escritor_tabela is not None:
+            self.escritor_tabela.encerrar()
+
+
+def formatar_timestamp(instante, intervalo):
+    """Usa milissegundos quando o intervalo de coleta é menor que 1 segundo."""
+    if intervalo < 1:
+        return instante.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    return instante.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def coletar_dados(
+    intervalo=5,
+    output_path="/data/historico.csv",
+    coletor="psutil",
+    sink="csv,stdout",
+    lote=100,
+    flush_segundos=2.0,
+    tamanho_fila=10000,
+    top_processos=0,
+    contadores=False,
+    retencao_horas=0,
+    rollups=False,
+    http_porta=0,
+    http_host="127.0.0.1",
+    tamanho_buffer=300,
+    shm_nome=None,
+    shm_capacidade=4096,
+    rajada_intervalo=0,
+    rajada_janela=30.0,
+    rajada_cpu=80.0,
+    rajada_mem=90.0,
+    rajada_variacao=20.0,
+    instrumentacao_segundos=0,
+    agregador_url="tcp://127.0.0.1:9400",
+    host_id=None,
+):
     """
     Coleta o uso de CPU e memória em intervalos regulares e salva em um CSV.
 
+    A gravação acontece em uma thread separada (ver EscritorAssincrono), para
+    que o I/O não interfira no ritmo da coleta, e os ticks seguem um
+    AgendadorDeadline, sem deriva.
+
     Args:
-        intervalo (int): intervalo de coleta em segundos.
+        intervalo (float): intervalo de coleta em segundos (aceita frações, ex.: 0.02).
         output_path (str): caminho do arquivo CSV de saída.
+        coletor (str): "psutil", "procfs" (leitura direta de /proc, para alta
+            frequência) ou "cgroup" (métricas do container relativas aos limites).
+        sink (str): destinos separados por vírgula: csv, sqlite, serie, rede,
+            stdout, none. "rede" transforma o monitor em agente de um
+            agregador (ver agregador.py).
+        lote (int): número de linhas por flush.
+        flush_segundos (float): tempo máximo entre flushes.
+        tamanho_fila (int): capacidade da fila entre coleta e gravação.
+        top_processos (int): se > 0, grava também os N processos com maior CPU
+            e maior RSS de cada tick em <output_path>_processos.csv, com o
+            custo do rastreador naquele tick.
+        contadores (bool): acrescenta CPU por núcleo, load average, swap e
+            taxas de disco e rede (ver ColetorContadores e esquema.py).
+        retencao_horas (float): se > 0, o CSV bruto mantém só as últimas N horas.
+        rollups (bool): mantém historico_1m/5m/1h.csv com min/max/mean/p95/count.
+        http_porta (int): se > 0, expõe /metrics (Prometheus), /ultima e
+            /amostras (JSON) com as últimas `tamanho_buffer` amostras em memória.
+        http_host (str): interface do servidor HTTP.
+        tamanho_buffer (int): amostras mantidas em memória para o HTTP.
+        shm_nome (str): se informado, publica as amostras em um ring buffer de
+            memória compartilhada com esse nome (ver memoria_compartilhada.py).
+        shm_capacidade (int): amostras no ring buffer compartilhado.
+        rajada_intervalo (float): se > 0, ativa a amostragem adaptativa (ver
+            ControladorRajada): esse é o intervalo durante as rajadas, e cada
+            amostra ganha a coluna intervalo_s com o intervalo que a produziu.
+        rajada_janela, rajada_cpu, rajada_mem, rajada_variacao: parâmetros
+            do ControladorRajada.
+        instrumentacao_segundos (float): se > 0, grava a cada N segundos o
+            overhead do próprio monitor (latência por tick, CPU, escrita) em
+            <output_path>_overhead.csv. O resumo do Ctrl+C sai sempre.
+        agregador_url (str): endereço do agregador usado pelo sink "rede".
+        host_id (str): nome deste host nos dados do agregador (padrão: hostname).
     """
     #os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    arquivo_existe = os.path.isfile(output_path)
+    fonte = criar_coletor(coletor)
+    extras = ColetorContadores() if contadores else None
+    campos = CAMPOS + fonte.campos_extras() + (extras.campos() if extras else [])
+    controlador = None
+    if rajada_intervalo > 0:
+        controlador = ControladorRajada(
+            intervalo, rajada_intervalo, rajada_janela, rajada_cpu, rajada_mem, rajada_variacao
+        )
+        campos.append("intervalo_s")
+    # Timestamps com ms se qualquer um dos intervalos for menor que 1 s
+    menor_intervalo = min(intervalo, rajada_intervalo) if controlador else intervalo
+    destino = criar_sink(
+        sink,
+        output_path,
+        campos,
+        retencao_segundos=retencao_horas * 3600 or None,
+        indice_passo=PASSO_INDICE,
+        agregador_url=agregador_url,
+        host_id=host_id,
+    )
+    if rollups:
+        destino = SinkMultiplo([destino, AgregadorRollups(output_path, campos)])
+    escritor = EscritorAssincrono(
+        destino,
+        tamanho_fila=tamanho_fila,
+        lote=lote,
+        flush_segundos=flush_segundos,
+    ).iniciar()
+    if "csv" in sink:
+        gravar_esquema(output_path, campos)
 
-    with open(output_path, mode="a", newline="", encoding="utf-8") as csvfile:
-        campos = ["timestamp", "cpu_percent", "mem_percent"]
-        writer = csv.DictWriter(csvfile, fieldnames=campos)
+    rastreador = escritor_processos = None
+    if top_processos > 0:
+        rastreador = RastreadorProcessos(top_n=top_processos)
+        raiz, ext = os.path.splitext(output_path)
+        escritor_processos = EscritorAssincrono(
+            criar_sink("csv", f"{raiz}_processos{ext}", CAMPOS_PROCESSOS),
+            tamanho_fila=tamanho_fila,
+            lote=lote,
+            flush_segundos=flush_segundos,
+        ).iniciar()
 
-        # Cria cabeçalho se o arquivo for novo
-        if not arquivo_existe:
-            writer.writeheader()
+    buffer = servidor = None
+    if http_porta:
+        from servidor_metricas import BufferAmostras, iniciar_servidor
 
-        print(f"⏱️ Iniciando coleta de métricas (a cada {intervalo}s)... Pressione Ctrl+C para parar.\n")
-#
-        try:
-            while True:
-                cpu_percent = psutil.cpu_percent(interval=None)
-                mem_percent = psutil.virtual_memory().percent
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                writer.writerow({
-                    "timestamp": timestamp,
-                    "cpu_percent": cpu_percent,
-                    "mem_percent": mem_percent
-                })
-                csvfile.flush()  # garante gravação imediata
-
-                print(f"{timestamp} | CPU: {cpu_percent:.1f}% | MEM: {mem_percent:.1f}%")
-                time.sleep(intervalo)
-
-        except KeyboardInterrupt:
-            print("\nColeta encerrada pelo usuário.")
-            pass
+        buffer = BufferAmostras(tamanho_buffer)
+        servidor = iniciar_servidor(buffer, http_porta, http_host, escritor.estatisticas)
+        print(f"Métricas em http://{http_host}:{http_porta}/metrics")
+
+    publicador = None
+    if shm_nome:
+        from memoria_compartilhada import PublicadorAmostras
+
+        publicador = PublicadorAmostras(campos, nome=shm_nome, capacidade=shm_capacidade)
+        print(f"Ring buffer compartilhado: /dev/shm/{shm_nome} ({shm_capacidade} amostras)")
+
+    escritor_overhead = None
+    if instrumentacao_segundos > 0:
+        raiz, ext = os.path.splitext(output_path)
+        # Uma linha a cada N segundos: grava cada uma assim que chega
+        escritor_overhead = EscritorAssincrono(
+            criar_sink("csv", f"{raiz}_overhead{ext}", CAMPOS_OVERHEAD),
+            tamanho_fila=tamanho_fila,
+            lote=1,
+            flush_segundos=flush_segundos,
+        ).iniciar()
+    instrumentacao = AutoInstrumentacao(escritor, instrumentacao_segundos, escritor_overhead)
+
+    print(f"⏱️ Iniciando coleta de métricas (a cada {intervalo}s)... Pressione Ctrl+C para parar.\n")
+
+    agendador = AgendadorDeadline(intervalo)
+    perdidos = 0
+    try:
+        while True:
+            inicio_tick = time.perf_counter()
+            leitura = fonte.ler()
+            timestamp = formatar_timestamp(datetime.now(), menor_intervalo)
+
+            amostra = {"timestamp": timestamp, "ticks_perdidos": perdidos}
+            amostra.update(leitura)
+            if extras is not None:
+                amostra.update(extras.ler())
+            if controlador is not None:
+                amostra["intervalo_s"] = agendador.intervalo
+            escritor.enviar(amostra)
+            if buffer is not None:
+                buffer.adicionar(amostra)
+            if publicador is not None:
+                publicador.publicar(amostra)
+            if rastreador is not None:
+                processos = rastreador.ler()
+                custo = round(rastreador.ultimo_custo_ms, 3)
+                for proc in processos:
+                    proc["timestamp"] = timestamp
+                    proc["custo_rastreador_ms"] = custo
+                    escritor_processos.enviar(proc)
+            if controlador is not None:
+                agendador.ajustar(controlador.avaliar(leitura))
+            instrumentacao.registrar_tick(time.perf_counter() - inicio_tick)
+            perdidos = agendador.esperar()
+
+    except KeyboardInterrupt:
+        print("\nColeta encerrada pelo usuário.")
+    finally:
+        if servidor is not None:
+            servidor.shutdown()
+        if publicador is not None:
+            publicador.fechar()
+        fonte.fechar()
+        escritor.encerrar()
+        est = escritor.estatisticas()
+        print(
+            f"Amostras: {est['enviadas']} enviadas, {est['gravadas']} gravadas, "
+            f"{est['descartadas']} descartadas, {est['perdidas_erro']} perdidas em erros de escrita | fila máx: {est['profundidade_max']} "
+            f"| flushes: {est['flushes']} | ticks perdidos: {agendador.perdidos_total}"
+        )
+        print(instrumentacao.resumo())
+        instrumentacao.fechar()
+        if controlador is not None:
+            print(
+                f"Rajadas: {controlador.rajadas} | tempo em rajada: "
+                f"{controlador.segundos_em_rajada:.1f}s"
+            )
+        if rastreador is not None:
+            escritor_processos.encerrar()
+            est_proc = rastreador.estatisticas()
+            print(
+                f"Processos: custo por tick {est_proc['custo_medio_ms']} ms (máx "
+                f"{est_proc['custo_max_ms']} ms) | CPU do rastreador: {est_proc['cpu_total_ms']} ms "
+                f"em {est_proc['ticks']} ticks | descartados: {escritor_processos.descartadas}"
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,227 @@
+# app/perfil.py
+"""
+Perfil de tempo (cProfile) e de memória (tracemalloc) de uma ação do main.py.
+
+As ações marcam suas etapas com `etapa()`:
+
+    with etapa("carregar"):
+        df = pd.read_csv(...)
+
+Fora de um perfil, `etapa()` não faz nada (custo desprezível). Com perfil
+ativo, cada etapa registra a duração e, com --trace-memory, o pico de
+memória alocada dentro dela.
+
+Relatórios (em `diretorio`, nomes estáveis para comparar execuções):
+
+    perfil_<acao>_<data>.txt     etapas, hotspots por tempo acumulado e
+                                 pelo tempo próprio, linhas com mais memória
+                                 ainda alocada no fim de uma etapa
+    perfil_<acao>_<data>.prof    estatísticas brutas do cProfile (pstats,
+                                 snakeviz...)
+    perfil_<acao>.jsonl          um resumo por execução (etapas e pico de
+                                 memória), para comparar com as anteriores
+"""
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# Etapas registradas durante o perfil ativo (None = nenhum perfil)
+_etapas = None
+# (memória atual, snapshot) do fim de etapa com mais memória alocada
+_maior_snapshot = None
+# Maior pico entre as etapas: cada etapa zera o pico do tracemalloc
+_pico_execucao = 0
+# cProfile ativo (pausado durante os snapshots) e o tempo gasto neles
+_perfilador = None
+_custo_medicao = 0.0
+
+
+@contextmanager
+def etapa(nome):
+    """Marca uma etapa da ação (carregar, escalar, ajustar, plotar...)."""
+    global _maior_snapshot, _pico_execucao
+    if _etapas is None:
+        yield
+        return
+    memoria = tracemalloc.is_tracing()
+    if memoria:
+        # Guarda o pico até aqui (etapa anterior ou código fora das etapas) antes de zerar
+        _pico_execucao = max(_pico_execucao, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro = {"etapa": nome, "segundos": round(time.perf_counter() - t0, 4)}
+        if memoria:
+            atual, pico = tracemalloc.get_traced_memory()
+            _pico_execucao = max(_pico_execucao, pico)
+            registro["pico_mb"] = round(pico / 2**20, 2)
+            registro["final_mb"] = round(atual / 2**20, 2)
+            # Snapshot do fim da etapa com mais memória viva: mostra quem
+            # segura a memória, não as alocações temporárias já liberadas
+            if _maior_snapshot is None or atual > _maior_snapshot[0]:
+                _maior_snapshot = (atual, _snapshot())
+        _etapas.append(registro)
+
+
+def perfil_ativo():
+    """Se há um perfil em andamento (cProfile e tracemalloc só existem neste processo)."""
+    return _etapas is not None
+
+
+def _snapshot():
+    """Snapshot do tracemalloc fora do cProfile, para não distorcer os hotspots."""
+    global _custo_medicao
+    t0 = time.perf_counter()
+    if _perfilador is not None:
+        _perfilador.disable()
+    try:
+        return tracemalloc.take_snapshot()
+    finally:
+        if _perfilador is not None:
+            _perfilador.enable()
+        _custo_medicao += time.perf_counter() - t0
+
+
+def _versoes():
+    versoes = {"python": platform.python_version()}
+    for modulo in ("numpy", "pandas", "sklearn", "matplotlib"):
+        try:
+            versoes[modulo] = __import__(modulo).__version__
+        except ImportError:
+            pass
+    return versoes
+
+
+def perfilar(acao, funcao, profile=False, trace_memory=False, diretorio="/data", argumentos=None, top=30):
+    """
+    Executa `funcao()` sob cProfile e/ou tracemalloc e grava os relatórios.
+
+    Args:
+        acao (str): nome da ação (entra no nome dos arquivos).
+        funcao (callable): ação a executar, sem argumentos.
+        profile (bool): ativa o cProfile.
+        trace_memory (bool): ativa o tracemalloc.
+        diretorio (str): onde gravar os relatórios.
+        argumentos (dict): argumentos da execução, gravados no cabeçalho.
+        top (int): linhas de cada tabela do relatório.
+
+    Returns:
+        o retorno de `funcao()`.
+    """
+    global _etapas, _maior_snapshot, _pico_execucao, _perfilador, _custo_medicao
+    if not (profile or trace_memory):
+        return funcao()
+
+    _etapas = []
+    _maior_snapshot = None
+    _pico_execucao = 0
+    _custo_medicao = 0.0
+    perfilador = _perfilador = cProfile.Profile() if profile else None
+    if trace_memory:
+        tracemalloc.start(10)
+    inicio = datetime.now()
+    t0 = time.perf_counter()
+    if perfilador is not None:
+        perfilador.enable()
+    try:
+        return funcao()
+    finally:
+        if perfilador is not None:
+            perfilador.disable()
+        _perfilador = None
+        # Sem o tempo dos snapshots: execuções com e sem --trace-memory comparáveis
+        total = time.perf_counter() - t0 - _custo_medicao
+        pico_total = None
+        if trace_memory:
+            atual, pico = tracemalloc.get_traced_memory()
+            pico_total = max(_pico_execucao, pico)
+            if _maior_snapshot is None or atual > _maior_snapshot[0]:
+                _maior_snapshot = (atual, tracemalloc.take_snapshot())
+            tracemalloc.stop()
+        etapas, snapshot = _etapas, _maior_snapshot
+        _etapas = _maior_snapshot = None
+        _gravar_relatorios(
+            acao, inicio, total, etapas, perfilador, snapshot, pico_total,
+            diretorio, argumentos or {}, top,
+        )
+
+
+def _gravar_relatorios(acao, inicio, total, etapas, perfilador, snapshot, pico_total, diretorio, argumentos, top):
+    os.makedirs(diretorio, exist_ok=True)
+    base = os.path.join(diretorio, f"perfil_{acao}_{inicio.strftime('%Y%m%d_%H%M%S')}")
+    saida = io.StringIO()
+    saida.write(f"Ação: {acao} | início: {inicio:%Y-%m-%d %H:%M:%S} | total: {total:.3f}s\n")
+    saida.write(f"Versões: {json.dumps(_versoes())}\n")
+    saida.write(f"Argumentos: {json.dumps(argumentos, ensure_ascii=False, default=str)}\n\n")
+
+    saida.write("== Etapas ==\n")
+    com_memoria = pico_total is not None
+    saida.write(f"{'etapa':<20} {'segundos':>10} {'% total':>8}" + (f" {'pico MB':>9} {'final MB':>9}" if com_memoria else "") + "\n")
+    for registro in etapas:
+        linha = f"{registro['etapa']:<20} {registro['segundos']:>10.3f} {100 * registro['segundos'] / total:>7.1f}%"
+        if com_memoria:
+            linha += f" {registro['pico_mb']:>9.2f} {registro['final_mb']:>9.2f}"
+        saida.write(linha + "\n")
+    fora = total - sum(r["segundos"] for r in etapas)
+    saida.write(f"{'(fora das etapas)':<20} {fora:>10.3f} {100 * fora / total:>7.1f}%\n")
+    if com_memoria:
+        saida.write(f"Pico de memória alocada (tracemalloc): {pico_total / 2**20:.2f} MB\n")
+
+    if perfilador is not None:
+        perfilador.dump_stats(base + ".prof")
+        for ordem, titulo in (("cumulative", "tempo acumulado"), ("tottime", "tempo próprio")):
+            saida.write(f"\n== Hotspots por {titulo} ==\n")
+            stats = pstats.Stats(perfilador, stream=saida)
+            # Caminhos curtos: comparáveis entre máquinas e containers
+            stats.strip_dirs().sort_stats(ordem).print_stats(top)
+
+    if snapshot is not None:
+        atual, foto = snapshot
+        saida.write(
+            f"\n== Linhas com mais memória ainda alocada no fim de uma etapa ({atual / 2**20:.2f} MB) ==\n"
+            "(memória viva no fim da etapa com mais memória, não o pico por linha: alocações\n"
+            "temporárias liberadas dentro da etapa só aparecem no pico da tabela de etapas)\n"
+        )
+        filtros = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        for i, estatistica in enumerate(foto.filter_traces(filtros).statistics("lineno")[:top], 1):
+            quadro = estatistica.traceback[0]
+            # Relativo ao site-packages: comparável entre ambientes
+            arquivo = quadro.filename.split("site-packages" + os.sep)[-1]
+            saida.write(
+                f"{i:>3}. {estatistica.size / 2**20:>9.2f} MB {estatistica.count:>9} blocos  "
+                f"{arquivo}:{quadro.lineno}\n"
+            )
+
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(saida.getvalue())
+
+    resumo = {
+        "acao": acao,
+        "inicio": inicio.strftime("%Y-%m-%d %H:%M:%S"),
+        "total_s": round(total, 4),
+        "etapas": etapas,
+        "pico_mb": None if pico_total is None else round(pico_total / 2**20, 2),
+        "versoes": _versoes(),
+        "argumentos": argumentos,
+    }
+    with open(os.path.join(diretorio, f"perfil_{acao}.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(resumo, ensure_ascii=False, default=str) + "\n")
+
+    print("\nEtapas:")
+    for registro in etapas:
+        extra = f" | pico {registro['pico_mb']} MB" if com_memoria else ""
+        print(f"  {registro['etapa']:<20} {registro['segundos']:.3f}s{extra}")
+    print(f"Perfil salvo em {base}.txt" + (f" e {base}.prof" if perfilador is not None else ""))
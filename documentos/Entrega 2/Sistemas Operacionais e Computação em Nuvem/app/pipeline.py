@@ -0,0 +1,246 @@
+# app/pipeline.py
+"""
+Executa regressão linear, t-SNE e PCA em um único processo, lendo e
+pré-processando a base_unificada.csv uma vez só.
+
+As etapas formam um grafo de dependências:
+
+    carregar -> escalar -> regressao_linear
+                        -> tsne
+                        -> pca
+
+'carregar' mapeia só as colunas usadas do formato colunar (base_colunar.py),
+com as categorias já codificadas.
+
+Etapas "locais" rodam no processo principal, na ordem do grafo. Etapas
+marcadas com `pool` rodam em paralelo em um pool de processos criado com
+fork depois das etapas locais de que dependem: os workers herdam os dados já
+pré-processados (_CONTEXTO) sem cópia nem serialização, e só o resultado de
+cada etapa volta ao processo principal. Por isso uma etapa do pool só pode
+depender de etapas locais.
+
+Com --profile/--trace-memory (perfil.py) tudo roda no processo principal,
+sem pool: o cProfile, o tracemalloc e o registro das etapas não existem nos
+workers, e o relatório perderia justamente as etapas mais caras.
+
+Com um `cache` (dict mantido pelo chamador, ex.: a ação 'daemon'), os
+resultados das etapas locais são reaproveitados entre execuções enquanto o
+arquivo de entrada não mudar (mesmo tamanho e mtime).
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from sklearn.preprocessing import StandardScaler
+
+from base_colunar import ler_colunas, matriz
+from perfil import etapa, perfil_ativo
+
+# Importados antes do fork, para os workers já nascerem com sklearn e
+# matplotlib carregados
+import pca
+import regressao_linear
+import tsne
+
+
+# Dados compartilhados entre as etapas (herdados pelos workers no fork)
+_CONTEXTO = {}
+
+
+def _carregar(contexto, config):
+    # Só as colunas usadas pelas etapas finais, sem repetir
+    nomes = list(dict.fromkeys(
+        regressao_linear.FEATURES + [regressao_linear.TARGET] + tsne.COLUNAS_NUMERICAS + ["segmento"]
+    ))
+    return ler_colunas(config["input_path"], nomes, colunar=config["colunar"])
+
+
+def _escalar(contexto, config):
+    colunas = contexto["carregar"]
+    # Cada modelo tem o próprio scaler (o da regressão é salvo junto com o
+    # modelo), mas os dois saem das mesmas colunas já carregadas
+    scaler_regressao = StandardScaler()
+    return {
+        "X_regressao": scaler_regressao.fit_transform(matriz(colunas, regressao_linear.FEATURES)),
+        "y": colunas[regressao_linear.TARGET],
+        "scaler_regressao": scaler_regressao,
+        "X_visualizacao": StandardScaler().fit_transform(matriz(colunas, tsne.COLUNAS_NUMERICAS)),
+        "segmento": colunas["segmento"],
+    }
+
+
+def _regressao_linear(contexto, config):
+    dados = contexto["escalar"]
+    metricas = regressao_linear.ajustar_modelo(
+        dados["X_regressao"], dados["y"], dados["scaler_regressao"], config["modelo_path"]
+    )
+    return {chave: round(float(valor), 4) for chave, valor in metricas.items()}
+
+
+def _tsne(contexto, config):
+    dados = contexto["escalar"]
+    tsne.plotar_tsne(dados["X_visualizacao"], dados["segmento"], config["tsne_path"])
+    return config["tsne_path"]
+
+
+def _pca(contexto, config):
+    variancia = pca.plotar_pca(contexto["escalar"]["X_visualizacao"], config["pca_path"])
+    return [round(float(v), 4) for v in variancia]
+
+
+# nome -> (função, dependências, roda no pool)
+ETAPAS = {
+    "carregar": (_carregar, [], False),
+    "escalar": (_escalar, ["carregar"], False),
+    "regressao_linear": (_regressao_linear, ["escalar"], True),
+    "tsne": (_tsne, ["escalar"], True),
+    "pca": (_pca, ["escalar"], True),
+}
+
+
+def _com_dependencias(nomes):
+    """As etapas pedidas mais todas as suas dependências, em ordem topológica."""
+    ordem = []
+
+    def visitar(nome):
+        if nome not in ETAPAS:
+            raise ValueError(f"Etapa desconhecida: '{nome}'. Opções: {', '.join(ETAPAS)}")
+        if nome in ordem:
+            return
+        for dependencia in ETAPAS[nome][1]:
+            visitar(dependencia)
+        ordem.append(nome)
+
+    for nome in nomes:
+        visitar(nome)
+    return ordem
+
+
+def _executar_etapa(nome, config):
+    """Roda uma etapa sobre o _CONTEXTO; devolve (resultado, início, duração, pid)."""
+    funcao, _, no_pool = ETAPAS[nome]
+    inicio = time.time()
+    t0 = time.perf_counter()
+    if no_pool:
+        # As etapas finais marcam as próprias subetapas (ajustar, plotar...)
+        resultado = funcao(_CONTEXTO, config)
+    else:
+        with etapa(nome):
+            resultado = funcao(_CONTEXTO, config)
+    return resultado, inicio, time.perf_counter() - t0, os.getpid()
+
+
+def _criar_pool(trabalhadores):
+    # fork: os workers herdam o _CONTEXTO já preenchido (copy-on-write)
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(trabalhadores, mp_context=multiprocessing.get_context("fork"))
+    # Sem fork (Windows/macOS), os dados só são compartilhados entre threads
+    return ThreadPoolExecutor(trabalhadores)
+
+
+def executar_pipeline(
+    etapas=("regressao_linear", "tsne", "pca"),
+    input_path="/data/base_unificada.csv",
+    modelo_path="/data/modelo_regressao.pkl",
+    tsne_path="/data/tsne_visualizacao.png",
+    pca_path="/data/pca_visualizacao.png",
+    trabalhadores=None,
+    cache=None,
+    colunar=True,
+):
+    """
+    Executa as etapas pedidas (e suas dependências) e imprime o tempo de cada uma.
+
+    Args:
+        etapas (list): etapas finais: regressao_linear, tsne, pca.
+        input_path (str): base_unificada.csv.
+        modelo_path, tsne_path, pca_path (str): saídas de cada etapa (as
+            mesmas das ações isoladas).
+        trabalhadores (int): tamanho do pool (padrão: uma por etapa do pool,
+            limitado ao número de CPUs).
+        cache (dict): se informado, guarda e reaproveita as etapas locais.
+        colunar (bool): lê do formato colunar (False: direto do CSV).
+
+    Returns:
+        dict: resultado de cada etapa final.
+    """
+    config = {
+        "input_path": input_path,
+        "modelo_path": modelo_path,
+        "tsne_path": tsne_path,
+        "pca_path": pca_path,
+        "colunar": colunar,
+    }
+    ordem = _com_dependencias(etapas)
+    no_pool = [nome for nome in ordem if ETAPAS[nome][2]]
+    trabalhadores = trabalhadores or max(1, min(len(no_pool), os.cpu_count() or 1))
+
+    _CONTEXTO.clear()
+    tempos = {}
+    inicio_pipeline = time.time()
+    estado = os.stat(input_path)
+    assinatura = (os.path.abspath(input_path), estado.st_size, estado.st_mtime_ns)
+    if cache is not None and cache.get("assinatura") == assinatura:
+        for nome, resultado in cache["contexto"].items():
+            if nome in ordem:
+                _CONTEXTO[nome] = resultado
+                tempos[nome] = (inicio_pipeline, 0.0, None)
+    pendentes = [nome for nome in ordem if nome not in _CONTEXTO]
+    # Uma etapa só no pool não ganha nada com o fork: roda no processo principal
+    usar_pool = len(no_pool) > 1
+    if usar_pool and perfil_ativo():
+        print("Perfil ativo: etapas do pool rodam no processo principal, para entrarem no relatório.")
+        usar_pool = False
+    em_execucao = {}
+    pool = None
+    try:
+        while pendentes or em_execucao:
+            prontas = [n for n in pendentes if all(d in _CONTEXTO for d in ETAPAS[n][1])]
+            for nome in prontas:
+                pendentes.remove(nome)
+                if ETAPAS[nome][2] and usar_pool:
+                    if pool is None:
+                        pool = _criar_pool(trabalhadores)
+                    em_execucao[pool.submit(_executar_etapa, nome, config)] = nome
+                else:
+                    resultado, inicio, duracao, pid = _executar_etapa(nome, config)
+                    _CONTEXTO[nome] = resultado
+                    tempos[nome] = (inicio, duracao, pid)
+            if prontas and not em_execucao:
+                continue
+            if not em_execucao:
+                raise RuntimeError(f"Etapas com dependências não satisfeitas: {', '.join(pendentes)}")
+            concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidas:
+                nome = em_execucao.pop(futuro)
+                resultado, inicio, duracao, pid = futuro.result()
+                _CONTEXTO[nome] = resultado
+                tempos[nome] = (inicio, duracao, pid)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    total = time.time() - inicio_pipeline
+    print(f"\n{'etapa':<18} {'início (s)':>10} {'duração (s)':>12}  processo")
+    for nome in ordem:
+        inicio, duracao, pid = tempos[nome]
+        onde = "cache" if pid is None else "principal" if pid == os.getpid() else f"worker {pid}"
+        print(f"{nome:<18} {inicio - inicio_pipeline:>10.2f} {duracao:>12.2f}  {onde}")
+    soma = sum(duracao for _, duracao, _ in tempos.values())
+    print(
+        f"Total: {total:.2f}s de parede ({soma:.2f}s somando as etapas, "
+        f"{trabalhadores if usar_pool else 0} workers)"
+    )
+
+    resultados = {nome: _CONTEXTO[nome] for nome in ordem if ETAPAS[nome][2]}
+    if cache is not None:
+        if cache.get("assinatura") != assinatura:
+            cache.clear()
+            cache["assinatura"] = assinatura
+            cache["contexto"] = {}
+        cache["contexto"].update(
+            {nome: _CONTEXTO[nome] for nome in ordem if not ETAPAS[nome][2]}
+        )
+    _CONTEXTO.clear()
+    return resultados
@@ -0,0 +1,164 @@
+# app/regressao_grupos.py
+"""
+Regressão linear separada por grupo (empresa ou segmento), com as mesmas
+FEATURES e TARGET de regressao_linear.py.
+
+Em vez de um LinearRegression por grupo em um laço Python, todos os
+grupos são ajustados de uma vez sobre arrays NumPy:
+
+1. as features são normalizadas com a média/desvio de todas as linhas
+   (só para o condicionamento numérico);
+2. as médias de cada grupo saem de um np.bincount por coluna, e os
+   co-momentos centrados (XᵀX e Xᵀy de cada grupo, já centrados na média
+   do grupo) de um np.bincount por par de colunas: o custo é proporcional
+   às linhas, não ao número de grupos;
+3. as equações normais de todos os grupos são resolvidas juntas com a
+   pseudo-inversa empilhada (grupos x features x features), que dá a
+   mesma solução do LinearRegression de cada grupo, inclusive com
+   features constantes dentro do grupo.
+
+O modelo global (todas as linhas) sai da mesma conta com um grupo só e é
+usado pelos grupos com menos de `min_linhas` linhas de treino e pelos
+grupos desconhecidos na predição.
+
+Como no treinar_modelo(), 20% das linhas (sorteio com semente 42) ficam
+para teste; o MAE/RMSE/R² dos modelos por grupo é comparado com o do
+modelo global nas mesmas linhas. O artefato é um único .npz indexado pelo
+nome do grupo (ver modelo_compacto.py).
+"""
+import numpy as np
+
+from base_colunar import ler_categorias, ler_colunas, matriz
+from modelo_compacto import exportar_grupos
+from perfil import etapa
+from regressao_linear import FEATURES, TARGET
+
+
+GRUPOS = ("empresa", "segmento")
+
+
+def _ajustar_grupos(codigos, X, y, grupos):
+    """
+    Mínimos quadrados de cada grupo, todos de uma vez.
+
+    Args:
+        codigos (array): grupo de cada linha (0..grupos-1).
+        X (array): features normalizadas (linhas x d).
+        y (array): alvo.
+        grupos (int): número de grupos.
+
+    Returns:
+        (coef, vies, linhas): coef (grupos x d) e vies (grupos,) no espaço
+        de X; linhas de cada grupo.
+    """
+    Z = np.column_stack([X, y])
+    p = Z.shape[1]
+    linhas = np.bincount(codigos, minlength=grupos)
+    divisor = np.maximum(linhas, 1).astype(np.float64)
+    media = np.column_stack([
+        np.bincount(codigos, weights=Z[:, i], minlength=grupos) / divisor for i in range(p)
+    ])
+    # Segunda passada já centrada na média do grupo: sem cancelamento numérico
+    centrado = Z - media[codigos]
+    comomento = np.empty((grupos, p, p))
+    for i in range(p):
+        for j in range(i, p):
+            comomento[:, i, j] = comomento[:, j, i] = np.bincount(
+                codigos, weights=centrado[:, i] * centrado[:, j], minlength=grupos
+            )
+    d = p - 1
+    coef = np.einsum("gij,gj->gi", np.linalg.pinv(comomento[:, :d, :d], hermitian=True), comomento[:, :d, d])
+    vies = media[:, d] - np.einsum("gi,gi->g", media[:, :d], coef)
+    return coef, vies, linhas
+
+
+def _metricas(y, previsto):
+    erro = y - previsto
+    soma_total = ((y - y.mean()) ** 2).sum()
+    return {
+        "mae": float(np.abs(erro).mean()),
+        "rmse": float(np.sqrt((erro ** 2).mean())),
+        "r2": float(1 - (erro ** 2).sum() / soma_total) if soma_total > 0 else float("nan"),
+    }
+
+
+def treinar_por_grupo(
+    input_path="/data/base_unificada.csv",
+    grupo="empresa",
+    modelo_path=None,
+    min_linhas=20,
+    colunar=True,
+):
+    """
+    Ajusta um modelo por grupo e grava todos em um único .npz.
+
+    Args:
+        input_path (str): base_unificada.csv.
+        grupo (str): coluna que define os grupos: empresa ou segmento.
+        modelo_path (str): artefato de saída (padrão:
+            /data/modelo_regressao_<grupo>.npz).
+        min_linhas (int): linhas de treino mínimas para um grupo ter modelo
+            próprio; abaixo disso usa o global.
+        colunar (bool): lê do formato colunar (False: direto do CSV).
+
+    Returns:
+        dict: métricas de teste dos modelos por grupo e do global, e
+        quantos grupos têm modelo próprio.
+    """
+    if grupo not in GRUPOS:
+        raise ValueError(f"Grupo inválido: '{grupo}'. Opções: {', '.join(GRUPOS)}")
+    modelo_path = modelo_path or f"/data/modelo_regressao_{grupo}.npz"
+
+    with etapa("carregar"):
+        colunas = ler_colunas(input_path, FEATURES + [TARGET, grupo], colunar=colunar)
+        nomes = ler_categorias(input_path, grupo, colunar=colunar)
+        X = matriz(colunas, FEATURES)
+        y = np.asarray(colunas[TARGET], dtype=np.float64)
+        codigos = np.asarray(colunas[grupo], dtype=np.intp)
+
+    # Mesma proporção do treinar_modelo(): 20% para teste
+    teste = np.random.default_rng(42).random(len(y)) < 0.2
+    treino = ~teste
+
+    with etapa("ajustar"):
+        media_x = X[treino].mean(axis=0)
+        escala = X[treino].std(axis=0)
+        escala[escala == 0] = 1.0
+        X_norm = (X - media_x) / escala
+
+        # Linhas sem grupo (código -1) entram só no global
+        com_grupo = treino & (codigos >= 0)
+        coef, vies, linhas = _ajustar_grupos(codigos[com_grupo], X_norm[com_grupo], y[com_grupo], len(nomes))
+        coef_global, vies_global, _ = _ajustar_grupos(
+            np.zeros(treino.sum(), dtype=np.intp), X_norm[treino], y[treino], 1
+        )
+        proprio = linhas >= min_linhas
+
+        # De volta ao espaço original: y = X @ pesos + vies
+        pesos = coef / escala
+        vies = vies - pesos @ media_x
+        pesos_global = coef_global[0] / escala
+        vies_global = vies_global[0] - pesos_global @ media_x
+
+    with etapa("avaliar"):
+        # Tabela com uma linha extra (o global) para grupos sem modelo próprio
+        tabela_pesos = np.vstack([np.where(proprio[:, None], pesos, pesos_global), pesos_global])
+        tabela_vies = np.append(np.where(proprio, vies, vies_global), vies_global)
+        indice = np.where(codigos[teste] >= 0, codigos[teste], len(nomes))
+        previsto = np.einsum("ij,ij->i", X[teste], tabela_pesos[indice]) + tabela_vies[indice]
+        por_grupo = _metricas(y[teste], previsto)
+        global_ = _metricas(y[teste], X[teste] @ pesos_global + vies_global)
+
+    with etapa("salvar"):
+        exportar_grupos(
+            modelo_path, grupo, FEATURES, nomes, pesos, vies, linhas, proprio, pesos_global, vies_global
+        )
+
+    print(f"Grupos ({grupo}): {len(nomes)} | com modelo próprio (>= {min_linhas} linhas): {int(proprio.sum())}")
+    if proprio.any():
+        print(f"Linhas de treino por grupo com modelo: mediana {int(np.median(linhas[proprio]))}, mínimo {int(linhas[proprio].min())}")
+    print(f"{'teste':<12} {'MAE':>10} {'RMSE':>10} {'R²':>8}")
+    for nome, m in (("por grupo", por_grupo), ("global", global_)):
+        print(f"{nome:<12} {m['mae']:>10.2f} {m['rmse']:>10.2f} {m['r2']:>8.3f}")
+    print(f"Modelos salvos em {modelo_path}")
+    return {"por_grupo": por_grupo, "global": global_, "grupos": len(nomes), "com_modelo": int(proprio.sum())}
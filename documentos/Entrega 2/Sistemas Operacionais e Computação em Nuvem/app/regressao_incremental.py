@@ -0,0 +1,274 @@
+# app/regressao_incremental.py
+"""
+Treino incremental e exato da regressão linear (mesmas FEATURES e TARGET de
+regressao_linear.py) a partir de estatísticas suficientes.
+
+O CSV é lido em blocos de bytes, sem carregar o arquivo inteiro, e cada
+bloco atualiza, para Z = [X | y]:
+
+    n           linhas acumuladas
+    media       média de cada coluna de Z
+    comomento   (Z - media)ᵀ (Z - media), o XᵀX / Xᵀy centrado
+
+Os blocos são combinados com a fórmula de Chan (estável mesmo com milhões
+de linhas). Dessas estatísticas saem exatamente o StandardScaler (médias e
+variâncias) e a LinearRegression (equações normais no espaço normalizado)
+de um ajuste completo sobre todas as linhas, a menos do arredondamento de
+ponto flutuante.
+
+O estado fica em um JSON (estado_path) com as estatísticas e a posição (em
+bytes) até onde o CSV já foi lido. Numa nova execução só as linhas depois
+dessa posição são lidas: o tempo é proporcional às linhas novas. O arquivo
+deve crescer só por acréscimo no fim; se encolher, o cabeçalho mudar ou os
+últimos bytes já lidos forem diferentes, tudo é refeito do zero.
+
+Diferenças para o treinar_modelo():
+- ajusta com todas as linhas (não separa 20% para teste); as métricas
+  (RMSE e R²) são as do próprio treino, calculadas das estatísticas;
+- linhas com valores vazios ou não numéricos nas colunas usadas são
+  descartadas (e contadas);
+- uma linha final sem quebra de linha não é lida: o escritor pode estar no
+  meio dela (até no último campo). A posição salva fica no início dela, e a
+  próxima execução a lê inteira quando a quebra de linha chegar.
+"""
+import hashlib
+import io
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from modelo_compacto import caminho_compacto, exportar
+from perfil import etapa
+from regressao_linear import FEATURES, TARGET
+
+
+VERSAO = 1
+BLOCO_BYTES = 64 << 20
+# Bytes antes da posição lida que identificam o arquivo já processado
+CAUDA = 4096
+
+
+class Estatisticas:
+    """Estatísticas suficientes de Z = [X | y], atualizáveis por blocos."""
+
+    def __init__(self, colunas):
+        self.n = 0
+        self.media = np.zeros(colunas)
+        self.comomento = np.zeros((colunas, colunas))
+
+    def atualizar(self, Z):
+        m = len(Z)
+        if m == 0:
+            return
+        media_bloco = Z.mean(axis=0)
+        centrado = Z - media_bloco
+        n = self.n + m
+        delta = media_bloco - self.media
+        self.comomento += centrado.T @ centrado + np.outer(delta, delta) * (self.n * m / n)
+        self.media += delta * (m / n)
+        self.n = n
+
+    def resolver(self):
+        """
+        Resolve o StandardScaler + LinearRegression de um ajuste completo.
+
+        Returns:
+            dict: media, var, escala (das FEATURES), coef (no espaço
+            normalizado), intercepto, posto, rmse e r2 do treino.
+        """
+        d = len(self.media) - 1
+        var = np.diag(self.comomento)[:d] / self.n
+        # Como o StandardScaler: variância zero vira escala 1
+        escala = np.where(var > 0, np.sqrt(var), 1.0)
+        cxx = self.comomento[:d, :d] / np.outer(escala, escala)
+        cxy = self.comomento[:d, d] / escala
+        cyy = self.comomento[d, d]
+        # Pseudo-inversa das equações normais = solução de norma mínima do
+        # ajuste direto, também quando há colunas colineares
+        coef, _, posto, _ = np.linalg.lstsq(cxx, cxy, rcond=None)
+        sse = max(cyy - coef @ cxy, 0.0)
+        return {
+            "media": self.media[:d],
+            "var": var,
+            "escala": escala,
+            "coef": coef,
+            # Com X normalizado (média zero) o intercepto é a média de y
+            "intercepto": float(self.media[d]),
+            "posto": int(posto),
+            "rmse": float(np.sqrt(sse / self.n)),
+            "r2": float(1 - sse / cyy) if cyy > 0 else float("nan"),
+        }
+
+    def para_dict(self):
+        return {"n": self.n, "media": self.media.tolist(), "comomento": self.comomento.tolist()}
+
+    @classmethod
+    def de_dict(cls, dados):
+        estatisticas = cls(len(dados["media"]))
+        estatisticas.n = dados["n"]
+        estatisticas.media = np.array(dados["media"], dtype=np.float64)
+        estatisticas.comomento = np.array(dados["comomento"], dtype=np.float64)
+        return estatisticas
+
+
+def _cauda(f, posicao):
+    inicio = max(0, posicao - CAUDA)
+    f.seek(inicio)
+    return hashlib.sha256(f.read(posicao - inicio)).hexdigest()
+
+
+def _ler_estado(estado_path, input_path, cabecalho):
+    """Estado salvo, se ainda descreve um prefixo do CSV atual; senão None."""
+    try:
+        with open(estado_path, encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if estado.get("versao") != VERSAO or estado.get("colunas") != FEATURES + [TARGET]:
+        return None
+    if os.path.abspath(input_path) != estado["origem"]:
+        print(f"Estado em {estado_path} é de {estado['origem']}; recomeçando.")
+        return None
+    if estado["cabecalho"] != cabecalho:
+        print("O cabeçalho do CSV mudou; recomeçando.")
+        return None
+    if os.path.getsize(input_path) < estado["posicao"]:
+        print("O CSV encolheu desde o último treino; recomeçando.")
+        return None
+    with open(input_path, "rb") as f:
+        if _cauda(f, estado["posicao"]) != estado["cauda"]:
+            print("O trecho já lido do CSV mudou; recomeçando.")
+            return None
+    return estado
+
+
+def _blocos(input_path, posicao):
+    """(bytes de linhas terminadas em \\n, posição depois delas), a partir de `posicao`."""
+    with open(input_path, "rb") as f:
+        f.seek(posicao)
+        resto = b""
+        while True:
+            bloco = f.read(BLOCO_BYTES)
+            if not bloco:
+                break
+            dados = resto + bloco
+            fim = dados.rfind(b"\n") + 1
+            if fim:
+                posicao += fim
+                yield dados[:fim], posicao
+            resto = dados[fim:]
+
+
+def treinar_incremental(
+    input_path="/data/base_unificada.csv",
+    modelo_path="/data/modelo_regressao.pkl",
+    estado_path="/data/regressao_estado.json",
+    recomecar=False,
+):
+    """
+    Atualiza o modelo com as linhas novas do CSV (ou lê tudo na primeira vez).
+
+    Args:
+        input_path (str): base_unificada.csv (';', cp1250).
+        modelo_path (str): modelo salvo no mesmo formato do treinar_modelo()
+            ({"modelo": LinearRegression, "scaler": StandardScaler}), mais o
+            artefato compacto .npz ao lado (ver modelo_compacto.py).
+        estado_path (str): JSON com as estatísticas acumuladas.
+        recomecar (bool): ignora o estado salvo e lê o CSV inteiro.
+
+    Returns:
+        dict: linhas novas, linhas totais, descartadas, rmse e r2 do treino.
+    """
+    try:
+        with open(input_path, "rb") as f:
+            primeira = f.readline()
+    except FileNotFoundError:
+        print(f"Erro: Arquivo não encontrado em {input_path}")
+        return None
+    cabecalho = primeira.decode("cp1250").rstrip("\r\n").split(";")
+    estado = None if recomecar else _ler_estado(estado_path, input_path, cabecalho)
+    if estado is None:
+        estatisticas = Estatisticas(len(FEATURES) + 1)
+        posicao = len(primeira)
+        descartadas = 0
+    else:
+        estatisticas = Estatisticas.de_dict(estado["estatisticas"])
+        posicao = estado["posicao"]
+        descartadas = estado["descartadas"]
+    ausentes = [c for c in FEATURES + [TARGET] if c not in cabecalho]
+    if ausentes:
+        print(f"Erro: colunas ausentes em {input_path}: {', '.join(ausentes)}")
+        return None
+
+    n_antes = estatisticas.n
+    descartadas_antes = descartadas
+    with etapa("acumular"):
+        for dados, posicao in _blocos(input_path, posicao):
+            df = pd.read_csv(
+                io.BytesIO(dados), sep=";", encoding="cp1250", header=None,
+                names=cabecalho, usecols=FEATURES + [TARGET],
+            )
+            Z = df[FEATURES + [TARGET]].apply(pd.to_numeric, errors="coerce").to_numpy(np.float64)
+            validas = np.isfinite(Z).all(axis=1)
+            descartadas += int((~validas).sum())
+            estatisticas.atualizar(Z[validas])
+    novas = estatisticas.n - n_antes
+
+    if estatisticas.n < 2:
+        print("Erro: linhas insuficientes para treinar.")
+        return None
+    print(
+        f"Linhas novas: {novas} (total: {estatisticas.n}"
+        + (f", descartadas: {descartadas - descartadas_antes} novas / {descartadas} no total)" if descartadas else ")")
+    )
+
+    with etapa("ajustar"):
+        solucao = estatisticas.resolver()
+        scaler = StandardScaler()
+        scaler.mean_ = solucao["media"]
+        scaler.var_ = solucao["var"]
+        scaler.scale_ = solucao["escala"]
+        scaler.n_samples_seen_ = estatisticas.n
+        scaler.n_features_in_ = len(FEATURES)
+        model = LinearRegression()
+        model.coef_ = solucao["coef"]
+        model.intercept_ = solucao["intercepto"]
+        model.rank_ = solucao["posto"]
+        model.n_features_in_ = len(FEATURES)
+
+    print(f"RMSE (treino): {solucao['rmse']:.2f}")
+    print(f"R² (treino): {solucao['r2']:.3f}")
+
+    with etapa("salvar"):
+        os.makedirs(os.path.dirname(modelo_path) or ".", exist_ok=True)
+        joblib.dump({"modelo": model, "scaler": scaler}, modelo_path)
+        exportar(model, scaler, caminho_compacto(modelo_path), FEATURES, linhas=estatisticas.n)
+        with open(input_path, "rb") as f:
+            cauda = _cauda(f, posicao)
+        estado = {
+            "versao": VERSAO,
+            "origem": os.path.abspath(input_path),
+            "colunas": FEATURES + [TARGET],
+            "cabecalho": cabecalho,
+            "posicao": posicao,
+            "cauda": cauda,
+            "descartadas": descartadas,
+            "estatisticas": estatisticas.para_dict(),
+        }
+        os.makedirs(os.path.dirname(estado_path) or ".", exist_ok=True)
+        with open(estado_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(estado, f)
+        os.replace(estado_path + ".tmp", estado_path)
+    print(f"Modelo salvo em {modelo_path} (estado em {estado_path})")
+    return {
+        "novas": novas,
+        "linhas": estatisticas.n,
+        "descartadas": descartadas,
+        "rmse": solucao["rmse"],
+        "r2": solucao["r2"],
+    }
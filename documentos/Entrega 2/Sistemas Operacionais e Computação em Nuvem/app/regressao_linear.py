@@ -1,46 +1,59 @@
 # app/modelo_ia.py
-import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 import os
 
-def treinar_modelo(input_path="/data/base_unificada.csv", modelo_path="/data/modelo_regressao.pkl"):
-    # Leitura dos dados
-    df = pd.read_csv(input_path, sep=";", encoding="cp1250")
+from base_colunar import ler_colunas, matriz
+from modelo_compacto import caminho_compacto, exportar
+from perfil import etapa
 
-    # Codificação de variáveis categóricas
-    le = LabelEncoder()
-    for col in ['segmento', 'empresa', 'produto', 'customer']:
-        df[col] = le.fit_transform(df[col])
+COLUNAS_CATEGORICAS = ['segmento', 'empresa', 'produto', 'customer']
+FEATURES = ['quantidade', 'preparationTime', 'takeOutTimeInSeconds']
+TARGET = 'totalAmount'
 
-    # Seleciona variáveis preditoras e alvo
-    features = ['quantidade', 'preparationTime', 'takeOutTimeInSeconds']
-    target = 'totalAmount'
+def treinar_modelo(input_path="/data/base_unificada.csv", modelo_path="/data/modelo_regressao.pkl", colunar=True):
+    # Leitura só das colunas usadas (formato colunar, ver base_colunar.py)
+    with etapa("carregar"):
+        colunas = ler_colunas(input_path, FEATURES + [TARGET], colunar=colunar)
 
-    X = df[features]
-    y = df[target]
+    # Seleciona variáveis preditoras e alvo
+    X = matriz(colunas, FEATURES)
+    y = colunas[TARGET]
 
     # Normalização
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    with etapa("escalar"):
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+
+    return ajustar_modelo(X_scaled, y, scaler, modelo_path)
+
+def ajustar_modelo(X_scaled, y, scaler, modelo_path="/data/modelo_regressao.pkl"):
+    """
+    Ajusta, avalia e salva o modelo a partir dos dados já normalizados
+    (usado também pela ação 'pipeline', que faz a leitura uma única vez).
 
+    Returns:
+        dict: MAE, RMSE e R² no conjunto de teste.
+    """
     # Divide em treino e teste
     X_train, X_test, y_train, y_test = train_test_split(
         X_scaled, y, test_size=0.2, random_state=42
     )
 
     # Modelo simples
-    model = LinearRegression()
-    model.fit(X_train, y_train)
+    with etapa("ajustar"):
+        model = LinearRegression()
+        model.fit(X_train, y_train)
 
     # Avaliação
-    y_pred = model.predict(X_test)
-    mae = mean_absolute_error(y_test, y_pred)
-    rmse = mean_squared_error(y_test, y_pred) ** 0.5
-    r2 = r2_score(y_test, y_pred)
+    with etapa("avaliar"):
+        y_pred = model.predict(X_test)
+        mae = mean_absolute_error(y_test, y_pred)
+        rmse = mean_squared_error(y_test, y_pred) ** 0.5
+        r2 = r2_score(y_test, y_pred)
 
     print(f"Treinamento concluído.")
     print(f"MAE: {mae:.2f}")
@@ -49,8 +62,12 @@ def treinar_modelo(input_path="/data/base_unificada.csv", modelo_path="/data/mod
 
     # Salva o modelo treinado
     os.makedirs(os.path.dirname(modelo_path), exist_ok=True)
-    joblib.dump({"modelo": model, "scaler": scaler}, modelo_path)
-    print(f"Modelo salvo em {modelo_path}")
+    with etapa("salvar"):
+        joblib.dump({"modelo": model, "scaler": scaler}, modelo_path)
+        # Versão só com os números, lida sem sklearn (ver modelo_compacto.py)
+        exportar(model, scaler, caminho_compacto(modelo_path), FEATURES, linhas=len(X_train))
+    print(f"Modelo salvo em {modelo_path} (e {caminho_compacto(modelo_path)})")
+    return {"mae": mae, "rmse": rmse, "r2": r2}
 
 if __name__ == "__main__":
     treinar_modelo()
@@ -0,0 +1,320 @@
+# app/retencao.py
+import bisect
+import csv
+import math
+import os
+from datetime import datetime, timedelta
+
+from sinks import SinkCSV
+
+
+# Resoluções dos rollups, em segundos. Cada uma vai para historico_<nome>.csv
+RESOLUCOES = {"1m": 60, "5m": 300, "1h": 3600}
+# <métrica>_count: amostras com valor naquela métrica (pesa a média ao combinar buckets)
+ESTATISTICAS = ["min", "max", "mean", "p95", "count"]
+# Colunas que não fazem sentido agregar
+IGNORADAS = {"timestamp", "ticks_perdidos"}
+
+
+def caminho_rollup(csv_path, resolucao):
+    raiz, ext = os.path.splitext(csv_path)
+    return f"{raiz}_{resolucao}{ext}"
+
+
+def percentil(valores_ordenados, p):
+    """Percentil com interpolação linear (mesmo resultado de numpy.percentile)."""
+    if not valores_ordenados:
+        return None
+    posicao = (len(valores_ordenados) - 1) * p / 100
+    baixo = math.floor(posicao)
+    alto = math.ceil(posicao)
+    if baixo == alto:
+        return valores_ordenados[baixo]
+    fracao = posicao - baixo
+    return valores_ordenados[baixo] + (valores_ordenados[alto] - valores_ordenados[baixo]) * fracao
+
+
+class EstimadorP2:
+    """
+    Percentil aproximado em memória constante (algoritmo P², Jain e Chlamtac,
+    1985): cinco marcadores cujas alturas são corrigidas a cada valor por
+    interpolação parabólica. Até 5 valores o resultado é exato.
+
+    Args:
+        p (float): percentil desejado (0-100).
+    """
+
+    __slots__ = ("p", "n", "alturas", "posicoes", "desejadas", "incrementos")
+
+    def __init__(self, p):
+        self.p = p
+        f = p / 100
+        self.n = 0
+        self.alturas = []
+        self.posicoes = [1, 2, 3, 4, 5]
+        self.desejadas = [1, 1 + 2 * f, 1 + 4 * f, 3 + 2 * f, 5]
+        self.incrementos = [0, f / 2, f, (1 + f) / 2, 1]
+
+    def adicionar(self, x):
+        self.n += 1
+        q = self.alturas
+        if self.n <= 5:
+            bisect.insort(q, x)
+            return
+        # Célula k do valor: q[k] <= x < q[k + 1] (os extremos acompanham min e max)
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+        pos = self.posicoes
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            self.desejadas[i] += self.incrementos[i]
+        for i in (1, 2, 3):
+            d = self.desejadas[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                altura = q[i] + d / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + d) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i])
+                    + (pos[i + 1] - pos[i] - d) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1])
+                )
+                if not q[i - 1] < altura < q[i + 1]:
+                    # Parábola fora da ordem: interpolação linear
+                    altura = q[i] + d * (q[i + d] - q[i]) / (pos[i + d] - pos[i])
+                q[i] = altura
+                pos[i] += d
+
+    def valor(self):
+        if self.n <= 5:
+            return percentil(self.alturas, self.p)
+        return self.alturas[2]
+
+
+class _Resumo:
+    """Estatísticas de uma métrica em um bucket aberto, sem guardar os valores."""
+
+    __slots__ = ("minimo", "maximo", "soma", "n", "p95")
+
+    def __init__(self):
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self.soma = 0.0
+        self.n = 0
+        self.p95 = EstimadorP2(95)
+
+    def adicionar(self, valor):
+        if valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+        self.soma += valor
+        self.n += 1
+        self.p95.adicionar(valor)
+
+
+class AgregadorRollups:
+    """
+    Mantém, de forma incremental, rollups de 1m/5m/1h com min/max/mean/p95/count
+    de cada métrica. Um bucket é fechado e gravado quando chega a primeira
+    amostra do bucket seguinte; ao encerrar, os buckets abertos são gravados
+    parciais (leitores somam buckets repetidos, ver carregar_historico).
+
+    Cada bucket aberto guarda só min/max/soma/contagem e um estimador P² do
+    p95 por métrica (memória constante, qualquer que seja a frequência de
+    coleta); o p95 é aproximado a partir de 6 amostras no bucket.
+
+    Tem a interface de sink (escrever/flush/fechar) e entra no
+    EscritorAssincrono junto com os demais sinks.
+
+    Args:
+        csv_path (str): historico.csv; os rollups ficam ao lado dele.
+        campos (list): colunas das amostras.
+    """
+
+    def __init__(self, csv_path, campos):
+        self.metricas = [c for c in campos if c not in IGNORADAS]
+        campos_rollup = ["timestamp", "count"] + [
+            f"{m}_{e}" for m in self.metricas for e in ESTATISTICAS
+        ]
+        self._sinks = {
+            nome: SinkCSV(caminho_rollup(csv_path, nome), campos_rollup) for nome in RESOLUCOES
+        }
+        # resolução -> (início do bucket, {métrica: _Resumo}, contagem)
+        self._abertos = {}
+
+    def escrever(self, amostras):
+        for amostra in amostras:
+            instante = datetime.fromisoformat(amostra["timestamp"])
+            for nome, segundos in RESOLUCOES.items():
+                inicio = self._inicio_bucket(instante, segundos)
+                aberto = self._abertos.get(nome)
+                if aberto is not None and aberto[0] != inicio:
+                    self._sinks[nome].escrever([self._resumir(*aberto)])
+                    aberto = None
+                if aberto is None:
+                    aberto = (inicio, {m: _Resumo() for m in self.metricas}, [0])
+                    self._abertos[nome] = aberto
+                aberto[2][0] += 1
+                for m in self.metricas:
+                    valor = amostra.get(m)
+                    if valor is not None and valor != "":
+                        aberto[1][m].adicionar(float(valor))
+
+    @staticmethod
+    def _inicio_bucket(instante, segundos):
+        meia_noite = instante.replace(hour=0, minute=0, second=0, microsecond=0)
+        decorrido = (instante - meia_noite).total_seconds()
+        return meia_noite + timedelta(seconds=decorrido // segundos * segundos)
+
+    def _resumir(self, inicio, valores, contagem):
+        linha = {"timestamp": inicio.strftime("%Y-%m-%d %H:%M:%S"), "count": contagem[0]}
+        for m, resumo in valores.items():
+            if not resumo.n:
+                continue
+            linha[f"{m}_min"] = resumo.minimo
+            linha[f"{m}_max"] = resumo.maximo
+            linha[f"{m}_mean"] = round(resumo.soma / resumo.n, 3)
+            linha[f"{m}_p95"] = round(resumo.p95.valor(), 3)
+            linha[f"{m}_count"] = resumo.n
+        return linha
+
+    def flush(self):
+        for sink in self._sinks.values():
+            sink.flush()
+
+    def fechar(self):
+        for nome, aberto in self._abertos.items():
+            self._sinks[nome].escrever([self._resumir(*aberto)])
+        self._abertos = {}
+        for sink in self._sinks.values():
+            sink.fechar()
+
+
+def aplicar_retencao(csv_path, limite):
+    """
+    Remove do CSV bruto as linhas com timestamp anterior a `limite`.
+
+    As linhas estão em ordem cronológica, então basta achar a primeira linha
+    dentro da janela e copiar o resto do arquivo. A troca é atômica
+    (os.replace), então um leitor nunca vê o arquivo pela metade.
+
+    Returns:
+        int: número de linhas removidas.
+    """
+    limite_txt = limite.strftime("%Y-%m-%d %H:%M:%S")
+    temporario = csv_path + ".tmp"
+    removidas = 0
+    with open(csv_path, newline="", encoding="utf-8") as origem:
+        cabecalho = origem.readline()
+        while True:
+            posicao = origem.tell()
+            linha = origem.readline()
+            # Timestamps em ISO ordenam igual como texto
+            if not linha or linha[:19] >= limite_txt:
+                break
+            removidas += 1
+        if removidas == 0:
+            return 0
+        origem.seek(posicao)
+        with open(temporario, "w", newline="", encoding="utf-8") as destino:
+            destino.write(cabecalho)
+            while True:
+                bloco = origem.read(1 << 20)
+                if not bloco:
+                    break
+                destino.write(bloco)
+    os.replace(temporario, csv_path)
+    return removidas
+
+
+def escolher_resolucao(csv_path, inicio, fim, max_pontos=2000):
+    """
+    Escolhe a fonte mais fina que cabe em `max_pontos` para o período pedido:
+    o CSV bruto (se o período ainda está dentro da retenção), depois 1m, 5m e
+    1h. Se nenhuma couber, usa o rollup mais grosso que existir; sem nenhum
+    rollup (monitor sem --rollups), usa o CSV bruto com um aviso.
+
+    Returns:
+        str: "bruto", "1m", "5m" ou "1h".
+    """
+    duracao = (fim - inicio).total_seconds()
+
+    primeiro, intervalo = _inicio_e_intervalo(csv_path)
+    if primeiro is not None and primeiro <= inicio and intervalo:
+        if duracao / intervalo <= max_pontos:
+            return "bruto"
+
+    existentes = [nome for nome in RESOLUCOES if os.path.isfile(caminho_rollup(csv_path, nome))]
+    for nome in existentes:
+        if duracao / RESOLUCOES[nome] <= max_pontos:
+            return nome
+    if existentes:
+        return existentes[-1]
+    print(f"Aviso: nenhum rollup de {csv_path} encontrado (monitor rodou sem --rollups?); usando o CSV bruto.")
+    return "bruto"
+
+
+def _inicio_e_intervalo(csv_path):
+    """Primeiro timestamp do CSV bruto e o intervalo entre as duas primeiras amostras."""
+    try:
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            leitor = csv.reader(f)
+            next(leitor)
+            t0 = datetime.fromisoformat(next(leitor)[0])
+            t1 = datetime.fromisoformat(next(leitor)[0])
+    except (OSError, StopIteration, ValueError, IndexError):
+        return None, None
+    return t0, (t1 - t0).total_seconds()
+
+
+def carregar_historico(csv_path, inicio=None, fim=None, max_pontos=2000):
+    """
+    Carrega o período [inicio, fim] na resolução escolhida por escolher_resolucao.
+
+    Para rollups, a coluna de cada métrica recebe a média do bucket (o nome
+    original, ex.: cpu_percent) e as colunas _min/_max/_p95 são mantidas.
+    Buckets repetidos (gravados parciais em reinícios do monitor) são
+    combinados: min dos mínimos, max dos máximos, média ponderada pelas
+    amostras com valor na métrica (<métrica>_count; em rollups antigos, sem
+    essa coluna, pelo count do bucket) e o maior p95.
+
+    Returns:
+        (DataFrame, str): dados e resolução usada.
+    """
+    import pandas as pd
+
+    fim = fim or datetime.now()
+    inicio = inicio or fim - timedelta(days=1)
+    resolucao = escolher_resolucao(csv_path, inicio, fim, max_pontos)
+
+    if resolucao == "bruto":
+        df = pd.read_csv(csv_path)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601")
+        return df[(df["timestamp"] >= inicio) & (df["timestamp"] <= fim)].reset_index(drop=True), resolucao
+
+    df = pd.read_csv(caminho_rollup(csv_path, resolucao))
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601")
+    df = df[(df["timestamp"] >= inicio) & (df["timestamp"] <= fim)]
+
+    metricas = [c[:-5] for c in df.columns if c.endswith("_mean")]
+    for m in metricas:
+        if f"{m}_count" not in df.columns:
+            df[f"{m}_count"] = df["count"].where(df[f"{m}_mean"].notna(), 0)
+        df[f"{m}_count"] = df[f"{m}_count"].fillna(0)
+        df[f"{m}_soma"] = df[f"{m}_mean"].fillna(0) * df[f"{m}_count"]
+    agregacoes = {"count": "sum"}
+    for m in metricas:
+        agregacoes.update({
+            f"{m}_min": "min", f"{m}_max": "max", f"{m}_p95": "max",
+            f"{m}_soma": "sum", f"{m}_count": "sum",
+        })
+    df = df.groupby("timestamp", as_index=False).agg(agregacoes)
+    for m in metricas:
+        # Sem nenhuma amostra da métrica no bucket: NaN, não 0
+        df[m] = df.pop(f"{m}_soma") / df[f"{m}_count"].where(df[f"{m}_count"] > 0)
+    return df, resolucao
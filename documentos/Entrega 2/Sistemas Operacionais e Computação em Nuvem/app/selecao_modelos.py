@@ -0,0 +1,220 @@
+# app/selecao_modelos.py
+"""
+Seleção de modelo para a regressão (mesmas FEATURES e TARGET de
+regressao_linear.py) com backtest em origem móvel sobre createdAt.
+
+O train_test_split aleatório do treinar_modelo() coloca pedidos futuros no
+treino e dá uma única estimativa de erro. Aqui os pedidos são ordenados por
+createdAt e divididos em `dobras + 1` blocos consecutivos (com o mesmo
+número de pedidos; um mesmo instante nunca fica em dois blocos). Na dobra
+k, os candidatos treinam com os blocos 0..k (janela crescente) e são
+avaliados no bloco k+1, sempre no futuro do treino:
+
+    dobra 1: [treino][teste]
+    dobra 2: [treino  treino][teste]
+    ...
+
+Cada par (candidato, dobra) é um ajuste independente, distribuído entre
+processos com joblib: com mais CPUs, uma grade maior de candidatos custa
+proporcionalmente menos tempo de relógio. Os arrays ordenados são
+compartilhados com os workers por memmap (o joblib faz isso sozinho para
+arrays grandes) e cada tarefa recebe só os limites do seu treino e teste.
+
+Saídas:
+- uma tabela ordenada pelo RMSE médio das dobras (com MAE, R², desvio do
+  RMSE e tempo de ajuste por dobra);
+- um CSV com uma linha por (candidato, dobra): métricas, linhas de treino e
+  de teste, período de teste e tempo de relógio do ajuste + predição.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from base_colunar import ler_colunas, matriz
+from perfil import etapa
+from regressao_linear import FEATURES, TARGET
+
+
+COLUNA_DATA = "createdAt"
+
+
+def _candidatos():
+    """Nome -> construtor do estimador (import do sklearn só quando usado)."""
+    from sklearn.dummy import DummyRegressor
+    from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import HuberRegressor, LinearRegression, Ridge
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.tree import DecisionTreeRegressor
+
+    return {
+        # Referência: prevê a média do treino
+        "media": lambda: DummyRegressor(),
+        "linear": lambda: make_pipeline(StandardScaler(), LinearRegression()),
+        "ridge": lambda: make_pipeline(StandardScaler(), Ridge(alpha=1.0)),
+        "huber": lambda: make_pipeline(StandardScaler(), HuberRegressor(max_iter=500)),
+        "arvore": lambda: DecisionTreeRegressor(max_depth=8, min_samples_leaf=20, random_state=42),
+        # n_jobs=1: o paralelismo já é entre as dobras
+        "floresta": lambda: RandomForestRegressor(
+            n_estimators=50, max_depth=10, min_samples_leaf=20, n_jobs=1, random_state=42
+        ),
+        "boosting": lambda: HistGradientBoostingRegressor(max_iter=200, random_state=42),
+    }
+
+
+CANDIDATOS = ("media", "linear", "ridge", "huber", "arvore", "floresta", "boosting")
+
+
+def _cortes(datas, dobras):
+    """
+    Limites (em linhas, sobre as datas ordenadas) dos `dobras + 1` blocos.
+
+    Cada corte é movido para o primeiro pedido do seu instante, para que
+    pedidos com o mesmo createdAt fiquem no mesmo bloco.
+    """
+    n = len(datas)
+    posicoes = [n * i // (dobras + 1) for i in range(1, dobras + 1)]
+    cortes = [0] + [int(np.searchsorted(datas, datas[p], side="left")) for p in posicoes] + [n]
+    return cortes
+
+
+def _avaliar(nome, dobra, X, y, fim_treino, fim_teste):
+    """Ajusta um candidato em X[:fim_treino] e avalia em X[fim_treino:fim_teste]."""
+    t0 = time.perf_counter()
+    modelo = _candidatos()[nome]()
+    modelo.fit(X[:fim_treino], y[:fim_treino])
+    previsto = modelo.predict(X[fim_treino:fim_teste])
+    segundos = time.perf_counter() - t0
+
+    real = y[fim_treino:fim_teste]
+    erro = real - previsto
+    soma_total = ((real - real.mean()) ** 2).sum()
+    return {
+        "candidato": nome,
+        "dobra": dobra,
+        "linhas_treino": fim_treino,
+        "linhas_teste": fim_teste - fim_treino,
+        "mae": float(np.abs(erro).mean()),
+        "rmse": float(np.sqrt((erro ** 2).mean())),
+        "r2": float(1 - (erro ** 2).sum() / soma_total) if soma_total > 0 else float("nan"),
+        "segundos": round(segundos, 4),
+        "pid": os.getpid(),
+    }
+
+
+def selecionar_modelo(
+    input_path="/data/base_unificada.csv",
+    candidatos=CANDIDATOS,
+    dobras=5,
+    trabalhadores=None,
+    saida_path="/data/selecao_modelos.csv",
+    colunar=True,
+):
+    """
+    Compara os candidatos com backtest em origem móvel e imprime o ranking.
+
+    Args:
+        input_path (str): base_unificada.csv.
+        candidatos (list): nomes em CANDIDATOS.
+        dobras (int): dobras do backtest (a base é dividida em dobras + 1
+            blocos por createdAt).
+        trabalhadores (int): processos do joblib (padrão: todas as CPUs).
+        saida_path (str): CSV com as métricas de cada (candidato, dobra).
+        colunar (bool): lê do formato colunar (False: direto do CSV).
+
+    Returns:
+        pandas.DataFrame: ranking (uma linha por candidato, melhor primeiro).
+    """
+    from joblib import Parallel, delayed
+
+    desconhecidos = [nome for nome in candidatos if nome not in CANDIDATOS]
+    if desconhecidos:
+        raise ValueError(f"Candidatos desconhecidos: {', '.join(desconhecidos)}. Opções: {', '.join(CANDIDATOS)}")
+    if dobras < 1:
+        raise ValueError("dobras deve ser pelo menos 1")
+
+    with etapa("carregar"):
+        colunas = ler_colunas(input_path, FEATURES + [TARGET, COLUNA_DATA], colunar=colunar)
+        datas = colunas[COLUNA_DATA]
+        if not np.issubdtype(datas.dtype, np.datetime64):
+            # Sem o formato colunar a data vem como texto
+            datas = pd.to_datetime(pd.Series(datas), dayfirst=True, errors="coerce").to_numpy("datetime64[ns]")
+        X = matriz(colunas, FEATURES)
+        y = np.asarray(colunas[TARGET], dtype=np.float64)
+
+    with etapa("ordenar"):
+        validas = ~np.isnat(datas) & np.isfinite(X).all(axis=1) & np.isfinite(y)
+        ordem = np.flatnonzero(validas)[np.argsort(datas[validas], kind="stable")]
+        datas = np.asarray(datas[ordem])
+        X = np.ascontiguousarray(X[ordem])
+        y = np.ascontiguousarray(y[ordem])
+        cortes = _cortes(datas, dobras)
+
+    descartadas = int((~validas).sum())
+    print(f"Linhas: {len(y)}" + (f" (descartadas sem data ou com valores vazios: {descartadas})" if descartadas else ""))
+    tarefas = []
+    for dobra in range(1, dobras + 1):
+        fim_treino, fim_teste = cortes[dobra], cortes[dobra + 1]
+        if fim_treino < 2 or fim_teste <= fim_treino:
+            print(f"Dobra {dobra} ignorada: blocos vazios (poucos pedidos ou datas repetidas).")
+            continue
+        inicio = pd.Timestamp(datas[fim_treino]).strftime("%Y-%m-%d")
+        fim = pd.Timestamp(datas[fim_teste - 1]).strftime("%Y-%m-%d")
+        print(f"Dobra {dobra}: treino {fim_treino} linhas, teste {fim_teste - fim_treino} linhas ({inicio} a {fim})")
+        tarefas.extend((nome, dobra, fim_treino, fim_teste, inicio, fim) for nome in candidatos)
+    if not tarefas:
+        print("Erro: pedidos insuficientes para o backtest.")
+        return None
+
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    with etapa("backtest"):
+        t0 = time.perf_counter()
+        resultados = Parallel(n_jobs=min(trabalhadores, len(tarefas)))(
+            delayed(_avaliar)(nome, dobra, X, y, fim_treino, fim_teste)
+            for nome, dobra, fim_treino, fim_teste, _, _ in tarefas
+        )
+        relogio = time.perf_counter() - t0
+    for resultado, (_, _, _, _, inicio, fim) in zip(resultados, tarefas):
+        resultado["teste_inicio"] = inicio
+        resultado["teste_fim"] = fim
+
+    por_dobra = pd.DataFrame(resultados)
+    ranking = (
+        por_dobra.groupby("candidato")
+        .agg(
+            rmse=("rmse", "mean"),
+            rmse_desvio=("rmse", "std"),
+            mae=("mae", "mean"),
+            r2=("r2", "mean"),
+            segundos_dobra=("segundos", "mean"),
+            segundos_total=("segundos", "sum"),
+        )
+        .sort_values(["rmse", "mae"])
+        .reset_index()
+    )
+
+    print(f"\n{'#':>2} {'candidato':<10} {'RMSE':>10} {'±':>8} {'MAE':>10} {'R²':>7} {'s/dobra':>9}")
+    for posicao, linha in enumerate(ranking.itertuples(), start=1):
+        desvio = 0.0 if pd.isna(linha.rmse_desvio) else linha.rmse_desvio
+        print(
+            f"{posicao:>2} {linha.candidato:<10} {linha.rmse:>10.2f} {desvio:>8.2f} "
+            f"{linha.mae:>10.2f} {linha.r2:>7.3f} {linha.segundos_dobra:>9.3f}"
+        )
+    soma = por_dobra["segundos"].sum()
+    print(
+        f"\n{len(tarefas)} ajustes em {relogio:.2f} s de relógio ({soma:.2f} s somando os ajustes, "
+        f"{por_dobra['pid'].nunique()} processos)"
+    )
+    print(f"Melhor: {ranking['candidato'].iloc[0]}")
+
+    with etapa("salvar"):
+        os.makedirs(os.path.dirname(saida_path) or ".", exist_ok=True)
+        colunas_saida = [
+            "candidato", "dobra", "teste_inicio", "teste_fim", "linhas_treino", "linhas_teste",
+            "mae", "rmse", "r2", "segundos",
+        ]
+        por_dobra.sort_values(["dobra", "rmse"])[colunas_saida].to_csv(saida_path, index=False)
+    print(f"Métricas por dobra salvas em {saida_path}")
+    return ranking
@@ -0,0 +1,313 @@
+# app/serie_temporal.py
+"""
+Formato colunar compactado para o histórico do monitor (.hts).
+
+Layout do arquivo (todos os inteiros em little-endian):
+
+    cabeçalho:  b"HTS1" | uint32 tamanho | JSON {"versao", "campos"}
+    chunk:      b"CHNK" | uint32 linhas | int64 t_inicio | int64 t_fim
+                | uint32 colunas | uint32 tamanho de cada coluna (timestamp + campos)
+                | payload de cada coluna
+
+Cada chunk é independente e só é acrescentado ao final (append-only). Os
+timestamps (ms desde a época, horário local) são gravados como deltas; os
+floats como XOR com o valor anterior (valores parecidos viram quase só
+zeros). Em ambos os casos os bytes são transpostos (byte shuffle) antes do
+zlib, o que agrupa os bytes altos, quase sempre iguais.
+
+O cabeçalho de cada chunk traz o intervalo de tempo e os tamanhos, então um
+leitor consegue pular chunks fora do período pedido sem descompactá-los.
+"""
+import csv
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+MAGICO_ARQUIVO = b"HTS1"
+MAGICO_CHUNK = b"CHNK"
+_CHUNK = struct.Struct("<4sIqqI")
+_EPOCA = datetime(1970, 1, 1)
+
+
+def timestamp_para_ms(timestamp):
+    """Converte "YYYY-mm-dd HH:MM:SS[.fff]" em ms desde a época (sem fuso)."""
+    return (datetime.fromisoformat(timestamp) - _EPOCA) // timedelta(milliseconds=1)
+
+
+def _embaralhar(valores):
+    # Transpõe os bytes: todos os bytes 0, depois todos os bytes 1, ...
+    return valores.view(np.uint8).reshape(-1, 8).T.tobytes()
+
+
+def _desembaralhar(dados, linhas):
+    return np.frombuffer(dados, dtype=np.uint8).reshape(8, linhas).T.copy().view(np.uint64).ravel()
+
+
+def _codificar_timestamps(ms):
+    deltas = np.diff(ms, prepend=np.int64(0))
+    return zlib.compress(_embaralhar(deltas.astype(np.int64)), 6)
+
+
+def _decodificar_timestamps(dados, linhas):
+    deltas = _desembaralhar(zlib.decompress(dados), linhas).view(np.int64)
+    return np.cumsum(deltas).astype("datetime64[ms]")
+
+
+def _codificar_floats(valores):
+    bits = np.asarray(valores, dtype=np.float64).view(np.uint64)
+    xor = bits ^ np.concatenate(([np.uint64(0)], bits[:-1]))
+    return zlib.compress(_embaralhar(xor), 6)
+
+
+def _decodificar_floats(dados, linhas):
+    xor = _desembaralhar(zlib.decompress(dados), linhas)
+    return np.bitwise_xor.accumulate(xor).view(np.float64)
+
+
+def _para_float(valor):
+    if valor is None or valor == "":
+        return np.nan
+    return float(valor)
+
+
+class EscritorSerie:
+    """
+    Acumula amostras e grava um chunk a cada `linhas_por_chunk` linhas ou
+    quando as pendentes ficam mais velhas que `segundos_por_chunk`.
+
+    Tem a mesma interface dos sinks (escrever/flush/fechar), então pode ser
+    usado pelo EscritorAssincrono do monitor.
+
+    Args:
+        caminho (str): arquivo .hts (criado se não existir).
+        campos (list): colunas; "timestamp" é tratada à parte.
+    """
+
+    def __init__(self, caminho, campos, linhas_por_chunk=1024, segundos_por_chunk=60.0):
+        self.caminho = caminho
+        self.campos = [c for c in campos if c != "timestamp"]
+        self.linhas_por_chunk = linhas_por_chunk
+        self.segundos_por_chunk = segundos_por_chunk
+        self._pendentes = []
+        self._inicio_pendentes = None
+
+        if os.path.isfile(caminho) and os.path.getsize(caminho) > 0:
+            existentes = ler_cabecalho(caminho)["campos"]
+            if existentes != self.campos:
+                sufixo = datetime.now().strftime("%Y%m%d_%H%M%S")
+                raiz, ext = os.path.splitext(caminho)
+                antigo = f"{raiz}_{sufixo}{ext}"
+                os.replace(caminho, antigo)
+                print(f"Aviso: colunas de {caminho} diferentes das atuais; arquivo antigo movido para {antigo}")
+
+        novo = not os.path.isfile(caminho) or os.path.getsize(caminho) == 0
+        self._arquivo = open(caminho, "ab")
+        if novo:
+            cabecalho = json.dumps({"versao": 1, "campos": self.campos}).encode("utf-8")
+            self._arquivo.write(MAGICO_ARQUIVO + struct.pack("<I", len(cabecalho)) + cabecalho)
+            self._arquivo.flush()
+
+    def escrever(self, amostras):
+        if not self._pendentes:
+            self._inicio_pendentes = time.monotonic()
+        self._pendentes.extend(amostras)
+        while len(self._pendentes) >= self.linhas_por_chunk:
+            self._gravar_chunk(self._pendentes[:self.linhas_por_chunk])
+            self._pendentes = self._pendentes[self.linhas_por_chunk:]
+            self._inicio_pendentes = time.monotonic()
+
+    def _gravar_chunk(self, amostras):
+        ms = np.fromiter(
+            (timestamp_para_ms(a["timestamp"]) for a in amostras), dtype=np.int64, count=len(amostras)
+        )
+        colunas = [_codificar_timestamps(ms)]
+        for campo in self.campos:
+            colunas.append(_codificar_floats([_para_float(a.get(campo)) for a in amostras]))
+        self._escrever_chunk(ms, colunas)
+
+    def gravar_arrays(self, ms, valores):
+        """Grava um chunk direto de arrays (usado pelo conversor de CSV)."""
+        colunas = [_codificar_timestamps(ms)]
+        colunas += [_codificar_floats(valores[campo]) for campo in self.campos]
+        self._escrever_chunk(ms, colunas)
+
+    def _escrever_chunk(self, ms, colunas):
+        cabecalho = _CHUNK.pack(MAGICO_CHUNK, len(ms), int(ms.min()), int(ms.max()), len(colunas))
+        tamanhos = struct.pack(f"<{len(colunas)}I", *(len(c) for c in colunas))
+        self._arquivo.write(cabecalho + tamanhos + b"".join(colunas))
+
+    def flush(self):
+        if self._pendentes and time.monotonic() - self._inicio_pendentes >= self.segundos_por_chunk:
+            self._gravar_chunk(self._pendentes)
+            self._pendentes = []
+        self._arquivo.flush()
+
+    def fechar(self):
+        if self._pendentes:
+            self._gravar_chunk(self._pendentes)
+            self._pendentes = []
+        self._arquivo.close()
+
+
+def ler_cabecalho(caminho):
+    with open(caminho, "rb") as f:
+        return _ler_cabecalho(f)
+
+
+def _ler_cabecalho(f):
+    if f.read(4) != MAGICO_ARQUIVO:
+        raise ValueError(f"{f.name} não é um arquivo .hts")
+    (tamanho,) = struct.unpack("<I", f.read(4))
+    return json.loads(f.read(tamanho))
+
+
+def indice_chunks(caminho):
+    """
+    Percorre só os cabeçalhos dos chunks e retorna uma lista de
+    (offset, linhas, t_inicio_ms, t_fim_ms). Um chunk truncado no final
+    (gravação interrompida) é ignorado.
+    """
+    indice = []
+    tamanho_arquivo = os.path.getsize(caminho)
+    with open(caminho, "rb") as f:
+        _ler_cabecalho(f)
+        while True:
+            offset = f.tell()
+            bruto = f.read(_CHUNK.size)
+            if len(bruto) < _CHUNK.size:
+                break
+            magico, linhas, t_inicio, t_fim, ncolunas = _CHUNK.unpack(bruto)
+            if magico != MAGICO_CHUNK:
+                raise ValueError(f"Chunk inválido em {caminho} (offset {offset})")
+            tamanhos = struct.unpack(f"<{ncolunas}I", f.read(4 * ncolunas))
+            fim = f.tell() + sum(tamanhos)
+            if fim > tamanho_arquivo:
+                break
+            indice.append((offset, linhas, t_inicio, t_fim))
+            f.seek(fim)
+    return indice
+
+
+def ler_serie(caminho, colunas=None, inicio=None, fim=None):
+    """
+    Gera, chunk a chunk, (timestamps, {coluna: array}) com arrays NumPy.
+
+    Args:
+        caminho (str): arquivo .hts.
+        colunas (list): colunas desejadas (padrão: todas). As demais não são
+            descompactadas.
+        inicio, fim (str | datetime64): filtra o período [inicio, fim].
+    """
+    cabecalho = ler_cabecalho(caminho)
+    campos = cabecalho["campos"]
+    colunas = campos if colunas is None else [c for c in colunas if c in campos]
+    ms_inicio = None if inicio is None else np.datetime64(inicio, "ms").astype(np.int64)
+    ms_fim = None if fim is None else np.datetime64(fim, "ms").astype(np.int64)
+
+    with open(caminho, "rb") as f:
+        for offset, linhas, t_inicio, t_fim in indice_chunks(caminho):
+            if ms_inicio is not None and t_fim < ms_inicio:
+                continue
+            if ms_fim is not None and t_inicio > ms_fim:
+                continue
+            f.seek(offset + _CHUNK.size)
+            ncolunas = len(campos) + 1
+            tamanhos = struct.unpack(f"<{ncolunas}I", f.read(4 * ncolunas))
+            base = f.tell()
+            offsets = np.concatenate(([0], np.cumsum(tamanhos))).tolist()
+
+            f.seek(base)
+            timestamps = _decodificar_timestamps(f.read(tamanhos[0]), linhas)
+            mascara = None
+            if ms_inicio is not None or ms_fim is not None:
+                ms = timestamps.astype(np.int64)
+                mascara = np.ones(linhas, dtype=bool)
+                if ms_inicio is not None:
+                    mascara &= ms >= ms_inicio
+                if ms_fim is not None:
+                    mascara &= ms <= ms_fim
+                timestamps = timestamps[mascara]
+
+            valores = {}
+            for coluna in colunas:
+                i = campos.index(coluna) + 1
+                f.seek(base + offsets[i])
+                array = _decodificar_floats(f.read(tamanhos[i]), linhas)
+                valores[coluna] = array[mascara] if mascara is not None else array
+            yield timestamps, valores
+
+
+def ler_tudo(caminho, colunas=None, inicio=None, fim=None):
+    """Concatena os chunks de ler_serie em um único (timestamps, {coluna: array})."""
+    partes_ts = []
+    partes = {}
+    for timestamps, valores in ler_serie(caminho, colunas, inicio, fim):
+        partes_ts.append(timestamps)
+        for coluna, array in valores.items():
+            partes.setdefault(coluna, []).append(array)
+    if not partes_ts:
+        campos = ler_cabecalho(caminho)["campos"] if colunas is None else colunas
+        return np.array([], dtype="datetime64[ms]"), {c: np.array([]) for c in campos}
+    return np.concatenate(partes_ts), {c: np.concatenate(p) for c, p in partes.items()}
+
+
+def converter_csv(csv_path, destino=None, linhas_por_chunk=4096):
+    """
+    Converte um historico.csv existente para .hts, em streaming.
+
+    O .hts é gravado em um temporário e substitui o destino no fim: converter
+    de novo o mesmo CSV refaz o arquivo em vez de acrescentar as linhas outra
+    vez (e um leitor nunca vê uma conversão pela metade).
+
+    Args:
+        csv_path (str): CSV de origem.
+        destino (str): arquivo .hts (padrão: mesmo nome com extensão .hts).
+    """
+    destino = destino or os.path.splitext(csv_path)[0] + ".hts"
+    temporario = destino + ".tmp"
+    if os.path.exists(temporario):
+        # Sobra de uma conversão interrompida: o EscritorSerie acrescentaria a ela
+        os.remove(temporario)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        leitor = csv.reader(f)
+        cabecalho = next(leitor)
+        escritor = EscritorSerie(temporario, cabecalho, linhas_por_chunk=linhas_por_chunk)
+        i_ts = cabecalho.index("timestamp")
+        indices = [cabecalho.index(c) for c in escritor.campos]
+        total = 0
+        lote = []
+        for linha in leitor:
+            lote.append(linha)
+            if len(lote) == linhas_por_chunk:
+                total += _converter_lote(escritor, lote, i_ts, indices)
+                lote = []
+        if lote:
+            total += _converter_lote(escritor, lote, i_ts, indices)
+        escritor.fechar()
+    os.replace(temporario, destino)
+    print(f"{total} linhas convertidas de {csv_path} para {destino}")
+    return destino
+
+
+def _converter_lote(escritor, lote, i_ts, indices):
+    ms = np.fromiter((timestamp_para_ms(l[i_ts]) for l in lote), dtype=np.int64, count=len(lote))
+    valores = {
+        campo: np.array([_para_float(l[i]) for l in lote], dtype=np.float64)
+        for campo, i in zip(escritor.campos, indices)
+    }
+    escritor.gravar_arrays(ms, valores)
+    return len(lote)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python serie_temporal.py historico.csv [destino.hts]")
+        sys.exit(1)
+    converter_csv(*sys.argv[1:3])
@@ -0,0 +1,125 @@
+# app/servidor_metricas.py
+import json
+import re
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class BufferAmostras:
+    """
+    Guarda a última amostra e as N anteriores, só em memória.
+
+    O laço de coleta apenas faz `adicionar()` (um append em deque com maxlen,
+    atômico no CPython), sem lock: uma requisição HTTP nunca atrasa a coleta.
+
+    Args:
+        tamanho (int): quantidade de amostras mantidas.
+    """
+
+    def __init__(self, tamanho=300):
+        self._amostras = deque(maxlen=tamanho)
+
+    def adicionar(self, amostra):
+        self._amostras.append(amostra)
+
+    def ultima(self):
+        try:
+            return self._amostras[-1]
+        except IndexError:
+            return None
+
+    def recentes(self, n=None):
+        # list(deque) roda inteiro em C, sem soltar o GIL, então não conflita
+        # com o append da thread de coleta
+        amostras = list(self._amostras)
+        if n is None:
+            return amostras
+        # n=0 pediria amostras[-0:], ou seja, todas
+        return amostras[-n:] if n > 0 else []
+
+
+def _nome_prometheus(campo):
+    return "monitor_" + re.sub(r"[^a-zA-Z0-9_]", "_", campo)
+
+
+def formatar_prometheus(amostra, estatisticas=None):
+    """Formato de exposição de texto do Prometheus (todas as métricas como gauge)."""
+    linhas = []
+    valores = dict(amostra or {})
+    valores.pop("timestamp", None)
+    for campo, valor in valores.items():
+        if not isinstance(valor, (int, float)):
+            continue
+        nome = _nome_prometheus(campo)
+        linhas.append(f"# TYPE {nome} gauge")
+        linhas.append(f"{nome} {valor}")
+    for campo, valor in (estatisticas or {}).items():
+        nome = _nome_prometheus(f"escritor_{campo}")
+        linhas.append(f"# TYPE {nome} gauge")
+        linhas.append(f"{nome} {valor}")
+    return "\n".join(linhas) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    buffer = None
+    estatisticas = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            corpo = formatar_prometheus(self.buffer.ultima(), self.estatisticas())
+            self._responder(200, corpo, "text/plain; version=0.0.4")
+        elif url.path == "/ultima":
+            self._responder(200, json.dumps(self.buffer.ultima()), "application/json")
+        elif url.path == "/amostras":
+            parametros = parse_qs(url.query)
+            try:
+                n = int(parametros["n"][0]) if "n" in parametros else None
+                if n is not None and n < 0:
+                    raise ValueError
+            except ValueError:
+                self._responder(400, "n deve ser um inteiro >= 0, ex.: /amostras?n=60\n", "text/plain")
+                return
+            self._responder(200, json.dumps(self.buffer.recentes(n)), "application/json")
+        else:
+            self._responder(404, "Rotas: /metrics, /ultima, /amostras?n=60\n", "text/plain")
+
+    def _responder(self, status, corpo, tipo):
+        dados = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{tipo}; charset=utf-8" if "charset" not in tipo else tipo)
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, formato, *args):
+        # Não polui o terminal do monitor a cada scrape
+        pass
+
+
+def iniciar_servidor(buffer, porta, host="127.0.0.1", estatisticas=None):
+    """
+    Sobe o servidor HTTP em uma thread daemon e o retorna (use shutdown() ao parar).
+
+    Rotas:
+        /metrics            última amostra no formato Prometheus
+        /ultima             última amostra em JSON
+        /amostras?n=60      últimas n amostras do buffer em JSON
+
+    Args:
+        buffer (BufferAmostras): fonte das amostras.
+        porta (int): porta TCP.
+        host (str): interface de escuta (127.0.0.1 = apenas local).
+        estatisticas (callable): retorna um dict extra exposto em /metrics
+            (ex.: EscritorAssincrono.estatisticas).
+    """
+    handler = type("Handler", (_Handler,), {
+        "buffer": buffer,
+        "estatisticas": staticmethod(estatisticas or dict),
+    })
+    servidor = ThreadingHTTPServer((host, porta), handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="http-metricas", daemon=True).start()
+    return servidor
@@ -0,0 +1,365 @@
+# app/servidor_predicao.py
+"""
+Servidor de predições do modelo salvo pela regressão: o artefato compacto
+modelo_regressao.npz (só NumPy, ver modelo_compacto.py) ou o
+modelo_regressao.pkl ({"modelo": LinearRegression, "scaler": StandardScaler},
+que exige importar o scikit-learn).
+
+O artefato é carregado uma vez e mantido em memória. As requisições chegam
+em threads (ThreadingHTTPServer, em TCP ou em um socket Unix) e entram em
+uma fila; uma única thread de lote junta os pedidos que chegaram juntos
+(até `lote_max` linhas ou `espera_lote` segundos depois do primeiro) e faz
+um só `scaler.transform` + `predict` vetorizado para todos.
+
+Recarga a quente: uma thread vigia o mtime/tamanho do arquivo e, quando ele
+muda (ex.: um novo 'regressao_linear'), carrega o novo modelo e troca a
+referência; o lote seguinte já usa o novo. Se o arquivo estiver no meio da
+gravação e a leitura falhar, o modelo antigo continua e a recarga é tentada
+de novo.
+
+Rotas:
+    POST /prever        {"instancias": [[quantidade, preparationTime,
+                        takeOutTimeInSeconds], ...]} ou uma lista de objetos
+                        com essas chaves -> {"previsoes": [...], "modelo": ...}
+    GET  /estatisticas  latência p50/p99 (ms), requisições/s, previsões/s,
+                        tamanho médio do lote, recargas
+    GET  /saude         versão (mtime) do modelo carregado
+"""
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from modelo_compacto import ModeloCompacto
+
+
+# Segundos máximos que uma requisição espera pelo seu lote
+TIMEOUT_PEDIDO = 30
+
+
+class Preditor:
+    """Modelo + scaler carregados do artefato, recarregados quando o arquivo muda."""
+
+    def __init__(self, modelo_path):
+        self.modelo_path = modelo_path
+        self.recargas = 0
+        self._assinatura = None
+        self._carregado = None
+        self.recarregar()
+
+    def _ler_assinatura(self):
+        estado = os.stat(self.modelo_path)
+        return estado.st_mtime_ns, estado.st_size
+
+    def recarregar(self):
+        """Carrega o artefato se ele mudou; True se trocou o modelo."""
+        assinatura = self._ler_assinatura()
+        if assinatura == self._assinatura:
+            return False
+        if self.modelo_path.endswith(".npz"):
+            modelo = ModeloCompacto(self.modelo_path)
+            prever, features = modelo.prever, modelo.features
+        else:
+            # .pkl: só aqui o sklearn (e o joblib) são importados
+            import joblib
+            from regressao_linear import FEATURES
+
+            artefato = joblib.load(self.modelo_path)
+            modelo, scaler = artefato["modelo"], artefato["scaler"]
+            prever, features = (lambda X: modelo.predict(scaler.transform(X))), FEATURES
+        versao = datetime.fromtimestamp(assinatura[0] / 1e9).strftime("%Y-%m-%d %H:%M:%S")
+        # Uma atribuição só: a thread de lote vê o modelo antigo ou o novo inteiro
+        self._carregado = (prever, features, versao)
+        if self._assinatura is not None:
+            self.recargas += 1
+        self._assinatura = assinatura
+        return True
+
+    @property
+    def versao(self):
+        return self._carregado[2]
+
+    @property
+    def features(self):
+        return self._carregado[1]
+
+    def prever(self, X):
+        prever, _, versao = self._carregado
+        return prever(X), versao
+
+
+class Estatisticas:
+    """Latências recentes (para p50/p99) e contadores de vazão."""
+
+    def __init__(self, janela=10000):
+        self.latencias_ms = deque(maxlen=janela)
+        self.inicio = time.monotonic()
+        self.requisicoes = 0
+        self.previsoes = 0
+        self.lotes = 0
+        self.erros = 0
+        self._lock = threading.Lock()
+
+    def registrar_lote(self, pedidos, linhas):
+        with self._lock:
+            self.lotes += 1
+            self.requisicoes += pedidos
+            self.previsoes += linhas
+
+    def registrar_erro(self):
+        with self._lock:
+            self.erros += 1
+
+    def registrar_latencia(self, segundos):
+        self.latencias_ms.append(segundos * 1000)
+
+    def resumo(self):
+        decorrido = max(time.monotonic() - self.inicio, 1e-9)
+        latencias = np.array(self.latencias_ms)
+        p50, p99 = np.percentile(latencias, [50, 99]) if len(latencias) else (0.0, 0.0)
+        return {
+            "requisicoes": self.requisicoes,
+            "previsoes": self.previsoes,
+            "lotes": self.lotes,
+            "erros": self.erros,
+            "p50_ms": round(float(p50), 3),
+            "p99_ms": round(float(p99), 3),
+            "requisicoes_por_s": round(self.requisicoes / decorrido, 1),
+            "previsoes_por_s": round(self.previsoes / decorrido, 1),
+            "linhas_por_lote": round(self.previsoes / self.lotes, 1) if self.lotes else 0.0,
+        }
+
+
+class MicroLote:
+    """
+    Junta os pedidos concorrentes em um único predict vetorizado.
+
+    Args:
+        preditor (Preditor): modelo em uso.
+        estatisticas (Estatisticas): contadores de lotes.
+        lote_max (int): linhas máximas por lote.
+        espera_lote (float): segundos que o lote espera por mais pedidos
+            depois do primeiro (0 = só junta o que já está na fila).
+    """
+
+    def __init__(self, preditor, estatisticas, lote_max=256, espera_lote=0.001):
+        self.preditor = preditor
+        self.estatisticas = estatisticas
+        self.lote_max = lote_max
+        self.espera_lote = espera_lote
+        self._fila = queue.Queue()
+        threading.Thread(target=self._laco, name="micro-lote", daemon=True).start()
+
+    def prever(self, X):
+        """Chamado pelas threads das requisições: enfileira e espera o resultado do lote."""
+        pedido = {"X": X, "pronto": threading.Event()}
+        self._fila.put(pedido)
+        if not pedido["pronto"].wait(TIMEOUT_PEDIDO):
+            raise TimeoutError("lote não respondeu a tempo")
+        if "erro" in pedido:
+            raise pedido["erro"]
+        return pedido["y"], pedido["versao"]
+
+    def _juntar(self):
+        pedidos = [self._fila.get()]
+        linhas = len(pedidos[0]["X"])
+        limite = time.perf_counter() + self.espera_lote
+        while linhas < self.lote_max:
+            restante = limite - time.perf_counter()
+            try:
+                pedido = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            pedidos.append(pedido)
+            linhas += len(pedido["X"])
+        return pedidos, linhas
+
+    def _laco(self):
+        while True:
+            pedidos, linhas = self._juntar()
+            try:
+                y, versao = self.preditor.prever(np.concatenate([p["X"] for p in pedidos]))
+            except Exception as e:
+                for pedido in pedidos:
+                    pedido["erro"] = e
+                    pedido["pronto"].set()
+                continue
+            inicio = 0
+            for pedido in pedidos:
+                fim = inicio + len(pedido["X"])
+                pedido["y"] = y[inicio:fim]
+                pedido["versao"] = versao
+                pedido["pronto"].set()
+                inicio = fim
+            self.estatisticas.registrar_lote(len(pedidos), linhas)
+
+
+def _instancias(corpo, features):
+    """JSON da requisição -> matriz (linhas x features)."""
+    dados = json.loads(corpo)
+    if isinstance(dados, dict):
+        dados = dados.get("instancias", [dados])
+    linhas = [[item[f] for f in features] if isinstance(item, dict) else item for item in dados]
+    X = np.asarray(linhas, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(features) or not len(X):
+        raise ValueError(f"esperado uma lista de instâncias com {len(features)} valores: {', '.join(features)}")
+    # O json do Python aceita NaN/Infinity, mas a resposta com eles não é JSON válido
+    invalidas = np.flatnonzero(~np.isfinite(X).all(axis=1))
+    if len(invalidas):
+        raise ValueError(f"valores não finitos (NaN/Infinity) nas instâncias: {', '.join(map(str, invalidas[:10]))}")
+    return X
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Conexões persistentes: o cliente não paga um handshake por predição
+    protocol_version = "HTTP/1.1"
+    lote = None
+    preditor = None
+    estatisticas = None
+
+    def do_POST(self):
+        inicio = time.perf_counter()
+        if self.path != "/prever":
+            self._responder(404, {"erro": "Rotas: POST /prever, GET /estatisticas, GET /saude"})
+            return
+        try:
+            X = _instancias(self.rfile.read(int(self.headers.get("Content-Length", 0))), self.preditor.features)
+        except (ValueError, KeyError, TypeError) as e:
+            self.estatisticas.registrar_erro()
+            self._responder(400, {"erro": f"Entrada inválida: {e}"})
+            return
+        try:
+            y, versao = self.lote.prever(X)
+        except Exception as e:
+            self.estatisticas.registrar_erro()
+            self._responder(503, {"erro": str(e)})
+            return
+        self._responder(200, {"previsoes": y.tolist(), "modelo": versao})
+        self.estatisticas.registrar_latencia(time.perf_counter() - inicio)
+
+    def do_GET(self):
+        if self.path == "/estatisticas":
+            self._responder(200, {**self.estatisticas.resumo(), "recargas": self.preditor.recargas, "modelo": self.preditor.versao})
+        elif self.path == "/saude":
+            self._responder(200, {"modelo": self.preditor.versao})
+        else:
+            self._responder(404, {"erro": "Rotas: POST /prever, GET /estatisticas, GET /saude"})
+
+    def _responder(self, status, dados):
+        corpo = json.dumps(dados).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        # Uma linha por requisição custaria mais que a própria predição
+        pass
+
+
+class _ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # BaseHTTPRequestHandler espera um endereço de cliente (host, porta)
+        conexao, _ = super().get_request()
+        return conexao, ("unix", 0)
+
+
+def _vigiar(preditor, intervalo, parar):
+    while not parar.wait(intervalo):
+        try:
+            if preditor.recarregar():
+                print(f"Modelo recarregado (versão {preditor.versao})")
+        except Exception as e:
+            # Arquivo no meio da gravação ou removido: mantém o modelo atual
+            print(f"Aviso: falha ao recarregar {preditor.modelo_path}: {e}")
+
+
+def executar_servidor(
+    modelo_path="/data/modelo_regressao.npz",
+    porta=9500,
+    host="127.0.0.1",
+    socket_path=None,
+    lote_max=256,
+    espera_lote_ms=1.0,
+    intervalo_recarga=1.0,
+    intervalo_relatorio=10.0,
+):
+    """
+    Serve predições até Ctrl+C, imprimindo latência e vazão periodicamente.
+
+    Args:
+        modelo_path (str): artefato salvo pela regressão (.npz ou .pkl).
+        porta (int): porta TCP (ignorada com socket_path).
+        host (str): interface de escuta (127.0.0.1 = apenas local).
+        socket_path (str): se informado, serve HTTP em um socket Unix.
+        lote_max (int): linhas máximas por lote.
+        espera_lote_ms (float): espera por mais pedidos antes de fechar o lote.
+        intervalo_recarga (float): segundos entre verificações do artefato.
+        intervalo_relatorio (float): segundos entre relatórios (0 = só no fim).
+    """
+    try:
+        preditor = Preditor(modelo_path)
+    except FileNotFoundError:
+        print(f"Erro: modelo não encontrado em {modelo_path}. Rode 'regressao_linear' primeiro.")
+        return
+    except ValueError as e:
+        # Ex.: artefato por grupo (--por-grupo), que precisa do grupo de cada instância
+        print(f"Erro: {e}")
+        print("O servidor usa o modelo global (.npz de 'regressao_linear' sem --por-grupo).")
+        return
+    estatisticas = Estatisticas()
+    lote = MicroLote(preditor, estatisticas, lote_max, espera_lote_ms / 1000)
+    handler = type("Handler", (_Handler,), {"lote": lote, "preditor": preditor, "estatisticas": estatisticas})
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        servidor = _ServidorUnix(socket_path, handler)
+        endereco = f"unix:{socket_path}"
+    else:
+        servidor = ThreadingHTTPServer((host, porta), handler)
+        servidor.daemon_threads = True
+        endereco = f"http://{host}:{porta}"
+    print(f"Servindo {modelo_path} (versão {preditor.versao}) em {endereco}/prever")
+
+    parar = threading.Event()
+    threading.Thread(target=_vigiar, args=(preditor, intervalo_recarga, parar), name="recarga", daemon=True).start()
+    if intervalo_relatorio:
+        def relatar():
+            while not parar.wait(intervalo_relatorio):
+                r = estatisticas.resumo()
+                print(
+                    f"[servir] {r['requisicoes']} req | p50 {r['p50_ms']} ms | p99 {r['p99_ms']} ms | "
+                    f"{r['requisicoes_por_s']} req/s | {r['previsoes_por_s']} previsões/s | "
+                    f"{r['linhas_por_lote']} linhas/lote"
+                )
+        threading.Thread(target=relatar, name="relatorio", daemon=True).start()
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServidor encerrado pelo usuário.")
+    finally:
+        parar.set()
+        servidor.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+        r = estatisticas.resumo()
+        print(
+            f"Requisições: {r['requisicoes']} ({r['erros']} com erro) | previsões: {r['previsoes']} | "
+            f"lotes: {r['lotes']} ({r['linhas_por_lote']} linhas/lote) | recargas: {preditor.recargas}"
+        )
+        print(
+            f"Latência p50: {r['p50_ms']} ms | p99: {r['p99_ms']} ms | "
+            f"{r['requisicoes_por_s']} req/s | {r['previsoes_por_s']} previsões/s"
+        )
@@ -0,0 +1,256 @@
+# app/sinks.py
+import csv
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+class SinkCSV:
+    """
+    Grava as amostras em um arquivo CSV (modo append).
+
+    Com `retencao_segundos`, a cada `verificar_retencao_segundos` o flush
+    remove do início do arquivo as linhas mais velhas que a janela.
+
+    Com `indice_passo`, mantém o índice esparso (.idx, ver consulta.py) com o
+    offset de uma linha a cada `indice_passo` linhas gravadas.
+    """
+
+    def __init__(
+        self,
+        caminho,
+        campos,
+        retencao_segundos=None,
+        verificar_retencao_segundos=60.0,
+        indice_passo=None,
+    ):
+        self.caminho = caminho
+        self.campos = list(campos)
+        self.retencao_segundos = retencao_segundos
+        self.verificar_retencao_segundos = verificar_retencao_segundos
+        self._ultima_retencao = time.monotonic()
+        self._indice = None
+        self._linhas = 0
+        arquivo_existe = os.path.isfile(caminho) and os.path.getsize(caminho) > 0
+        if arquivo_existe and self._ler_cabecalho() != self.campos:
+            # Colunas mudaram: preserva o arquivo antigo e começa um novo
+            sufixo = datetime.now().strftime("%Y%m%d_%H%M%S")
+            raiz, ext = os.path.splitext(caminho)
+            antigo = f"{raiz}_{sufixo}{ext}"
+            os.replace(caminho, antigo)
+            print(f"Aviso: cabeçalho de {caminho} diferente do atual; arquivo antigo movido para {antigo}")
+            arquivo_existe = False
+        self._arquivo = open(caminho, mode="a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(
+            self._arquivo, fieldnames=self.campos, extrasaction="ignore"
+        )
+        # Cria cabeçalho se o arquivo for novo
+        if not arquivo_existe:
+            self._writer.writeheader()
+
+        if indice_passo:
+            from consulta import IndiceEsparso
+
+            self._indice = IndiceEsparso(caminho, passo=indice_passo)
+            if arquivo_existe:
+                self._indice.carregar()
+                if not self._indice.valido():
+                    self._indice.reconstruir()
+            else:
+                self._arquivo.flush()
+                self._indice.reconstruir()
+
+    def _ler_cabecalho(self):
+        with open(self.caminho, newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), [])
+
+    def escrever(self, amostras):
+        if self._indice is None:
+            self._writer.writerows(amostras)
+            return
+        for amostra in amostras:
+            if self._linhas % self._indice.passo == 0:
+                # Em modo texto sem decodificador, tell() é a posição em bytes
+                self._indice.registrar(amostra["timestamp"], self._arquivo.tell())
+            self._writer.writerow(amostra)
+            self._linhas += 1
+
+    def flush(self):
+        self._arquivo.flush()
+        if self._indice is not None:
+            self._indice.flush()
+        if self.retencao_segundos and (
+            time.monotonic() - self._ultima_retencao >= self.verificar_retencao_segundos
+        ):
+            self._aplicar_retencao()
+
+    def _aplicar_retencao(self):
+        from retencao import aplicar_retencao
+
+        self._ultima_retencao = time.monotonic()
+        limite = datetime.now() - timedelta(seconds=self.retencao_segundos)
+        self._arquivo.close()
+        try:
+            removidas = aplicar_retencao(self.caminho, limite)
+        finally:
+            self._arquivo = open(self.caminho, mode="a", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(
+                self._arquivo, fieldnames=self.campos, extrasaction="ignore"
+            )
+        # Offsets mudaram: refaz o índice
+        if removidas and self._indice is not None:
+            self._indice.reconstruir()
+            self._linhas = 0
+
+    def fechar(self):
+        self._arquivo.close()
+        if self._indice is not None:
+            self._indice.fechar()
+
+
+class SinkSQLite:
+    """Grava as amostras em uma tabela SQLite, uma transação por lote."""
+
+    def __init__(self, caminho, campos, tabela="amostras"):
+        self.caminho = caminho
+        self.campos = list(campos)
+        self.tabela = tabela
+        # O sink é criado na thread principal e usado pela thread escritora
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        colunas = ", ".join(f'"{c}"' for c in self.campos)
+        self._conexao.execute(f'CREATE TABLE IF NOT EXISTS "{tabela}" ({colunas})')
+        # Tabela criada por uma versão anterior: acrescenta as colunas novas
+        existentes = {linha[1] for linha in self._conexao.execute(f'PRAGMA table_info("{tabela}")')}
+        for c in self.campos:
+            if c not in existentes:
+                self._conexao.execute(f'ALTER TABLE "{tabela}" ADD COLUMN "{c}"')
+        marcadores = ", ".join("?" for _ in self.campos)
+        self._sql_insert = f'INSERT INTO "{tabela}" ({colunas}) VALUES ({marcadores})'
+
+    def escrever(self, amostras):
+        linhas = [tuple(a.get(c) for c in self.campos) for a in amostras]
+        self._conexao.executemany(self._sql_insert, linhas)
+
+    def flush(self):
+        self._conexao.commit()
+
+    def fechar(self):
+        self._conexao.commit()
+        self._conexao.close()
+
+
+class SinkStdout:
+    """Imprime cada amostra no terminal, no formato do monitor original."""
+
+    def __init__(self, campos=None, stream=None):
+        self.campos = list(campos or [])
+        self._stream = stream or sys.stdout
+
+    def escrever(self, amostras):
+        linhas = []
+        for a in amostras:
+            linhas.append(
+                f"{a['timestamp']} | CPU: {a['cpu_percent']:.1f}% | MEM: {a['mem_percent']:.1f}%\n"
+            )
+        self._stream.write("".join(linhas))
+
+    def flush(self):
+        self._stream.flush()
+
+    def fechar(self):
+        self.flush()
+
+
+class SinkNulo:
+    """Descarta as amostras (útil para medir o custo da coleta isolada)."""
+
+    def __init__(self, campos=None):
+        self.campos = list(campos or [])
+
+    def escrever(self, amostras):
+        pass
+
+    def flush(self):
+        pass
+
+    def fechar(self):
+        pass
+
+
+class SinkMultiplo:
+    """Repassa cada lote para vários sinks."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def escrever(self, amostras):
+        for sink in self.sinks:
+            sink.escrever(amostras)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def fechar(self):
+        for sink in self.sinks:
+            sink.fechar()
+
+
+SINKS_DISPONIVEIS = ["csv", "sqlite", "serie", "rede", "stdout", "none"]
+
+
+def criar_sink(
+    nomes,
+    output_path,
+    campos,
+    retencao_segundos=None,
+    indice_passo=None,
+    agregador_url=None,
+    host_id=None,
+):
+    """
+    Cria o sink (ou a combinação de sinks) a partir dos nomes informados.
+
+    Args:
+        nomes (str | list): nomes separados por vírgula, ex.: "csv,stdout".
+        output_path (str): caminho do CSV; o SQLite usa o mesmo nome com extensão
+            .db e o formato colunar (serie_temporal.py), a extensão .hts.
+        campos (list): colunas de cada amostra.
+        retencao_segundos (float): janela mantida no CSV bruto (None = tudo).
+        indice_passo (int): se informado, o CSV mantém um índice esparso (.idx).
+        agregador_url (str): destino do sink "rede" (tcp://host:porta ou udp://...).
+        host_id (str): nome deste host para o agregador (padrão: hostname).
+    """
+    if isinstance(nomes, str):
+        nomes = [n.strip() for n in nomes.split(",") if n.strip()]
+
+    sinks = []
+    for nome in nomes:
+        if nome == "csv":
+            sinks.append(SinkCSV(
+                output_path, campos, retencao_segundos=retencao_segundos, indice_passo=indice_passo
+            ))
+        elif nome == "sqlite":
+            caminho_db = os.path.splitext(output_path)[0] + ".db"
+            sinks.append(SinkSQLite(caminho_db, campos))
+        elif nome == "serie":
+            # Importado aqui para o monitor só carregar NumPy quando usar o formato
+            from serie_temporal import EscritorSerie
+            sinks.append(EscritorSerie(os.path.splitext(output_path)[0] + ".hts", campos))
+        elif nome == "rede":
+            from agregador import SinkRede
+            sinks.append(SinkRede(agregador_url, campos, host_id=host_id))
+        elif nome == "stdout":
+            sinks.append(SinkStdout(campos))
+        elif nome == "none":
+            sinks.append(SinkNulo(campos))
+        else:
+            raise ValueError(
+                f"Sink desconhecido: '{nome}'. Opções: {', '.join(SINKS_DISPONIVEIS)}"
+            )
+
+    if len(sinks) == 1:
+        return sinks[0]
+    return SinkMultiplo(sinks)
@@ -0,0 +1,125 @@
+# app/test_consulta.py
+"""Testes do índice esparso e da consulta por período sobre o historico.csv."""
+import csv
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from datetime import datetime, timedelta
+
+from consulta import IndiceEsparso, caminho_indice, consultar
+from sinks import SinkCSV
+
+
+CAMPOS = ["timestamp", "cpu_percent", "mem_percent", "ticks_perdidos"]
+INICIO = datetime(2025, 1, 1)
+
+
+def _amostras(n, inicio=INICIO):
+    return [
+        {
+            "timestamp": (inicio + timedelta(seconds=5 * i)).strftime("%Y-%m-%d %H:%M:%S"),
+            "cpu_percent": (i * 37) % 100,
+            "mem_percent": "" if i % 13 == 0 else 40 + i % 7,
+            "ticks_perdidos": 0,
+        }
+        for i in range(n)
+    ]
+
+
+class TestConsulta(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.csv = os.path.join(self.pasta.name, "historico.csv")
+        self.amostras = _amostras(5000)
+        sink = SinkCSV(self.csv, CAMPOS, indice_passo=100)
+        for i in range(0, len(self.amostras), 250):
+            sink.escrever(self.amostras[i:i + 250])
+            sink.flush()
+        sink.fechar()
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def _consultar(self, **kwargs):
+        saida = io.StringIO()
+        consultar(self.csv, saida=saida, **kwargs)
+        return list(csv.DictReader(io.StringIO(saida.getvalue())))
+
+    def test_indice_aponta_para_o_inicio_das_linhas(self):
+        indice = IndiceEsparso(self.csv).carregar()
+        self.assertEqual(len(indice.offsets), 50)
+        self.assertTrue(indice.valido())
+        with open(self.csv, "rb") as f:
+            for timestamp, offset in zip(indice.timestamps, indice.offsets):
+                f.seek(offset)
+                self.assertTrue(f.readline().startswith(timestamp.encode() + b","))
+
+    def test_buscar(self):
+        indice = IndiceEsparso(self.csv).carregar()
+        self.assertIsNone(indice.buscar(self.amostras[0]["timestamp"]))
+        alvo = self.amostras[1234]["timestamp"]
+        offset = indice.buscar(alvo)
+        with open(self.csv, "rb") as f:
+            f.seek(offset)
+            encontrado = f.readline().decode().split(",")[0]
+        # Entrada anterior ao alvo, no máximo um passo antes
+        self.assertLess(encontrado, alvo)
+        self.assertEqual(encontrado, self.amostras[1200]["timestamp"])
+
+    def test_reconstruir_igual_ao_do_escritor(self):
+        gravado = IndiceEsparso(self.csv, passo=100).carregar()
+        with open(caminho_indice(self.csv), "rb") as f:
+            conteudo = f.read()
+        refeito = IndiceEsparso(self.csv, passo=100).reconstruir(gravar=False)
+        self.assertEqual(refeito.timestamps, gravado.timestamps)
+        self.assertEqual(refeito.offsets, gravado.offsets)
+        # Leitor não mexe no .idx do escritor
+        with open(caminho_indice(self.csv), "rb") as f:
+            self.assertEqual(f.read(), conteudo)
+
+    def test_periodo_igual_a_forca_bruta(self):
+        inicio = self.amostras[1503]["timestamp"]
+        fim = self.amostras[2711]["timestamp"]
+        linhas = self._consultar(
+            inicio=inicio, fim=fim, colunas=["cpu_percent", "mem_percent"], passo=60,
+            agregacoes=["mean", "count", "max"],
+        )
+        buckets = {}
+        for a in self.amostras:
+            if inicio <= a["timestamp"] <= fim:
+                instante = datetime.fromisoformat(a["timestamp"])
+                chave = instante.replace(second=0).strftime("%Y-%m-%d %H:%M:%S")
+                buckets.setdefault(chave, []).append(a)
+        self.assertEqual([l["timestamp"] for l in linhas], sorted(buckets))
+        for linha in linhas:
+            grupo = buckets[linha["timestamp"]]
+            cpu = [a["cpu_percent"] for a in grupo]
+            mem = [a["mem_percent"] for a in grupo if a["mem_percent"] != ""]
+            self.assertAlmostEqual(float(linha["cpu_percent_mean"]), round(sum(cpu) / len(cpu), 3))
+            self.assertEqual(int(linha["cpu_percent_count"]), len(cpu))
+            self.assertEqual(int(linha["mem_percent_count"]), len(mem))
+            self.assertEqual(float(linha["cpu_percent_max"]), max(cpu))
+
+    def test_indice_desatualizado(self):
+        # CSV reescrito (ex.: retenção) sem atualizar o .idx: offsets apontam para o lugar errado
+        with open(self.csv, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.DictWriter(f, fieldnames=CAMPOS)
+            escritor.writeheader()
+            escritor.writerows(self.amostras[777:])
+        self.assertFalse(IndiceEsparso(self.csv).carregar().valido())
+        inicio = self.amostras[3000]["timestamp"]
+        linhas = self._consultar(inicio=inicio, fim=self.amostras[3011]["timestamp"], agregacoes=["count"], passo=3600)
+        self.assertEqual(sum(int(l["cpu_percent_count"]) for l in linhas), 12)
+
+    def test_sem_arquivo(self):
+        erros = io.StringIO()
+        with redirect_stderr(erros):
+            emitidos = consultar(os.path.join(self.pasta.name, "nao_existe.csv"), saida=io.StringIO())
+        self.assertEqual(emitidos, 0)
+        self.assertIn("Arquivo não encontrado", erros.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# app/test_memoria_compartilhada.py
+"""Testes do ring buffer em memória compartilhada e do seqlock do leitor."""
+import os
+import threading
+import unittest
+
+import numpy as np
+
+from memoria_compartilhada import LeitorAmostras, PublicadorAmostras
+
+
+CAMPOS = ["timestamp", "cpu_percent", "mem_percent", "ticks_perdidos"]
+
+
+def _amostra(n):
+    return {
+        "timestamp": f"2025-01-01 00:{n // 60 % 60:02d}:{n % 60:02d}",
+        "cpu_percent": float(n),
+        "mem_percent": float(n) / 2,
+        "ticks_perdidos": 0,
+    }
+
+
+class TestRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.nome = f"teste_ring_{os.getpid()}_{self._testMethodName}"[:60]
+        self.publicadores = []
+        self.leitores = []
+
+    def tearDown(self):
+        for leitor in self.leitores:
+            leitor.fechar()
+        for publicador in self.publicadores:
+            publicador.fechar()
+
+    def _publicador(self, campos=CAMPOS, capacidade=16):
+        publicador = PublicadorAmostras(campos, nome=self.nome, capacidade=capacidade)
+        self.publicadores.append(publicador)
+        return publicador
+
+    def _leitor(self):
+        leitor = LeitorAmostras(self.nome)
+        self.leitores.append(leitor)
+        return leitor
+
+    def test_ida_e_volta(self):
+        publicador = self._publicador()
+        leitor = self._leitor()
+        for n in range(1, 11):
+            publicador.publicar(_amostra(n))
+        novas = leitor.ler_novas()
+        self.assertEqual(novas["seq"].tolist(), list(range(1, 11)))
+        self.assertEqual(novas["cpu_percent"].tolist(), [float(n) for n in range(1, 11)])
+        self.assertEqual(novas["timestamp_ms"][0], np.datetime64("2025-01-01T00:00:01", "ms").astype(np.int64))
+        self.assertEqual(len(leitor.ler_novas()), 0)
+        self.assertEqual(leitor.perdidas, 0)
+        self.assertEqual(leitor.ultima()["cpu_percent"], 10.0)
+
+    def test_leitor_atrasado_conta_perdidas(self):
+        publicador = self._publicador(capacidade=8)
+        leitor = self._leitor()
+        for n in range(1, 21):
+            publicador.publicar(_amostra(n))
+        novas = leitor.ler_novas()
+        self.assertEqual(novas["seq"].tolist(), list(range(13, 21)))
+        self.assertEqual(leitor.perdidas, 12)
+
+    def test_slot_em_escrita_e_descartado(self):
+        publicador = self._publicador()
+        leitor = self._leitor()
+        for n in range(1, 6):
+            publicador.publicar(_amostra(n))
+        # Escritor parado entre os passos 1 e 3 do protocolo no slot da amostra 3
+        publicador._slots[2]["seq"] = 0
+        publicador._slots[2]["cpu_percent"] = -1.0
+        novas = leitor.ler_novas()
+        self.assertEqual(novas["seq"].tolist(), [1, 2, 4, 5])
+        self.assertNotIn(-1.0, novas["cpu_percent"].tolist())
+        self.assertEqual(leitor.perdidas, 1)
+
+    def test_muitos_campos(self):
+        # Nomes longos ocupam mais que um cabeçalho de tamanho fixo comportaria
+        campos = ["timestamp"] + [f"rede_interface_com_nome_longo_{i}_rx_bps" for i in range(400)]
+        publicador = self._publicador(campos=campos, capacidade=4)
+        leitor = self._leitor()
+        self.assertEqual(leitor.campos, campos[1:])
+        amostra = {"timestamp": "2025-01-01 00:00:00"}
+        amostra.update({c: float(i) for i, c in enumerate(campos[1:])})
+        publicador.publicar(amostra)
+        self.assertEqual(leitor.ler_novas()[campos[-1]].tolist(), [399.0])
+
+    def test_leitura_concorrente_consistente(self):
+        # Invariante de cada amostra: cpu_percent == 2 * mem_percent == seq
+        publicador = self._publicador(capacidade=8)
+        leitor = self._leitor()
+        total = 20000
+        parar = threading.Event()
+
+        def escrever():
+            for n in range(1, total + 1):
+                publicador.publicar(_amostra(n))
+            parar.set()
+
+        thread = threading.Thread(target=escrever)
+        thread.start()
+        lidas = []
+        while not parar.is_set():
+            lidas.append(leitor.ler_novas())
+        thread.join()
+        lidas.append(leitor.ler_novas())
+        registros = np.concatenate(lidas)
+
+        seq = registros["seq"].astype(np.float64)
+        np.testing.assert_array_equal(registros["cpu_percent"], seq)
+        np.testing.assert_array_equal(registros["mem_percent"] * 2, seq)
+        self.assertTrue((np.diff(registros["seq"].astype(np.int64)) > 0).all())
+        self.assertEqual(len(registros) + leitor.perdidas, total)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# app/test_regressao_grupos.py
+"""Testes da regressão por grupo: mesmo resultado de um LinearRegression por grupo."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from modelo_compacto import ModeloPorGrupo
+from regressao_grupos import _ajustar_grupos, treinar_por_grupo
+
+
+CABECALHO = "id;createdAt;segmento;empresa;produto;customer;quantidade;totalAmount;preparationTime;takeOutTimeInSeconds;isTest\n"
+
+
+def _dados_grupos(semente=42):
+    """Grupos de tamanhos variados, cada um com a própria reta."""
+    rng = np.random.default_rng(semente)
+    tamanhos = [400, 150, 40, 12, 3, 1]
+    codigos = np.repeat(np.arange(len(tamanhos)), tamanhos)
+    rng.shuffle(codigos)
+    X = rng.normal(0, 1, (len(codigos), 3)) * [2, 10, 500] + [3, 30, 1500]
+    pesos = rng.normal(0, 1, (len(tamanhos), 3)) * [10, 0.5, 0.01]
+    y = np.einsum("ij,ij->i", X, pesos[codigos]) + rng.normal(0, 1, len(codigos)) + 5 * codigos
+    return codigos, X, y, len(tamanhos)
+
+
+class TestAjustarGrupos(unittest.TestCase):
+    def test_igual_ao_sklearn_por_grupo(self):
+        codigos, X, y, grupos = _dados_grupos()
+        coef, vies, linhas = _ajustar_grupos(codigos, X, y, grupos)
+        np.testing.assert_array_equal(linhas, np.bincount(codigos))
+        for g in range(grupos):
+            mascara = codigos == g
+            referencia = LinearRegression().fit(X[mascara], y[mascara])
+            previsto = X[mascara] @ coef[g] + vies[g]
+            with self.subTest(grupo=g, linhas=int(mascara.sum())):
+                np.testing.assert_allclose(previsto, referencia.predict(X[mascara]), rtol=1e-8, atol=1e-6)
+                if mascara.sum() > X.shape[1] + 1:
+                    # Posto completo: os mesmos coeficientes
+                    np.testing.assert_allclose(coef[g], referencia.coef_, rtol=1e-7, atol=1e-9)
+                    self.assertAlmostEqual(vies[g], referencia.intercept_, places=5)
+
+    def test_feature_constante_no_grupo(self):
+        codigos, X, y, grupos = _dados_grupos(7)
+        X[codigos == 0, 2] = 1000.0
+        coef, vies, _ = _ajustar_grupos(codigos, X, y, grupos)
+        mascara = codigos == 0
+        referencia = LinearRegression().fit(X[mascara], y[mascara])
+        self.assertAlmostEqual(coef[0, 2], 0.0, places=10)
+        np.testing.assert_allclose(X[mascara] @ coef[0] + vies[0], referencia.predict(X[mascara]), rtol=1e-8)
+
+    def test_grupo_unico_igual_ao_global(self):
+        codigos, X, y, _ = _dados_grupos()
+        coef, vies, _ = _ajustar_grupos(np.zeros(len(y), dtype=np.intp), X, y, 1)
+        referencia = LinearRegression().fit(X, y)
+        np.testing.assert_allclose(coef[0], referencia.coef_, rtol=1e-8)
+        self.assertAlmostEqual(vies[0], referencia.intercept_, places=6)
+
+
+class TestTreinarPorGrupo(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.csv = os.path.join(self.pasta.name, "base_unificada.csv")
+        codigos, X, y, _ = _dados_grupos()
+        self.empresas = np.array([f"Restaurante {c:04d}" for c in codigos])
+        self.X = np.round(np.abs(X)).astype(np.int64).astype(np.float64)
+        self.y = np.round(np.abs(y), 2)
+        with open(self.csv, "w", encoding="cp1250") as f:
+            f.write(CABECALHO)
+            for i, (empresa, (q, p, t), alvo) in enumerate(zip(self.empresas, self.X, self.y)):
+                f.write(f"{i + 1};01/01/2023 00:00:00;Pizza;{empresa};Produto 1;Cliente 1;{int(q)};{alvo};{int(p)};{int(t)};False\n")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def _conferir(self, colunar):
+        modelo_path = os.path.join(self.pasta.name, f"grupos_{colunar}.npz")
+        with mock.patch("builtins.print"):
+            treinar_por_grupo(self.csv, "empresa", modelo_path, min_linhas=20, colunar=colunar)
+        modelo = ModeloPorGrupo(modelo_path)
+        # Mesmo sorteio de teste do treinar_por_grupo
+        treino = ~(np.random.default_rng(42).random(len(self.y)) < 0.2)
+        X, y, empresas = self.X[treino], self.y[treino], self.empresas[treino]
+        global_ = LinearRegression().fit(X, y)
+        for empresa in np.unique(self.empresas):
+            mascara = empresas == empresa
+            referencia = LinearRegression().fit(X[mascara], y[mascara]) if mascara.sum() >= 20 else global_
+            with self.subTest(empresa=empresa, colunar=colunar):
+                np.testing.assert_allclose(
+                    modelo.prever(X[mascara], empresas[mascara]), referencia.predict(X[mascara]), rtol=1e-7, atol=1e-5
+                )
+        # Grupo desconhecido: modelo global
+        np.testing.assert_allclose(modelo.prever(X[:5], ["Outra"] * 5), global_.predict(X[:5]), rtol=1e-7)
+        return modelo
+
+    def test_colunar_e_csv_iguais_ao_sklearn(self):
+        colunar = self._conferir(colunar=True)
+        direto = self._conferir(colunar=False)
+        self.assertEqual(colunar.grupos.tolist(), direto.grupos.tolist())
+        np.testing.assert_allclose(colunar.pesos, direto.pesos, rtol=1e-10)
+
+
+if __name__ == "__main__":
+    unittest.main()
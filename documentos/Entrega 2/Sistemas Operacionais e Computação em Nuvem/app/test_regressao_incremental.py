@@ -0,0 +1,166 @@
+# app/test_regressao_incremental.py
+"""Testes do treino incremental: mesmo resultado de um ajuste com todas as linhas."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+import regressao_incremental
+from regressao_incremental import Estatisticas, treinar_incremental
+
+
+CABECALHO = "id;createdAt;segmento;quantidade;totalAmount;preparationTime;takeOutTimeInSeconds\n"
+
+
+def _dados(n, semente=42):
+    rng = np.random.default_rng(semente)
+    X = np.column_stack([
+        rng.integers(1, 6, n),
+        rng.integers(5, 60, n),
+        rng.integers(60, 4000, n),
+    ]).astype(np.float64)
+    y = 30 * X[:, 0] + 0.4 * X[:, 1] + 0.002 * X[:, 2] + rng.normal(0, 5, n)
+    return X, np.round(y, 2)
+
+
+def _linhas(X, y, inicio=0):
+    return [
+        f"{inicio + i + 1};01/01/2023 00:00:00;Pizza;{int(q)};{alvo};{int(p)};{int(t)}\n"
+        for i, ((q, p, t), alvo) in enumerate(zip(X, y))
+    ]
+
+
+def _ajuste_completo(X, y):
+    scaler = StandardScaler().fit(X)
+    return scaler, LinearRegression().fit(scaler.transform(X), y)
+
+
+class TestEstatisticas(unittest.TestCase):
+    def test_blocos_iguais_a_um_bloco_so(self):
+        X, y = _dados(5000)
+        Z = np.column_stack([X, y])
+        inteiro = Estatisticas(4)
+        inteiro.atualizar(Z)
+        em_blocos = Estatisticas(4)
+        for parte in np.array_split(Z, [1, 7, 1000, 1001, 3500]):
+            em_blocos.atualizar(parte)
+        self.assertEqual(em_blocos.n, inteiro.n)
+        np.testing.assert_allclose(em_blocos.media, inteiro.media, rtol=1e-12)
+        np.testing.assert_allclose(em_blocos.comomento, inteiro.comomento, rtol=1e-10)
+
+    def test_resolver_igual_ao_sklearn(self):
+        X, y = _dados(3000)
+        estatisticas = Estatisticas(4)
+        estatisticas.atualizar(np.column_stack([X, y]))
+        solucao = estatisticas.resolver()
+        scaler, modelo = _ajuste_completo(X, y)
+        np.testing.assert_allclose(solucao["media"], scaler.mean_, rtol=1e-12)
+        np.testing.assert_allclose(solucao["escala"], scaler.scale_, rtol=1e-12)
+        np.testing.assert_allclose(solucao["coef"], modelo.coef_, rtol=1e-9)
+        self.assertAlmostEqual(solucao["intercepto"], modelo.intercept_, places=9)
+        self.assertAlmostEqual(solucao["r2"], modelo.score(scaler.transform(X), y), places=9)
+
+    def test_coluna_constante(self):
+        X, y = _dados(500)
+        X[:, 1] = 7.0
+        estatisticas = Estatisticas(4)
+        estatisticas.atualizar(np.column_stack([X, y]))
+        solucao = estatisticas.resolver()
+        self.assertEqual(solucao["escala"][1], 1.0)
+        self.assertEqual(solucao["coef"][1], 0.0)
+        self.assertEqual(solucao["posto"], 2)
+
+    def test_para_dict_ida_e_volta(self):
+        X, y = _dados(100)
+        estatisticas = Estatisticas(4)
+        estatisticas.atualizar(np.column_stack([X, y]))
+        copia = Estatisticas.de_dict(estatisticas.para_dict())
+        np.testing.assert_array_equal(copia.comomento, estatisticas.comomento)
+        self.assertEqual(copia.n, estatisticas.n)
+
+
+class TestTreinoIncremental(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.csv = os.path.join(self.pasta.name, "base.csv")
+        self.modelo = os.path.join(self.pasta.name, "modelo.pkl")
+        self.estado = os.path.join(self.pasta.name, "estado.json")
+        # Blocos pequenos: o CSV de teste atravessa vários
+        patcher = mock.patch.object(regressao_incremental, "BLOCO_BYTES", 1000)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def _treinar(self, **kwargs):
+        with mock.patch("builtins.print"):
+            return treinar_incremental(self.csv, self.modelo, self.estado, **kwargs)
+
+    def _conferir_modelo(self, X, y):
+        artefato = joblib.load(self.modelo)
+        scaler, modelo = _ajuste_completo(X, y)
+        np.testing.assert_allclose(artefato["scaler"].mean_, scaler.mean_, rtol=1e-12)
+        np.testing.assert_allclose(artefato["modelo"].coef_, modelo.coef_, rtol=1e-9)
+        self.assertAlmostEqual(artefato["modelo"].intercept_, modelo.intercept_, places=9)
+
+    def test_em_partes_igual_ao_ajuste_completo(self):
+        X, y = _dados(2000)
+        linhas = _linhas(X, y)
+        with open(self.csv, "w", encoding="cp1250") as f:
+            f.write(CABECALHO)
+            f.writelines(linhas[:1200])
+            # Escritor no meio da linha 1201 (sem a quebra de linha)
+            f.write(linhas[1200][:-4])
+        resultado = self._treinar()
+        self.assertEqual(resultado["linhas"], 1200)
+        self._conferir_modelo(X[:1200], y[:1200])
+
+        with open(self.csv, "a", encoding="cp1250") as f:
+            f.write(linhas[1200][-4:])
+            f.writelines(linhas[1201:])
+        resultado = self._treinar()
+        self.assertEqual(resultado["novas"], 800)
+        self.assertEqual(resultado["linhas"], 2000)
+        self._conferir_modelo(X, y)
+
+        # Sem linhas novas: nada é lido de novo
+        self.assertEqual(self._treinar()["novas"], 0)
+
+    def test_linhas_invalidas_descartadas(self):
+        X, y = _dados(300)
+        linhas = _linhas(X, y)
+        linhas[10] = "11;01/01/2023 00:00:00;Pizza;;50.0;10;100\n"
+        linhas[20] = "21;01/01/2023 00:00:00;Pizza;2;abc;10;100\n"
+        with open(self.csv, "w", encoding="cp1250") as f:
+            f.write(CABECALHO)
+            f.writelines(linhas)
+        resultado = self._treinar()
+        self.assertEqual(resultado["descartadas"], 2)
+        validas = np.ones(300, dtype=bool)
+        validas[[10, 20]] = False
+        self._conferir_modelo(X[validas], y[validas])
+
+    def test_recomeca_quando_o_trecho_lido_muda(self):
+        X, y = _dados(400)
+        with open(self.csv, "w", encoding="cp1250") as f:
+            f.write(CABECALHO)
+            f.writelines(_linhas(X, y))
+        self._treinar()
+        # Arquivo reescrito com outros dados (mesmo cabeçalho)
+        X2, y2 = _dados(500, semente=7)
+        with open(self.csv, "w", encoding="cp1250") as f:
+            f.write(CABECALHO)
+            f.writelines(_linhas(X2, y2))
+        resultado = self._treinar()
+        self.assertEqual(resultado["linhas"], 500)
+        self._conferir_modelo(X2, y2)
+
+
+if __name__ == "__main__":
+    unittest.main()
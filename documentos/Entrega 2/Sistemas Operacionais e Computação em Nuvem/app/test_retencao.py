@@ -0,0 +1,58 @@
+# app/test_retencao.py
+"""Testes do estimador P² usado no p95 dos rollups (python -m pytest app)."""
+import unittest
+
+import numpy as np
+
+from retencao import EstimadorP2, percentil
+
+
+class TestEstimadorP2(unittest.TestCase):
+    def _estimar(self, valores, p=95):
+        estimador = EstimadorP2(p)
+        for valor in valores:
+            estimador.adicionar(float(valor))
+        return estimador
+
+    def test_exato_ate_cinco_valores(self):
+        for n in range(1, 6):
+            valores = [3.0, -1.0, 7.5, 2.0, 10.0][:n]
+            with self.subTest(n=n):
+                self.assertAlmostEqual(self._estimar(valores).valor(), float(np.percentile(valores, 95)))
+
+    def test_proximo_do_numpy(self):
+        rng = np.random.default_rng(42)
+        distribuicoes = {
+            "normal": rng.normal(50, 10, 20000),
+            "uniforme": rng.uniform(0, 100, 20000),
+            "exponencial": rng.exponential(5, 20000),
+            # CPU de um host ocioso com picos: muitos valores repetidos
+            "cpu": np.where(rng.random(20000) < 0.9, 2.0, rng.uniform(50, 100, 20000)),
+        }
+        for nome, valores in distribuicoes.items():
+            with self.subTest(distribuicao=nome):
+                exato = np.percentile(valores, 95)
+                amplitude = valores.max() - valores.min()
+                self.assertLess(abs(self._estimar(valores).valor() - exato), 0.02 * amplitude)
+
+    def test_memoria_constante(self):
+        estimador = self._estimar(range(10000))
+        self.assertEqual(len(estimador.alturas), 5)
+        self.assertEqual(estimador.n, 10000)
+
+    def test_valores_constantes(self):
+        self.assertEqual(self._estimar([4.0] * 1000).valor(), 4.0)
+
+
+class TestPercentil(unittest.TestCase):
+    def test_igual_ao_numpy(self):
+        valores = sorted(np.random.default_rng(1).normal(size=101).tolist())
+        for p in (0, 5, 50, 95, 100):
+            self.assertAlmostEqual(percentil(valores, p), float(np.percentile(valores, p)))
+
+    def test_vazio(self):
+        self.assertIsNone(percentil([], 95))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# app/test_serie_temporal.py
+"""Testes do formato .hts: codificação delta/XOR, chunks e conversão do CSV."""
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from serie_temporal import (
+    EscritorSerie,
+    _codificar_floats,
+    _codificar_timestamps,
+    _decodificar_floats,
+    _decodificar_timestamps,
+    converter_csv,
+    indice_chunks,
+    ler_tudo,
+)
+
+
+CAMPOS = ["timestamp", "cpu_percent", "mem_percent"]
+
+
+def _amostras(n, inicio_s=0):
+    """Uma amostra por segundo (com alguns ms de atraso), mem_percent vazio a cada 11."""
+    origem = np.datetime64("2025-01-01T00:00:00", "ms")
+    return [
+        {
+            "timestamp": str(origem + np.timedelta64((inicio_s + i) * 1000 + i % 7, "ms")).replace("T", " "),
+            "cpu_percent": round(10 + (i * 37 % 90) / 3, 1),
+            "mem_percent": "" if i % 11 == 0 else 40.0 + i / 100,
+        }
+        for i in range(n)
+    ]
+
+
+class TestCodificacao(unittest.TestCase):
+    def test_floats_ida_e_volta_bit_a_bit(self):
+        rng = np.random.default_rng(42)
+        valores = np.concatenate([
+            rng.normal(50, 20, 1000),
+            [np.nan, np.inf, -np.inf, 0.0, -0.0, 5e-324, -1.7976931348623157e308],
+            np.full(100, 12.5),
+        ])
+        decodificado = _decodificar_floats(_codificar_floats(valores), len(valores))
+        np.testing.assert_array_equal(decodificado.view(np.uint64), valores.view(np.uint64))
+
+    def test_timestamps_ida_e_volta(self):
+        # Intervalos irregulares, um passo para trás (ajuste de relógio) e valores repetidos
+        ms = np.array([1_700_000_000_000, 1_700_000_000_020, 1_700_000_000_020, 1_699_999_999_000, 1_700_000_005_000])
+        decodificado = _decodificar_timestamps(_codificar_timestamps(ms), len(ms))
+        np.testing.assert_array_equal(decodificado.astype(np.int64), ms)
+
+    def test_valores_parecidos_comprimem(self):
+        valores = 50 + np.arange(4096) * 0.001
+        self.assertLess(len(_codificar_floats(valores)), valores.nbytes / 2)
+
+
+class TestArquivo(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "historico.hts")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def _gravar(self, amostras, linhas_por_chunk=100):
+        escritor = EscritorSerie(self.caminho, CAMPOS, linhas_por_chunk=linhas_por_chunk)
+        escritor.escrever(amostras)
+        escritor.fechar()
+
+    def test_escrita_e_leitura(self):
+        amostras = _amostras(1050)
+        self._gravar(amostras)
+        self.assertEqual(len(indice_chunks(self.caminho)), 11)
+        timestamps, valores = ler_tudo(self.caminho)
+        esperado = np.array([a["timestamp"].replace(" ", "T") for a in amostras], dtype="datetime64[ms]")
+        np.testing.assert_array_equal(timestamps, esperado)
+        np.testing.assert_array_equal(valores["cpu_percent"], [a["cpu_percent"] for a in amostras])
+        mem = np.array([np.nan if a["mem_percent"] == "" else a["mem_percent"] for a in amostras])
+        np.testing.assert_array_equal(valores["mem_percent"], mem)
+
+    def test_filtro_de_periodo_e_colunas(self):
+        self._gravar(_amostras(1000))
+        timestamps, valores = ler_tudo(
+            self.caminho, colunas=["cpu_percent"], inicio="2025-01-01T00:05:00", fim="2025-01-01T00:06:00"
+        )
+        self.assertEqual(list(valores), ["cpu_percent"])
+        self.assertEqual(len(timestamps), 60)
+        self.assertTrue((timestamps >= np.datetime64("2025-01-01T00:05:00")).all())
+        self.assertTrue((timestamps <= np.datetime64("2025-01-01T00:06:00")).all())
+
+    def test_acrescenta_e_ignora_chunk_truncado(self):
+        self._gravar(_amostras(200))
+        self._gravar(_amostras(100, inicio_s=200))
+        tamanho = os.path.getsize(self.caminho)
+        self._gravar(_amostras(100, inicio_s=300))
+        # Gravação interrompida no meio do último chunk
+        with open(self.caminho, "r+b") as f:
+            f.truncate(tamanho + (os.path.getsize(self.caminho) - tamanho) // 2)
+        timestamps, _ = ler_tudo(self.caminho)
+        self.assertEqual(len(timestamps), 300)
+
+    def test_converter_csv_duas_vezes_sem_duplicar(self):
+        csv_path = os.path.join(self.pasta.name, "historico.csv")
+        amostras = _amostras(5000)
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.DictWriter(f, fieldnames=CAMPOS)
+            escritor.writeheader()
+            escritor.writerows(amostras)
+        for _ in range(2):
+            destino = converter_csv(csv_path, linhas_por_chunk=1000)
+        self.assertEqual(destino, os.path.join(self.pasta.name, "historico.hts"))
+        self.assertFalse(os.path.exists(destino + ".tmp"))
+        timestamps, valores = ler_tudo(destino)
+        self.assertEqual(len(timestamps), 5000)
+        np.testing.assert_array_equal(valores["cpu_percent"], [a["cpu_percent"] for a in amostras])
+
+
+if __name__ == "__main__":
+    unittest.main()
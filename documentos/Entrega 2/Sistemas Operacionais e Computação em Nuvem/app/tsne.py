@@ -1,42 +1,48 @@
-import pandas as pd
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.preprocessing import StandardScaler
 from sklearn.manifold import TSNE
 import matplotlib.pyplot as plt
 import os
 
-def gerar_visualizacao(input_path="/data/base_unificada.csv", output_path="/data/tsne_visualizacao.png"):
-    # Leitura dos dados
-    dataf = pd.read_csv(input_path, sep=";", encoding="cp1250")
+from base_colunar import ler_colunas, matriz
+from perfil import etapa
 
-    # Label Encoding
-    le = LabelEncoder()
-    for col in ['segmento', 'empresa', 'produto', 'customer']:
-        dataf[col] = le.fit_transform(dataf[col])
+COLUNAS_NUMERICAS = ['quantidade', 'totalAmount', 'preparationTime', 'takeOutTimeInSeconds']
+
+def gerar_visualizacao(input_path="/data/base_unificada.csv", output_path="/data/tsne_visualizacao.png", colunar=True):
+    # Leitura só das colunas usadas; 'segmento' já vem codificado (cor do gráfico)
+    with etapa("carregar"):
+        colunas = ler_colunas(input_path, COLUNAS_NUMERICAS + ['segmento'], colunar=colunar)
 
     # Seleciona colunas numéricas
-    numerical_cols = ['quantidade', 'totalAmount', 'preparationTime', 'takeOutTimeInSeconds']
-    df_numerical = dataf[numerical_cols]
+    df_numerical = matriz(colunas, COLUNAS_NUMERICAS)
 
     # Normalização
-    scaler = StandardScaler()
-    df_scaled = scaler.fit_transform(df_numerical)
+    with etapa("escalar"):
+        scaler = StandardScaler()
+        df_scaled = scaler.fit_transform(df_numerical)
+
+    plotar_tsne(df_scaled, colunas['segmento'], output_path)
 
+def plotar_tsne(df_scaled, cores, output_path="/data/tsne_visualizacao.png"):
+    """Aplica o t-SNE nos dados já normalizados e salva o gráfico colorido por `cores`."""
     # Aplica t-SNE
-    tsne = TSNE(n_components=2, random_state=42, perplexity=30)
-    X_tsne = tsne.fit_transform(df_scaled)
+    with etapa("ajustar"):
+        tsne = TSNE(n_components=2, random_state=42, perplexity=30)
+        X_tsne = tsne.fit_transform(df_scaled)
 
     # Cria gráfico
-    plt.figure(figsize=(8, 6))
-    plt.scatter(X_tsne[:, 0], X_tsne[:, 1], c=dataf['segmento'], cmap='viridis', s=50)
-    plt.colorbar()
-    plt.title('Visualização de Dados com t-SNE')
-    plt.xlabel('Componente 1')
-    plt.ylabel('Componente 2')
-
-    # Salva no diretório data/
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    plt.savefig(output_path)
-    plt.close()
+    with etapa("plotar"):
+        plt.figure(figsize=(8, 6))
+        plt.scatter(X_tsne[:, 0], X_tsne[:, 1], c=cores, cmap='viridis', s=50)
+        plt.colorbar()
+        plt.title('Visualização de Dados com t-SNE')
+        plt.xlabel('Componente 1')
+        plt.ylabel('Componente 2')
+
+        # Salva no diretório data/
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        plt.savefig(output_path)
+        plt.close()
     print(f"Gráfico salvo em {output_path}")
 
 if __name__ == "__main__":